@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+AMFI NAV Ingest
+Reads AMFI's NAVAll.txt (https://www.amfiindia.com/spages/NAVAll.txt) in a
+single streaming pass and writes amfi_nav_data.tsv and amfi_nav_data.json
+with the same columns and record schema as extract_amfi_data.sh, without
+starting a process per field.
+
+NAVAll.txt is semicolon separated:
+
+    Scheme Code;ISIN Div Payout/ ISIN Growth;ISIN Div Reinvestment;Scheme Name;Net Asset Value;Date
+
+    Open Ended Schemes(Debt Scheme - Banking and PSU Fund)
+
+    Aditya Birla Sun Life Mutual Fund
+
+    119551;INF209KA12Z1;INF209KA13Z9;Aditya Birla Sun Life Banking & PSU Debt Fund  - DIRECT - IDCW;108.1037;25-Aug-2025
+
+Section lines give the scheme type and fund house of the rows below them;
+they are kept on each record (not written to the TSV/JSON, whose schema is
+unchanged).
+"""
+
+import argparse
+import json
+import os
+import re
+import time
+from collections import namedtuple
+from datetime import datetime, timezone
+
+import requests
+
+AMFI_URL = "https://www.amfiindia.com/spages/NAVAll.txt"
+FIELDS = ('scheme_code', 'scheme_name', 'asset_value', 'date', 'isin_growth', 'isin_reinvestment')
+TSV_HEADER = ('Scheme Code', 'Scheme Name', 'Asset Value', 'Date', 'ISIN Growth', 'ISIN Reinvestment')
+JSON_FORMAT = "Scheme Code, Scheme Name, Asset Value, Date, ISIN Growth, ISIN Reinvestment"
+
+NavRecord = namedtuple('NavRecord', FIELDS + ('scheme_type', 'fund_house'))
+
+NAV_PATTERN = re.compile(r'[0-9]+\.?[0-9]*')  # what the shell script accepts as a NAV ("N.A." is not)
+SCHEME_TYPE_PATTERN = re.compile(r'Schemes?\s*\(|Schemes$')  # "Open Ended Schemes(Debt Scheme - ...)"
+
+
+def parse_nav_lines(lines):
+    """
+    NavRecord for every valid NAV row in `lines` (str, with or without line
+    endings). Rows are kept on the same terms as extract_amfi_data.sh: at
+    least six fields, a scheme code and name, and a numeric NAV.
+    """
+    scheme_type = fund_house = None
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        if ';' not in line:
+            # Section line; fund houses aren't always capitalized ("quant Mutual Fund")
+            if SCHEME_TYPE_PATTERN.search(line):
+                scheme_type, fund_house = line, None
+            else:
+                fund_house = line
+            continue
+        if 'A' <= line[0] <= 'Z':
+            continue  # the column header
+        fields = line.split(';')
+        if len(fields) < 6:
+            continue
+        code, isin_growth, isin_reinvestment, name, nav, date = (field.strip() for field in fields[:6])
+        if code and name and NAV_PATTERN.fullmatch(nav):
+            yield NavRecord(code, name, nav, date, isin_growth, isin_reinvestment, scheme_type, fund_house)
+
+
+def read_nav_file(path):
+    """Lines of a saved NAVAll.txt"""
+    with open(path, encoding='utf-8', errors='replace') as f:
+        yield from f
+
+
+def fetch_nav_lines(url=AMFI_URL, timeout=(10, 60)):
+    """Lines of NAVAll.txt as they download"""
+    with requests.get(url, stream=True, timeout=timeout) as response:
+        response.raise_for_status()
+        for line in response.iter_lines(chunk_size=64 * 1024):
+            yield line.decode('utf-8', errors='replace')
+
+
+def read_tsv(path):
+    """NavRecords from an amfi_nav_data.tsv (scheme type and fund house are not in it)"""
+    with open(path, encoding='utf-8') as f:
+        next(f, None)  # header
+        for line in f:
+            fields = line.rstrip('\r\n').split('\t')
+            if len(fields) == 6:
+                yield NavRecord(*fields, None, None)
+
+
+def records_from(source):
+    """NavRecords from an amfi_nav_data.tsv, a saved NAVAll.txt or a NAVAll.txt URL"""
+    if source.endswith('.tsv'):
+        return read_tsv(source)
+    if source.startswith(('http://', 'https://')):
+        return parse_nav_lines(fetch_nav_lines(source))
+    return parse_nav_lines(read_nav_file(source))
+
+
+def _atomic_open(path):
+    return open(path + '.part', 'w', encoding='utf-8', newline='\n')
+
+
+def write_outputs(records, tsv_path=None, json_path=None, source=AMFI_URL):
+    """
+    Write `records` to the TSV and/or JSON file in one pass; returns the
+    record count. Files are written under a .part name and renamed when
+    complete, so a failed run leaves the previous files in place.
+    """
+    encode = json.JSONEncoder(ensure_ascii=False).encode
+    tsv = _atomic_open(tsv_path) if tsv_path else None
+    json_rows = [] if json_path else None
+    count = 0
+    try:
+        if tsv:
+            tsv.write('\t'.join(TSV_HEADER) + '\n')
+        for record in records:
+            count += 1
+            if tsv:
+                tsv.write('\t'.join(record[:6]) + '\n')
+            if json_rows is not None:
+                json_rows.append(encode(dict(zip(FIELDS, record))))
+    finally:
+        if tsv:
+            tsv.close()
+    if tsv_path:
+        os.replace(tsv_path + '.part', tsv_path)
+
+    if json_path:
+        # total_records comes before the data, so the rows are encoded first and written after
+        metadata = {
+            'source': source,
+            'extracted_at': datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'total_records': count,
+            'format': JSON_FORMAT,
+        }
+        with _atomic_open(json_path) as f:
+            f.write('{\n  "metadata": ' + json.dumps(metadata, indent=2, ensure_ascii=False).replace('\n', '\n  '))
+            f.write(',\n  "data": [\n    ' + ',\n    '.join(json_rows) + '\n  ]\n}\n')
+        os.replace(json_path + '.part', json_path)
+    return count
+
+
+def ingest(source=AMFI_URL, tsv_path="amfi_nav_data.tsv", json_path="amfi_nav_data.json",
+           search_index_path=None, history_path=None, changes_path=None):
+    """
+    Read NAVAll.txt from a URL or local file and write the TSV/JSON outputs;
+    with `search_index_path`, also create or update the scheme search index
+    (see amfi_scheme_search.py), with `history_path` append the day to the
+    NAV history (see amfi_nav_history.py), and with `changes_path` write the
+    changes since the TSV being replaced (see amfi_nav_diff.py)
+    """
+    lines = fetch_nav_lines(source) if source.startswith(('http://', 'https://')) else read_nav_file(source)
+    records = parse_nav_lines(lines)
+    if not search_index_path and not history_path and not changes_path:
+        return write_outputs(records, tsv_path, json_path, source=source)
+
+    records = list(records)
+    if changes_path and tsv_path and os.path.exists(tsv_path):
+        from amfi_nav_diff import SnapshotDiff
+        SnapshotDiff(tsv_path, records).write(changes_path)
+    count = write_outputs(records, tsv_path, json_path, source=source)
+    if search_index_path:
+        from amfi_scheme_search import SchemeSearchIndex
+        if os.path.exists(search_index_path):
+            index = SchemeSearchIndex.load(search_index_path)
+            index.update(records, source=source)
+        else:
+            index = SchemeSearchIndex.build(records, source=source)
+        index.save(search_index_path)
+    if history_path:
+        from amfi_nav_history import NavHistory
+        NavHistory(history_path).append(records)
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract scheme NAVs from AMFI's NAVAll.txt")
+    parser.add_argument("--source", default=AMFI_URL, help=f"NAVAll.txt URL or local path (default: {AMFI_URL})")
+    parser.add_argument("--tsv", default="amfi_nav_data.tsv", help="TSV output file ('' to skip)")
+    parser.add_argument("--json", default="amfi_nav_data.json", help="JSON output file ('' to skip)")
+    parser.add_argument("--search-index", help="scheme search index to create or update (see amfi_scheme_search.py)")
+    parser.add_argument("--history", help="NAV history directory to append the day to (see amfi_nav_history.py)")
+    parser.add_argument("--changes", help="NDJSON file for the changes since the previous --tsv (see amfi_nav_diff.py)")
+    args = parser.parse_args()
+
+    print(f"📥 Reading NAV data from {args.source}...")
+    start = time.perf_counter()
+    try:
+        count = ingest(args.source, args.tsv or None, args.json or None, args.search_index, args.history,
+                       args.changes)
+    except (requests.RequestException, OSError) as e:
+        raise SystemExit(f"❌ Failed to read NAV data: {e}")
+    elapsed = time.perf_counter() - start
+    print(f"✅ Extracted {count} records in {elapsed:.2f}s")
+    for path in (args.tsv, args.json, args.search_index, args.changes):
+        if path and os.path.exists(path):  # no changes without a previous TSV
+            print(f"💾 {path} ({os.path.getsize(path) / 1024:.0f} KB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+AMFI NAV Analytics
+Returns, rolling volatility, drawdowns and percentile ranks for every scheme
+at once, computed with numpy on a NAV panel: the schemes x trading days
+matrix of NAVs that NavHistory.panel() reads out of the NAV history (see
+amfi_nav_history.py), NaN on the days a scheme has no NAV.
+
+  returns       point-to-point, or compounded annual growth for periods over
+                a year (as AMFI reports them), from each scheme's latest NAV
+                on or before the start and end dates
+  volatility    annualized standard deviation of the returns between a
+                scheme's consecutive NAVs over a trailing window of trading days
+  drawdowns     fall from the highest NAV so far, and each scheme's deepest
+  ranks         percentile of a value among the schemes of its AMFI category
+                (from NAVAll.txt's section lines) or among all schemes
+
+Write the report for the last day in the history, ranked within categories:
+
+    python amfi_nav_analytics.py --history amfi_nav_history --categories NAVAll.txt
+"""
+
+import argparse
+import os
+import time
+from datetime import date
+
+import numpy as np
+
+from amfi_ingest import AMFI_URL, records_from
+from amfi_nav_history import NavHistory, to_datetime64, to_ordinal
+from amfi_nav_store import NavStore
+
+TRADING_DAYS = 252  # per year, to annualize daily volatility
+MAX_STALE_DAYS = 7  # a NAV older than this on a return's start or end date doesn't count
+
+
+def years_before(day, years):
+    """The same calendar day `years` earlier (28 February for 29 February)"""
+    day = date.fromordinal(to_ordinal(day))
+    try:
+        return day.replace(year=day.year - years)
+    except ValueError:
+        return day.replace(year=day.year - years, day=28)
+
+
+def _rolling_sum(values, window):
+    """Sums of the trailing `window` columns of `values`, for every column"""
+    totals = np.cumsum(values, axis=1)
+    totals[:, window:] = totals[:, window:] - totals[:, :-window]
+    return totals
+
+
+class NavPanel:
+    """
+    NAVs of many schemes over the same trading days: codes (n,), dates (m,)
+    as date ordinals and navs (n, m), NaN where a scheme has no NAV that day.
+    Every metric is an array over all the schemes.
+    """
+
+    def __init__(self, codes, dates, navs):
+        self.codes = np.asarray(codes, np.int64)
+        self.dates = np.asarray(dates, np.int32)
+        self.navs = navs
+        self._filled = None
+        self._sources = None
+
+    @classmethod
+    def from_history(cls, history, start=None, end=None):
+        """Panel of every scheme in a NavHistory over [start, end]"""
+        return cls(*history.panel(start, end))
+
+    def __len__(self):
+        return len(self.codes)
+
+    def row(self, code):
+        """Row of scheme `code`, or None"""
+        row = int(self.codes.searchsorted(code))
+        return row if row < len(self.codes) and self.codes[row] == code else None
+
+    def _fill(self):
+        """NAVs carried forward over the days a scheme has none, and the column each comes from (-1 before the first)"""
+        if self._filled is None:
+            sources = np.where(np.isnan(self.navs), -1, np.arange(self.navs.shape[1], dtype=np.int32))
+            np.maximum.accumulate(sources, axis=1, out=sources)
+            # Before a scheme's first NAV the source is -1, which reads column 0: NaN too
+            self._filled = np.take_along_axis(self.navs, sources.clip(0), axis=1)
+            self._sources = sources
+        return self._filled, self._sources
+
+    def column(self, day):
+        """Column of the last trading day on or before `day` (-1 before the first)"""
+        return int(np.searchsorted(self.dates, to_ordinal(day), side='right')) - 1
+
+    def as_of(self, day, max_stale=MAX_STALE_DAYS):
+        """Each scheme's latest NAV on or before `day`; NaN if it has none or it is more than max_stale days old"""
+        column = self.column(day)
+        if column < 0:
+            return np.full(len(self.codes), np.nan)
+        filled, sources = self._fill()
+        navs = filled[:, column].copy()
+        if max_stale is not None:
+            navs[self.dates[sources[:, column].clip(0)] < to_ordinal(day) - max_stale] = np.nan
+        return navs
+
+    def returns(self, start, end, annualize=False, max_stale=MAX_STALE_DAYS):
+        """Every scheme's return from `start` to `end`, or its compounded annual growth rate with annualize"""
+        growth = self.as_of(end, max_stale) / self.as_of(start, max_stale)
+        if annualize:
+            return growth ** (365 / (to_ordinal(end) - to_ordinal(start))) - 1
+        return growth - 1
+
+    def trailing_returns(self, years=(1, 3, 5), as_of=None, max_stale=MAX_STALE_DAYS):
+        """{years: returns} over each number of years up to `as_of` (the last day), annualized beyond one year"""
+        end = date.fromordinal(int(self.dates[-1])) if as_of is None else as_of
+        return {period: self.returns(years_before(end, period), end, period > 1, max_stale) for period in years}
+
+    def daily_returns(self):
+        """Return since each scheme's previous NAV on the days it has one, NaN on the others and its first"""
+        filled, _ = self._fill()
+        returns = np.full(self.navs.shape, np.nan)
+        np.divide(self.navs[:, 1:], filled[:, :-1], out=returns[:, 1:])
+        returns -= 1
+        return returns
+
+    def rolling_volatility(self, window=TRADING_DAYS, min_periods=None):
+        """
+        Annualized volatility of daily returns over the trailing `window`
+        trading days, for every scheme and day; NaN with fewer than
+        `min_periods` returns in the window (half the window by default)
+        """
+        min_periods = window // 2 if min_periods is None else min_periods
+        returns = self.daily_returns()
+        present = ~np.isnan(returns)
+        returns[~present] = 0
+        counts = _rolling_sum(present.astype(np.int32), window)
+        sums = _rolling_sum(returns, window)
+        returns *= returns
+        squares = _rolling_sum(returns, window)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            variance = (squares - sums * sums / counts) / (counts - 1)
+        variance[counts < max(min_periods, 2)] = np.nan
+        return np.sqrt(variance.clip(0) * TRADING_DAYS)
+
+    def drawdowns(self):
+        """Each day's fall from the scheme's highest NAV so far (0 at a new high, -0.25 for 25% below it)"""
+        filled, _ = self._fill()
+        return filled / np.fmax.accumulate(filled, axis=1) - 1
+
+    def max_drawdown(self):
+        """(deepest drawdown, dates of its peak and trough) for every scheme; NaN and NaT without NAVs"""
+        depth = np.full(len(self.codes), np.nan)
+        peak_dates = np.full(len(self.codes), np.datetime64('NaT'), 'datetime64[D]')
+        trough_dates = peak_dates.copy()
+        if not len(self.dates):
+            return depth, peak_dates, trough_dates
+        filled, _ = self._fill()
+        highs = np.fmax.accumulate(filled, axis=1)
+        drawdowns = filled / highs - 1
+        # The peak is the last day at the high the trough is measured from
+        peaks = np.where(filled >= highs, np.arange(filled.shape[1], dtype=np.int32), -1)
+        np.maximum.accumulate(peaks, axis=1, out=peaks)
+        rows = np.flatnonzero(~np.isnan(highs[:, -1]))
+        drawdowns = drawdowns[rows]
+        drawdowns[np.isnan(drawdowns)] = np.inf  # before a scheme's first NAV
+        troughs = drawdowns.argmin(axis=1)
+        depth[rows] = drawdowns[np.arange(len(rows)), troughs]
+        peak_dates[rows] = to_datetime64(self.dates[peaks[rows, troughs]])
+        trough_dates[rows] = to_datetime64(self.dates[troughs])
+        return depth, peak_dates, trough_dates
+
+
+def percentile_ranks(values, groups=None):
+    """
+    Percentile rank (0-100] of each value among the values of its group (all
+    values without groups), highest value 100, ties sharing their average
+    rank; NaN values get NaN and don't count. Negate values where lower is
+    better, such as volatility.
+    """
+    values = np.asarray(values, np.float64)
+    groups = np.zeros(len(values), np.int64) if groups is None else np.asarray(groups)
+    ranks = np.full(len(values), np.nan)
+    valid = np.flatnonzero(~np.isnan(values))
+    if not len(valid):
+        return ranks
+    order = valid[np.lexsort((values[valid], groups[valid]))]
+    sorted_values, sorted_groups = values[order], groups[order]
+    count = len(order)
+    # Sorted by group then value: runs of one group are its schemes, runs of one value within it ties
+    group_starts = np.r_[True, sorted_groups[1:] != sorted_groups[:-1]]
+    tie_starts = group_starts | np.r_[True, sorted_values[1:] != sorted_values[:-1]]
+    positions = np.arange(count)
+    first_in_group = np.maximum.accumulate(np.where(group_starts, positions, 0))
+    group_sizes = np.diff(np.r_[np.flatnonzero(group_starts), count])
+    ties = np.flatnonzero(tie_starts)
+    average = (ties + np.r_[ties[1:], count] - 1) / 2  # mean position of each run of ties
+    rank = average[np.cumsum(tie_starts) - 1] - first_in_group + 1
+    ranks[order] = 100 * rank / group_sizes[np.cumsum(group_starts) - 1]
+    return ranks
+
+
+def scheme_categories(codes, source):
+    """
+    (category id of each of `codes`, category names by id) from an
+    amfi_nav_store.py file or a NAVAll.txt file or URL; the id is -1 for
+    schemes the source doesn't categorize (amfi_nav_data.tsv categorizes none)
+    """
+    store = NavStore.load(source) if source.endswith('.navstore') else NavStore.build(records_from(source))
+    codes = np.asarray(codes, np.int64)
+    if not len(store):
+        return np.full(len(codes), -1, np.int32), []
+    order = np.argsort(store.scheme_code, kind='stable')
+    known = store.scheme_code[order]
+    at = known.searchsorted(codes).clip(max=len(known) - 1)
+    ids = np.where(known[at] == codes, store.scheme_type_id[order[at]], -1).astype(np.int32)
+    return ids, store.strings('scheme_type')
+
+
+def _percent(value):
+    return '-' if np.isnan(value) else f'{value * 100:.2f}'
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Returns, volatility, drawdowns and ranks of every AMFI scheme")
+    parser.add_argument("--history", default="amfi_nav_history", help="NAV history directory (see amfi_nav_history.py)")
+    parser.add_argument("--as-of", help="report date (YYYY-MM-DD, default: the last day in the history)")
+    parser.add_argument("--years", type=int, nargs="+", default=[1, 3, 5], help="trailing return periods in years")
+    parser.add_argument("--categories",
+                        help=f"NAVAll.txt, a URL such as {AMFI_URL} or an amfi_nav_store.py file, to rank "
+                             "schemes within their AMFI category (default: among all schemes)")
+    parser.add_argument("--output", default="amfi_nav_analytics.tsv", help="TSV report to write")
+    args = parser.parse_args()
+
+    if not os.path.exists(os.path.join(args.history, "manifest.json")):
+        raise SystemExit(f"❌ No NAV history at {args.history}; start one with: python amfi_nav_history.py append")
+    start = time.perf_counter()
+    history = NavHistory(args.history)
+    schemes = history.manifest['head']['schemes']
+    as_of = date.fromisoformat(args.as_of) if args.as_of else date.fromordinal(int(history.head['last'][:schemes].max()))
+    first = years_before(as_of, max(args.years)).toordinal() - MAX_STALE_DAYS
+    panel = NavPanel.from_history(history, first, as_of)
+    current = np.flatnonzero(~np.isnan(panel.as_of(as_of)))
+    if not len(current):
+        raise SystemExit(f"❌ No scheme has a NAV within {MAX_STALE_DAYS} days of {as_of}")
+
+    returns = panel.trailing_returns(args.years, as_of)
+    volatility = panel.rolling_volatility()[:, panel.column(as_of)]
+    depth, peaks, troughs = panel.max_drawdown()
+    if args.categories:
+        groups, names = scheme_categories(panel.codes, args.categories)
+    else:
+        groups, names = np.full(len(panel), -1, np.int32), []
+    ranks = {period: percentile_ranks(values[current], groups[current]) for period, values in returns.items()}
+
+    header = (['Scheme Code', 'Category'] + [f'Return {period}Y %' for period in args.years]
+              + [f'Rank {period}Y' for period in args.years]
+              + ['Volatility 1Y %', f'Max Drawdown {max(args.years)}Y %', 'Drawdown Peak', 'Drawdown Trough'])
+    with open(args.output, 'w', encoding='utf-8', newline='\n') as f:
+        f.write('\t'.join(header) + '\n')
+        for i, row in enumerate(current.tolist()):
+            fields = [str(panel.codes[row]), names[groups[row]] if groups[row] >= 0 else '-']
+            fields += [_percent(returns[period][row]) for period in args.years]
+            fields += ['-' if np.isnan(ranks[period][i]) else f'{ranks[period][i]:.1f}' for period in args.years]
+            fields += [_percent(volatility[row]), _percent(depth[row]), str(peaks[row]), str(troughs[row])]
+            f.write('\t'.join(fields) + '\n')
+    print(f"✅ Analysed {len(current)} schemes as of {as_of} ({len(panel.dates)} trading days) "
+          f"in {time.perf_counter() - start:.2f}s")
+    print(f"💾 {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+AMFI NAV Diff
+Changes between two AMFI NAV snapshots (amfi_nav_data.tsv or NAVAll.txt
+files, or a NAVAll.txt URL), joined on scheme code and written as NDJSON,
+one line per change:
+
+  added     a scheme only in the new snapshot (its new row)
+  removed   a scheme only in the old snapshot (its old row)
+  isin      a growth or reinvestment ISIN changed ([old, new] for each that did)
+  stale     a scheme's NAV date didn't advance although it was recent in the
+            old snapshot (within --stale-days of its newest date), so schemes
+            that stopped publishing long ago aren't reported every day
+  nav       the NAV moved by --nav-threshold percent or more
+
+plus summary counts. The old snapshot is the build side of a hash join: its
+rows go into a dict by scheme code and the new snapshot streams past it, so
+only one snapshot is ever held in memory. A snapshot file over
+--partition-mb is first split by a hash of the scheme code into partition
+files on both sides, which are then joined one pair at a time (a Grace hash
+join), so memory stays bounded by the partition size for multi-hundred-MB
+files; changes then come partition by partition instead of in file order.
+A scheme listed twice in a snapshot is compared on its first row.
+
+    python amfi_nav_diff.py --old amfi_nav_data.prev.tsv --new amfi_nav_data.tsv
+    python amfi_nav_diff.py --old NAVAll.prev.txt --new https://www.amfiindia.com/spages/NAVAll.txt --output -
+"""
+
+import argparse
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+
+from amfi_ingest import AMFI_URL, FIELDS, TSV_HEADER, read_tsv, records_from
+from amfi_nav_store import date_ordinal
+
+CHANGES = ('added', 'removed', 'isin', 'stale', 'nav')
+PARTITION_BYTES = 64 * 2 ** 20
+MATCHED = object()  # replaces old rows the new snapshot has had
+
+
+class SnapshotDiff:
+    """
+    Diff of an old and a new snapshot, each a source for
+    amfi_ingest.records_from() or an iterable of NavRecords. changes()
+    yields the change dicts and counts them, and the rows read, in summary.
+    """
+
+    def __init__(self, old, new, nav_threshold=0.05, stale_days=7, partition_bytes=PARTITION_BYTES, workdir=None):
+        self.old = old
+        self.new = new
+        self.nav_threshold = nav_threshold
+        self.stale_days = stale_days
+        # Partitions are sized by the old snapshot, the side held in memory; records and URLs get one
+        self.partitions = 1
+        if isinstance(old, str) and os.path.isfile(old):
+            self.partitions = max(1, -(-os.path.getsize(old) // int(partition_bytes)))
+        self.workdir = workdir
+        self.summary = Counter()
+        self._ordinals = {}
+
+    def _ordinal(self, text):
+        ordinal = self._ordinals.get(text)
+        if ordinal is None:
+            ordinal = self._ordinals[text] = date_ordinal(text)
+        return ordinal
+
+    def changes(self):
+        """Change dicts ({'change': kind, 'scheme_code': ..., ...}) in a single pass over each snapshot"""
+        self.summary = Counter(dict.fromkeys(('old_rows', 'new_rows', 'duplicates') + CHANGES, 0))
+        old, new = (records_from(source) if isinstance(source, str) else source for source in (self.old, self.new))
+        if self.partitions == 1:
+            yield from self._join(old, new)
+            return
+        with tempfile.TemporaryDirectory(dir=self.workdir) as directory:
+            newest = self._spill(old, directory, 'old')
+            self._spill(new, directory, 'new')
+            for part in range(self.partitions):
+                yield from self._join(read_tsv(os.path.join(directory, f'old-{part}.tsv')),
+                                      read_tsv(os.path.join(directory, f'new-{part}.tsv')), newest)
+
+    def _spill(self, records, directory, side):
+        """Split `records` into partition TSVs by scheme code hash; returns their newest date ordinal"""
+        files = [open(os.path.join(directory, f'{side}-{part}.tsv'), 'w', encoding='utf-8', newline='\n')
+                 for part in range(self.partitions)]
+        partitions, dates = self.partitions, set()
+        try:
+            for f in files:
+                f.write('\t'.join(TSV_HEADER) + '\n')
+            for record in records:
+                files[hash(record[0]) % partitions].write('\t'.join(record[:6]) + '\n')
+                dates.add(record[3])
+        finally:
+            for f in files:
+                f.close()
+        return max(map(self._ordinal, dates), default=0)
+
+    def _join(self, old, new, newest=None):
+        """Changes between `old` and `new` records; rows are counted here, so partitions add up"""
+        summary, ordinals, ordinal = self.summary, self._ordinals, self._ordinal
+        rows, old_rows, new_rows = {}, 0, 0
+        # Every row stays alive, so collections during the build would rescan the whole table again and again
+        collecting = gc.isenabled()
+        gc.disable()
+        try:
+            for old_rows, record in enumerate(old, 1):
+                if rows.setdefault(record[0], record) is not record:
+                    summary['duplicates'] += 1
+        finally:
+            if collecting:
+                gc.enable()
+        summary['old_rows'] += old_rows
+        if newest is None:
+            newest = max(map(ordinal, {record[3] for record in rows.values()}), default=0)
+        recent = newest - self.stale_days
+
+        for new_rows, record in enumerate(new, 1):
+            code, name, nav, day, growth, reinvestment = record[:6]
+            previous = rows.get(code)
+            if previous is MATCHED:
+                summary['duplicates'] += 1
+                continue
+            rows[code] = MATCHED
+            if previous is None:
+                summary['added'] += 1
+                yield {'change': 'added', **dict(zip(FIELDS, record))}
+                continue
+            _, _, previous_nav, previous_day, previous_growth, previous_reinvestment = previous[:6]
+            if previous_growth != growth or previous_reinvestment != reinvestment:
+                summary['isin'] += 1
+                change = {'change': 'isin', 'scheme_code': code, 'scheme_name': name}
+                if previous_growth != growth:
+                    change['isin_growth'] = [previous_growth, growth]
+                if previous_reinvestment != reinvestment:
+                    change['isin_reinvestment'] = [previous_reinvestment, reinvestment]
+                yield change
+            if day == previous_day or (ordinals.get(day) or ordinal(day)) <= (ordinals.get(previous_day) or
+                                                                            ordinal(previous_day)):
+                if ordinal(previous_day) >= recent:
+                    summary['stale'] += 1
+                    yield {'change': 'stale', 'scheme_code': code, 'scheme_name': name, 'date': day}
+            if nav != previous_nav:
+                old_nav, new_nav = float(previous_nav), float(nav)
+                move = new_nav / old_nav - 1 if old_nav else None
+                if move is None or abs(move) >= self.nav_threshold:
+                    summary['nav'] += 1
+                    yield {'change': 'nav', 'scheme_code': code, 'scheme_name': name,
+                           'asset_value': [previous_nav, nav], 'date': [previous_day, day],
+                           'move_pct': None if move is None else round(move * 100, 4)}
+        summary['new_rows'] += new_rows
+
+        for previous in rows.values():
+            if previous is not MATCHED:
+                summary['removed'] += 1
+                yield {'change': 'removed', **dict(zip(FIELDS, previous))}
+
+    def write(self, path):
+        """Write the changes as NDJSON to `path` ('-' for stdout; files atomically, via .part); returns the summary"""
+        encode = json.JSONEncoder(ensure_ascii=False).encode
+        if path == '-':
+            for change in self.changes():
+                sys.stdout.write(encode(change) + '\n')
+        else:
+            try:
+                with open(path + '.part', 'w', encoding='utf-8', newline='\n') as f:
+                    for change in self.changes():
+                        f.write(encode(change) + '\n')
+            except BaseException:
+                os.remove(path + '.part')
+                raise
+            os.replace(path + '.part', path)
+        return dict(self.summary, partitions=self.partitions, nav_threshold_pct=self.nav_threshold * 100,
+                    stale_days=self.stale_days)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Changes between two AMFI NAV snapshots")
+    parser.add_argument("--old", required=True, help="previous amfi_nav_data.tsv or NAVAll.txt")
+    parser.add_argument("--new", default="amfi_nav_data.tsv",
+                        help=f"current amfi_nav_data.tsv, NAVAll.txt or a URL such as {AMFI_URL}")
+    parser.add_argument("--output", default="amfi_nav_changes.ndjson", help="NDJSON change set ('-' for stdout)")
+    parser.add_argument("--summary", help="also write the summary counts to this JSON file")
+    parser.add_argument("--nav-threshold", type=float, default=5.0, help="NAV move to report, in percent")
+    parser.add_argument("--stale-days", type=int, default=7,
+                        help="report a NAV date that didn't advance if it was this recent")
+    parser.add_argument("--partition-mb", type=float, default=PARTITION_BYTES / 2 ** 20,
+                        help="split larger snapshots into partitions of about this size on disk")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    diff = SnapshotDiff(args.old, args.new, args.nav_threshold / 100, args.stale_days, args.partition_mb * 2 ** 20)
+    try:
+        summary = diff.write(args.output)
+    except OSError as e:
+        raise SystemExit(f"❌ Failed to diff snapshots: {e}")
+    if args.summary:
+        with open(args.summary, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2)
+    out = sys.stderr if args.output == '-' else sys.stdout
+    print(f"🔀 {summary['old_rows']} -> {summary['new_rows']} rows: {summary['added']} added, "
+          f"{summary['removed']} removed, {summary['isin']} ISIN changes, {summary['stale']} stale, "
+          f"{summary['nav']} NAV moves >= {args.nav_threshold:g}% in {time.perf_counter() - start:.2f}s", file=out)
+    if args.output != '-':
+        print(f"💾 {args.output} ({os.path.getsize(args.output) / 1024:.0f} KB)", file=out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,467 @@
+#!/usr/bin/env python3
+"""
+AMFI NAV History
+Append-only NAV time series for every scheme, kept in a directory:
+
+  manifest.json        segments, the current head and the snapshots appended
+  head-<n>-*.npy       the open segment: per-scheme rows of (date, NAV)
+                       points in uncompressed, memory-mapped arrays that each
+                       append writes into in place
+  seg-<first>-<last>   sealed segments (one per --segment-snapshots appends,
+                       about a year of trading days): for every scheme one
+                       zlib block of its date-sorted points, with the scheme
+                       codes, block offsets and date ranges as arrays of a
+                       memory-mapped file (see amfi_nav_store.write_arrays)
+
+A day's amfi_nav_data.tsv / NAVAll.txt is appended in one vectorized step.
+A scheme gets a point only when its NAV date is newer than its last point,
+so schemes that haven't published since the previous day are not repeated
+and appending the same file again adds nothing. NAVs are stored as integer
+ticks (1e-4 or 1e-8, whichever reproduces every value of a block exactly,
+else raw float64), delta-coded and byte-shuffled before compression.
+
+A scheme's history is read from the head and the blocks of the segments
+overlapping the requested dates only.
+
+    python amfi_nav_history.py append --source amfi_nav_data.tsv
+    python amfi_nav_history.py history --code 119551 --start 2025-01-01
+    python amfi_nav_history.py info
+"""
+
+import argparse
+import json
+import os
+import time
+import zlib
+from datetime import date
+
+import numpy as np
+
+from amfi_ingest import AMFI_URL, records_from
+from amfi_nav_store import date_ordinal, read_arrays, write_arrays
+
+SEGMENT_MAGIC = b'AMFISEG1'
+HEAD_DTYPES = {'codes': np.int64, 'last': np.int32, 'counts': np.int32, 'dates': np.int32, 'navs': np.float64}
+EPOCH = date(1970, 1, 1).toordinal()
+SCALES = (4, 8)  # NAV tick sizes tried, as decimal places
+
+
+def to_datetime64(ordinals):
+    return (np.asarray(ordinals, np.int64) - EPOCH).astype('datetime64[D]')
+
+
+def to_ordinal(value):
+    """date, ISO string or None -> date ordinal (None stays None)"""
+    if value is None or isinstance(value, int):
+        return value
+    if isinstance(value, str):
+        value = date.fromisoformat(value)
+    return value.toordinal()
+
+
+def _shuffle(array):
+    """Bytes of `array` grouped by byte position, which zlib compresses far better for small numbers"""
+    return np.ascontiguousarray(array.view(np.uint8).reshape(-1, array.itemsize).T).tobytes()
+
+
+def _unshuffle(data, dtype, count):
+    dtype = np.dtype(dtype)
+    return np.frombuffer(data, np.uint8).reshape(dtype.itemsize, count).T.copy().view(dtype).ravel()
+
+
+def encode_block(dates, navs):
+    """(zlib block, scale) for one scheme's date-sorted points"""
+    date_deltas = np.diff(dates.astype('<i4'), prepend=np.int32(0)).astype('<i4')
+    for scale in SCALES:
+        ticks = np.rint(navs * 10.0 ** scale)
+        if np.array_equal(ticks / 10.0 ** scale, navs) and np.abs(ticks).max() < 2 ** 53:
+            payload = np.diff(ticks.astype('<i8'), prepend=np.int64(0))
+            return zlib.compress(_shuffle(date_deltas) + _shuffle(payload)), scale
+    return zlib.compress(_shuffle(date_deltas) + _shuffle(navs.astype('<f8'))), 0
+
+
+def decode_block(block, count, scale):
+    """(date ordinals, NAVs) of an encode_block() block with `count` points"""
+    data = zlib.decompress(block)
+    dates = _unshuffle(data[:4 * count], '<i4', count).cumsum(dtype=np.int32)
+    if scale:
+        navs = _unshuffle(data[4 * count:], '<i8', count).cumsum() / 10.0 ** scale
+    else:
+        navs = _unshuffle(data[4 * count:], '<f8', count)
+    return dates, navs
+
+
+def decode_blocks(data, count, scales):
+    """
+    (date ordinals, NAVs) as len(scales) x count matrices: decode_block()
+    for consecutive decompressed blocks of `count` points each, at once
+    """
+    rows = len(scales)
+    values = np.frombuffer(data, np.uint8).reshape(rows, 12 * count)
+    # Each block's bytes are grouped by byte position: (rows, bytes, count) -> (rows, count, bytes)
+    deltas = values[:, :4 * count].reshape(rows, 4, count).transpose(0, 2, 1).copy().view('<i4')
+    dates = deltas.reshape(rows, count).cumsum(axis=1, dtype=np.int32)
+    payload = values[:, 4 * count:].reshape(rows, 8, count).transpose(0, 2, 1).copy().reshape(rows, count * 8)
+    scales = np.asarray(scales)
+    navs = payload.view('<i8').cumsum(axis=1) / 10.0 ** scales[:, None]
+    raw = scales == 0
+    navs[raw] = payload[raw].view('<f8')
+    return dates, navs
+
+
+class Segment:
+    """A sealed segment file, mapped on first use"""
+
+    def __init__(self, path, entry):
+        self.path = path
+        self.first_date = to_ordinal(entry['first_date'])
+        self.last_date = to_ordinal(entry['last_date'])
+        self._arrays = None
+
+    @property
+    def arrays(self):
+        if self._arrays is None:
+            arrays, _ = read_arrays(self.path, SEGMENT_MAGIC)
+            # Plain ndarray views of the map: indexing a np.memmap is several times slower
+            self._arrays = {name: array.view(np.ndarray) for name, array in arrays.items()}
+        return self._arrays
+
+    @classmethod
+    def write(cls, path, codes, counts, dates, navs):
+        """Seal head rows (codes with their point counts and date/NAV matrices) into a segment file"""
+        keep = np.flatnonzero(counts > 0)
+        keep = keep[np.argsort(codes[keep], kind='stable')]
+        blocks, scales = [], np.zeros(len(keep), np.int8)
+        for i, row in enumerate(keep):
+            count = counts[row]
+            block, scales[i] = encode_block(dates[row, :count], navs[row, :count])
+            blocks.append(block)
+        offsets = np.zeros(len(keep) + 1, np.int64)
+        np.cumsum([len(block) for block in blocks], out=offsets[1:])
+        first = dates[keep, 0]
+        last = dates[keep, counts[keep] - 1]
+        entry = {
+            'file': os.path.basename(path),
+            'first_date': date.fromordinal(int(first.min())).isoformat(),
+            'last_date': date.fromordinal(int(last.max())).isoformat(),
+            'schemes': len(keep),
+            'points': int(counts[keep].sum()),
+        }
+        write_arrays(path, SEGMENT_MAGIC, entry, {
+            'codes': codes[keep].astype(np.int64),
+            'counts': counts[keep].astype(np.int32),
+            'scales': scales,
+            'first': first.astype(np.int32),
+            'last': last.astype(np.int32),
+            'offsets': offsets,
+            'blob': np.frombuffer(b''.join(blocks), np.uint8),
+        })
+        entry['bytes'] = os.path.getsize(path)
+        return entry
+
+    def read(self, code, start=None, end=None):
+        """(date ordinals, NAVs) of `code` in this segment, or None"""
+        arrays = self.arrays
+        codes = arrays['codes']
+        i = int(codes.searchsorted(code))
+        if i == len(codes) or codes[i] != code:
+            return None
+        if (start is not None and arrays['last'][i] < start) or (end is not None and arrays['first'][i] > end):
+            return None
+        offsets = arrays['offsets']
+        block = arrays['blob'][offsets[i]:offsets[i + 1]].tobytes()
+        return decode_block(block, int(arrays['counts'][i]), int(arrays['scales'][i]))
+
+    def read_all(self, start=None, end=None):
+        """
+        (codes, point counts, date ordinals, NAVs) of the schemes with points
+        in [start, end]; each scheme's points are consecutive and oldest first
+        """
+        arrays = self.arrays
+        keep = np.ones(len(arrays['codes']), bool)
+        if start is not None:
+            keep &= arrays['last'] >= start
+        if end is not None:
+            keep &= arrays['first'] <= end
+        counts = arrays['counts']
+        # Blocks with the same number of points are decoded together, so schemes come in count order
+        keep = np.flatnonzero(keep)
+        keep = keep[np.argsort(counts[keep], kind='stable')]
+        offsets, blob = arrays['offsets'].tolist(), arrays['blob']
+        dates, navs = [], []
+        for group in np.split(keep, np.flatnonzero(np.diff(counts[keep])) + 1):
+            if len(group):
+                data = b''.join([zlib.decompress(blob[offsets[i]:offsets[i + 1]]) for i in group.tolist()])
+                group_dates, group_navs = decode_blocks(data, int(counts[group[0]]), arrays['scales'][group])
+                dates.append(group_dates.ravel())
+                navs.append(group_navs.ravel())
+        if not dates:
+            return arrays['codes'][keep], counts[keep], np.zeros(0, np.int32), np.zeros(0)
+        return arrays['codes'][keep], counts[keep], np.concatenate(dates), np.concatenate(navs)
+
+
+class NavHistory:
+    """
+    A NAV history directory. append() adds a snapshot of every scheme;
+    history(code, start, end) returns one scheme's dates and NAVs.
+    """
+
+    def __init__(self, directory, segment_snapshots=250):
+        self.directory = directory
+        path = os.path.join(directory, 'manifest.json')
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                self.manifest = json.load(f)
+        else:
+            os.makedirs(directory, exist_ok=True)
+            self.manifest = {
+                'segment_snapshots': segment_snapshots,
+                'segments': [],
+                'head': {'generation': 0, 'capacity': 0, 'schemes': 0, 'snapshots': []},
+            }
+        self.segments = [Segment(os.path.join(directory, entry['file']), entry)
+                         for entry in self.manifest['segments']]
+        self._open_head()
+
+    def _head_path(self, generation, name):
+        return os.path.join(self.directory, f'head-{generation}-{name}.npy')
+
+    def _open_head(self):
+        head = self.manifest['head']
+        if head['capacity']:
+            self.head = {name: np.load(self._head_path(head['generation'], name), mmap_mode='r+')
+                         for name in HEAD_DTYPES}
+        else:
+            self.head = {name: np.zeros(self._head_shape(name, 0), dtype) for name, dtype in HEAD_DTYPES.items()}
+        codes = self.head['codes'][:head['schemes']].tolist()
+        self._rows = dict(zip(codes, range(len(codes))))
+
+    def _head_shape(self, name, capacity):
+        return (capacity, self.manifest['segment_snapshots']) if name in ('dates', 'navs') else (capacity,)
+
+    def _new_head(self, capacity, keep_points):
+        """
+        Write the next head generation with room for `capacity` schemes,
+        carrying over codes and last dates (and points, when growing)
+        """
+        head = self.manifest['head']
+        generation = head['generation'] + 1
+        schemes = head['schemes']
+        arrays = {}
+        for name, dtype in HEAD_DTYPES.items():
+            array = np.lib.format.open_memmap(self._head_path(generation, name), 'w+', dtype,
+                                              self._head_shape(name, capacity))
+            if name in ('codes', 'last') or keep_points:
+                array[:schemes] = self.head[name][:schemes]
+            array.flush()
+            arrays[name] = array
+        return generation, arrays
+
+    def _switch_head(self, generation, arrays, capacity):
+        """Make a new head generation current (after the manifest naming it is saved)"""
+        old = self.manifest['head']['generation']
+        self.manifest['head'].update({'generation': generation, 'capacity': capacity})
+        self._save_manifest()
+        self.head = arrays
+        for name in HEAD_DTYPES:
+            path = self._head_path(old, name)
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _save_manifest(self):
+        path = os.path.join(self.directory, 'manifest.json')
+        with open(path + '.part', 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(path + '.part', path)
+
+    def append(self, records):
+        """Append a day's NavRecords (see amfi_ingest.py); returns the number of new points"""
+        codes, dates, navs, ordinals = [], [], [], {}
+        for record in records:
+            codes.append(int(record.scheme_code))
+            navs.append(float(record.asset_value))
+            if record.date not in ordinals:
+                ordinals[record.date] = date_ordinal(record.date)
+            dates.append(ordinals[record.date])
+        return self.append_arrays(np.array(codes, np.int64), np.array(dates, np.int32), np.array(navs, np.float64))
+
+    def append_arrays(self, codes, dates, navs):
+        """Append one snapshot given as aligned arrays of scheme codes, date ordinals and NAVs"""
+        _, first = np.unique(codes, return_index=True)  # AMFI occasionally lists a code twice
+        if len(first) < len(codes):
+            first.sort()
+            codes, dates, navs = codes[first], dates[first], navs[first]
+        valid = dates > 0
+        codes, dates, navs = codes[valid], dates[valid], navs[valid]
+
+        head = self.manifest['head']
+        new_codes = [code for code in codes.tolist() if code not in self._rows]
+        if head['schemes'] + len(new_codes) > head['capacity']:
+            capacity = max(1024, (head['schemes'] + len(new_codes)) * 5 // 4)
+            generation, arrays = self._new_head(capacity, keep_points=True)
+            self._switch_head(generation, arrays, capacity)
+        for code in new_codes:
+            row = head['schemes']
+            self._rows[code] = row
+            self.head['codes'][row] = code
+            self.head['last'][row] = 0
+            head['schemes'] += 1
+
+        rows = np.array([self._rows[code] for code in codes.tolist()], np.int64)
+        fresh = dates > self.head['last'][rows]
+        rows, dates, navs = rows[fresh], dates[fresh], navs[fresh]
+        positions = self.head['counts'][rows]
+        self.head['dates'][rows, positions] = dates
+        self.head['navs'][rows, positions] = navs
+        self.head['counts'][rows] = positions + 1
+        self.head['last'][rows] = dates
+        for array in self.head.values():
+            array.flush()
+
+        if len(rows):
+            head['snapshots'].append(date.fromordinal(int(dates.max())).isoformat())
+        if len(head['snapshots']) >= self.manifest['segment_snapshots']:
+            self.seal()
+        else:
+            self._save_manifest()
+        return len(rows)
+
+    def seal(self):
+        """Compress the head into a segment and start an empty head"""
+        head = self.manifest['head']
+        if not head['snapshots']:
+            return None
+        schemes = head['schemes']
+        path = os.path.join(self.directory, f"seg-{head['snapshots'][0]}-{head['snapshots'][-1]}.navseg")
+        entry = Segment.write(path, self.head['codes'][:schemes], self.head['counts'][:schemes],
+                              self.head['dates'][:schemes], self.head['navs'][:schemes])
+        generation, arrays = self._new_head(head['capacity'], keep_points=False)
+        self.manifest['segments'].append(entry)
+        self.segments.append(Segment(path, entry))
+        head['snapshots'] = []
+        self._switch_head(generation, arrays, head['capacity'])
+        return entry
+
+    def codes(self):
+        return sorted(self._rows)
+
+    def history(self, code, start=None, end=None):
+        """(dates as datetime64[D], NAVs) of scheme `code`, oldest first, within [start, end] if given"""
+        start, end = to_ordinal(start), to_ordinal(end)
+        parts = []
+        for segment in self.segments:
+            if (start is not None and segment.last_date < start) or (end is not None and segment.first_date > end):
+                continue
+            part = segment.read(code, start, end)
+            if part is not None:
+                parts.append(part)
+        row = self._rows.get(code)
+        if row is not None:
+            count = int(self.head['counts'][row])
+            if count:
+                parts.append((self.head['dates'][row, :count], self.head['navs'][row, :count]))
+        if not parts:
+            return to_datetime64([]), np.zeros(0)
+        dates = np.concatenate([dates for dates, _ in parts]) if len(parts) > 1 else parts[0][0]
+        navs = np.concatenate([navs for _, navs in parts]) if len(parts) > 1 else parts[0][1]
+        if start is not None or end is not None:
+            lo = 0 if start is None else int(np.searchsorted(dates, start))
+            hi = len(dates) if end is None else int(np.searchsorted(dates, end, side='right'))
+            dates, navs = dates[lo:hi], navs[lo:hi]
+        return to_datetime64(dates), np.array(navs)
+
+    def panel(self, start=None, end=None):
+        """
+        (scheme codes, date ordinals, NAVs) of every scheme over [start, end]:
+        NAVs is a len(codes) x len(dates) matrix, dates are the days any
+        scheme has a NAV, and a scheme's row is NaN on days it has none
+        """
+        start, end = to_ordinal(start), to_ordinal(end)
+        schemes = self.manifest['head']['schemes']
+        codes = np.sort(self.head['codes'][:schemes])  # the head carries every code ever appended
+        parts = []
+        for segment in self.segments:
+            if (start is not None and segment.last_date < start) or (end is not None and segment.first_date > end):
+                continue
+            segment_codes, counts, dates, navs = segment.read_all(start, end)
+            parts.append((np.repeat(codes.searchsorted(segment_codes), counts), dates, navs))
+        counts = self.head['counts'][:schemes]
+        if counts.any():
+            present = np.arange(self.head['dates'].shape[1]) < counts[:, None]
+            rows = np.nonzero(present)[0]
+            parts.append((codes.searchsorted(self.head['codes'][:schemes])[rows],
+                          self.head['dates'][:schemes][present], self.head['navs'][:schemes][present]))
+        if start is not None or end is not None:
+            low, high = start or 0, end or np.iinfo(np.int32).max
+            parts = [(rows[keep], dates[keep], navs[keep])
+                     for rows, dates, navs in parts for keep in [(dates >= low) & (dates <= high)]]
+        parts = [part for part in parts if len(part[1])]
+        if not parts:
+            return codes, np.zeros(0, np.int32), np.zeros((len(codes), 0))
+
+        # Days are few and bounded, so columns come from a presence table over the date range, not a sort
+        first = min(int(dates.min()) for _, dates, _ in parts)
+        present = np.zeros(max(int(dates.max()) for _, dates, _ in parts) - first + 1, bool)
+        for _, dates, _ in parts:
+            present[dates - first] = True
+        columns = np.cumsum(present) - 1
+        matrix = np.full((len(codes), int(present.sum())), np.nan)
+        for rows, dates, navs in parts:
+            matrix[rows, columns[dates - first]] = navs
+        return codes, (np.flatnonzero(present) + first).astype(np.int32), matrix
+
+    def info(self):
+        """Summary of the store: schemes, points, segments and bytes on disk"""
+        head = self.manifest['head']
+        files = [os.path.join(self.directory, name) for name in os.listdir(self.directory)]
+        return {
+            'schemes': head['schemes'],
+            'segments': len(self.segments),
+            'sealed_points': sum(entry['points'] for entry in self.manifest['segments']),
+            'head_points': int(self.head['counts'][:head['schemes']].sum()),
+            'head_snapshots': len(head['snapshots']),
+            'sealed_bytes': sum(entry['bytes'] for entry in self.manifest['segments']),
+            'bytes_on_disk': sum(os.stat(path).st_blocks * 512 for path in files),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AMFI NAV history store")
+    parser.add_argument("--store", default="amfi_nav_history", help="history directory")
+    commands = parser.add_subparsers(dest="command", required=True)
+    append = commands.add_parser("append", help="append a day's NAVs")
+    append.add_argument("--source", default="amfi_nav_data.tsv",
+                        help=f"amfi_nav_data.tsv, a saved NAVAll.txt, or a URL such as {AMFI_URL}")
+    append.add_argument("--segment-snapshots", type=int, default=250,
+                        help="appends per sealed segment (new stores only)")
+    history = commands.add_parser("history", help="print one scheme's NAV history")
+    history.add_argument("--code", type=int, required=True, help="AMFI scheme code")
+    history.add_argument("--start", help="first date (YYYY-MM-DD)")
+    history.add_argument("--end", help="last date (YYYY-MM-DD)")
+    commands.add_parser("seal", help="compress the open head into a segment now")
+    commands.add_parser("info", help="print store statistics")
+    args = parser.parse_args()
+
+    if args.command != "append" and not os.path.exists(os.path.join(args.store, "manifest.json")):
+        raise SystemExit(f"❌ No NAV history at {args.store}; start one with: python amfi_nav_history.py append")
+    start = time.perf_counter()
+    if args.command == "append":
+        store = NavHistory(args.store, args.segment_snapshots)
+        points = store.append(records_from(args.source))
+        print(f"✅ Appended {points} NAVs for {store.manifest['head']['schemes']} schemes "
+              f"in {time.perf_counter() - start:.2f}s")
+    elif args.command == "history":
+        dates, navs = NavHistory(args.store).history(args.code, args.start, args.end)
+        if not len(dates):
+            raise SystemExit("❌ No NAVs for that scheme and dates")
+        for day, nav in zip(dates.tolist(), navs.tolist()):
+            print(f"{day.isoformat()}\t{nav}")
+    elif args.command == "seal":
+        entry = NavHistory(args.store).seal()
+        print(f"🗜️  Sealed {entry['file']} ({entry['bytes'] / 1024:.0f} KB)" if entry else "Nothing to seal")
+    else:
+        print(json.dumps(NavHistory(args.store).info(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
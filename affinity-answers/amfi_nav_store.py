@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+AMFI NAV Store
+Typed, columnar copy of the AMFI NAV data in one memory-mappable file:
+
+  scheme_code                      int64
+  nav                              float64
+  date                             int32, date.toordinal() (0 when unparsable)
+  name_id / fund_house_id /        int32 ids into interned UTF-8 string tables
+  scheme_type_id                   (-1 when the source doesn't have them)
+  isin_growth / isin_reinvestment  fixed-width bytes (b'' for "-")
+
+plus hash indexes on scheme code and ISIN (growth or reinvestment), stored
+as arrays too, so nothing is parsed or rebuilt on load: opening the file
+maps it and reads a small JSON header.
+
+Build from amfi_nav_data.tsv or NAVAll.txt:
+
+    python amfi_nav_store.py build --source amfi_nav_data.tsv
+    python amfi_nav_store.py lookup --isin INF209KA12Z1
+"""
+
+import argparse
+import json
+import os
+import struct
+import time
+import zlib
+from datetime import date, datetime, timezone
+
+import numpy as np
+
+from amfi_ingest import AMFI_URL, records_from
+
+MAGIC = b'AMFINAV1'
+ALIGN = 64
+MONTHS = {name: number for number, name in enumerate(
+    ('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'), 1)}
+FIB_MULTIPLIER = 0x9E3779B97F4A7C15  # Fibonacci hashing for integer keys
+U64 = (1 << 64) - 1
+
+
+def date_ordinal(text):
+    """'25-Aug-2025' -> date ordinal, 0 if it doesn't parse"""
+    try:
+        day, month, year = text.split('-')
+        return date(int(year), MONTHS[month[:3].title()], int(day)).toordinal()
+    except (ValueError, KeyError):
+        return 0
+
+
+def _table_bits(count):
+    """log2 of a power-of-two table size with a load factor of at most 0.5"""
+    return max(4, (2 * max(count, 1) - 1).bit_length())
+
+
+def _code_buckets(codes, bits):
+    return ((codes.astype(np.uint64) * np.uint64(FIB_MULTIPLIER)) >> np.uint64(64 - bits)).astype(np.int64)
+
+
+def _code_bucket(code, bits):
+    return ((code * FIB_MULTIPLIER) & U64) >> (64 - bits)
+
+
+def _isin_bucket(isin, bits):
+    return zlib.crc32(isin) & ((1 << bits) - 1)
+
+
+def _chain(buckets, bits):
+    """
+    Chained hash table over entries 0..n-1 in `buckets`: slots[bucket] is the
+    first entry of a bucket and following[entry] the next one (-1 ends)
+    """
+    order = np.argsort(buckets, kind='stable').astype(np.int32)
+    ordered = buckets[order]
+    same = ordered[1:] == ordered[:-1]
+    following = np.full(len(buckets), -1, np.int32)
+    following[order[:-1][same]] = order[1:][same]
+    first = np.ones(len(buckets), bool)
+    first[1:] = ~same
+    slots = np.full(1 << bits, -1, np.int32)
+    slots[ordered[first]] = order[first]
+    return slots, following
+
+
+def _intern(values):
+    """(ids, UTF-8 blob, offsets) for a list of strings or None"""
+    ids, index = [], {}
+    for value in values:
+        if value is None:
+            ids.append(-1)
+        else:
+            ids.append(index.setdefault(value, len(index)))
+    encoded = [value.encode('utf-8') for value in index]
+    offsets = np.zeros(len(encoded) + 1, np.int64)
+    np.cumsum([len(value) for value in encoded], out=offsets[1:])
+    return np.array(ids, np.int32), np.frombuffer(b''.join(encoded), np.uint8), offsets
+
+
+def write_arrays(path, magic, metadata, arrays):
+    """
+    Write named numpy arrays to one file: `magic`, a JSON header with
+    `metadata` and the array layout, then each array 64-byte aligned.
+    Written under a .part name and renamed when complete.
+    """
+    layout, offset = {}, 0
+    for name, array in arrays.items():
+        offset = -(-offset // ALIGN) * ALIGN
+        layout[name] = [array.dtype.str, list(array.shape), offset]
+        offset += array.nbytes
+    header = json.dumps({'metadata': metadata, 'arrays': layout}).encode('utf-8')
+    start = -(-(len(magic) + 8 + len(header)) // ALIGN) * ALIGN
+    with open(path + '.part', 'wb') as f:
+        f.write(magic + struct.pack('<Q', len(header)) + header)
+        for name, array in arrays.items():
+            f.seek(start + layout[name][2])
+            f.write(np.ascontiguousarray(array).tobytes())
+        f.truncate(start + offset)
+    os.replace(path + '.part', path)
+
+
+def read_arrays(path, magic, mmap=True):
+    """(arrays, metadata) from a write_arrays() file; with mmap the arrays are views of a read-only map"""
+    with open(path, 'rb') as f:
+        if f.read(len(magic)) != magic:
+            raise ValueError(f"{path} is not a {magic.decode()} file")
+        header_length, = struct.unpack('<Q', f.read(8))
+        header = json.loads(f.read(header_length))
+    start = -(-(len(magic) + 8 + header_length) // ALIGN) * ALIGN
+    data = np.memmap(path, np.uint8, 'r') if mmap else np.fromfile(path, np.uint8)
+    arrays = {}
+    for name, (dtype, shape, offset) in header['arrays'].items():
+        dtype = np.dtype(dtype)
+        count = int(np.prod(shape)) * dtype.itemsize
+        arrays[name] = data[start + offset:start + offset + count].view(dtype).reshape(shape)
+    return arrays, header['metadata']
+
+
+class NavStore:
+    """
+    Columns are numpy arrays (views of a read-only map when loaded from a
+    file). row_for_code() and rows_for_isin() are O(1) hash probes returning
+    row numbers; record(row) rebuilds a typed dict for one row.
+    """
+
+    COLUMNS = ('scheme_code', 'nav', 'date', 'name_id', 'fund_house_id', 'scheme_type_id',
+               'isin_growth', 'isin_reinvestment')
+
+    def __init__(self, arrays, metadata):
+        self.arrays = arrays
+        self.metadata = metadata
+        for name in self.COLUMNS:
+            setattr(self, name, arrays[name])
+        self._code_bits = int(metadata['code_bits'])
+        self._isin_bits = int(metadata['isin_bits'])
+        self._strings = {}
+
+    @classmethod
+    def build(cls, records, source=None):
+        """Store for NavRecords (see amfi_ingest.py)"""
+        codes, navs, dates, names, fund_houses, scheme_types, growth, reinvestment = ([] for _ in range(8))
+        ordinals = {}
+        for record in records:
+            codes.append(int(record.scheme_code))
+            navs.append(float(record.asset_value))
+            if record.date not in ordinals:
+                ordinals[record.date] = date_ordinal(record.date)
+            dates.append(ordinals[record.date])
+            names.append(record.scheme_name)
+            fund_houses.append(record.fund_house)
+            scheme_types.append(record.scheme_type)
+            growth.append(b'' if record.isin_growth == '-' else record.isin_growth.encode('ascii', 'replace'))
+            reinvestment.append(b'' if record.isin_reinvestment == '-' else
+                                record.isin_reinvestment.encode('ascii', 'replace'))
+
+        isin_width = max([len(isin) for isin in growth + reinvestment] + [1])
+        arrays = {
+            'scheme_code': np.array(codes, np.int64),
+            'nav': np.array(navs, np.float64),
+            'date': np.array(dates, np.int32),
+            'isin_growth': np.array(growth, f'S{isin_width}'),
+            'isin_reinvestment': np.array(reinvestment, f'S{isin_width}'),
+        }
+        for column, values in (('name', names), ('fund_house', fund_houses), ('scheme_type', scheme_types)):
+            arrays[f'{column}_id'], arrays[f'{column}_blob'], arrays[f'{column}_offsets'] = _intern(values)
+
+        rows = len(codes)
+        code_bits = _table_bits(rows)
+        arrays['code_slots'], arrays['code_next'] = _chain(_code_buckets(arrays['scheme_code'], code_bits), code_bits)
+        # ISIN entries are row * 2 + column (0 growth, 1 reinvestment), skipping missing ISINs
+        all_isins = np.column_stack((arrays['isin_growth'], arrays['isin_reinvestment'])).ravel()
+        entries = np.flatnonzero(all_isins != b'')
+        isins = all_isins[entries]
+        isin_bits = _table_bits(len(entries))
+        buckets = np.array([_isin_bucket(isin, isin_bits) for isin in isins.tolist()], np.int64)
+        arrays['isin_entries'] = entries.astype(np.int32)
+        arrays['isin_slots'], arrays['isin_next'] = _chain(buckets, isin_bits)
+
+        valid = arrays['date'][arrays['date'] > 0]
+        metadata = {
+            'rows': rows,
+            'source': source,
+            'built_at': datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'first_date': date.fromordinal(int(valid.min())).isoformat() if len(valid) else None,
+            'last_date': date.fromordinal(int(valid.max())).isoformat() if len(valid) else None,
+            'code_bits': code_bits,
+            'isin_bits': isin_bits,
+        }
+        return cls(arrays, metadata)
+
+    def save(self, path):
+        """Write the store to `path` (atomically, via a .part file)"""
+        write_arrays(path, MAGIC, self.metadata, self.arrays)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """Open a saved store; with mmap the columns are paged in from the file as they are read"""
+        arrays, metadata = read_arrays(path, MAGIC, mmap)
+        return cls(arrays, metadata)
+
+    def __len__(self):
+        return len(self.scheme_code)
+
+    def row_for_code(self, code):
+        """Row of scheme `code`, or None"""
+        code = int(code)
+        entry = int(self.arrays['code_slots'][_code_bucket(code, self._code_bits)])
+        following = self.arrays['code_next']
+        while entry >= 0:
+            if self.scheme_code[entry] == code:
+                return entry
+            entry = int(following[entry])
+        return None
+
+    def rows_for_isin(self, isin):
+        """Rows whose growth or reinvestment ISIN is `isin` (a few share one)"""
+        key = isin.encode('ascii', 'replace') if isinstance(isin, str) else isin
+        entries, following = self.arrays['isin_entries'], self.arrays['isin_next']
+        columns = (self.isin_growth, self.isin_reinvestment)
+        rows = []
+        entry = int(self.arrays['isin_slots'][_isin_bucket(key, self._isin_bits)])
+        while entry >= 0:
+            row, column = divmod(int(entries[entry]), 2)
+            if columns[column][row] == key and row not in rows:
+                rows.append(row)
+            entry = int(following[entry])
+        return sorted(rows)
+
+    def string(self, column, string_id):
+        """Interned string `string_id` of 'name', 'fund_house' or 'scheme_type' (None for -1)"""
+        if string_id < 0:
+            return None
+        blob, offsets = self.arrays[f'{column}_blob'], self.arrays[f'{column}_offsets']
+        return blob[offsets[string_id]:offsets[string_id + 1]].tobytes().decode('utf-8')
+
+    def strings(self, column):
+        """All interned strings of a column, by id (cached)"""
+        if column not in self._strings:
+            blob, offsets = self.arrays[f'{column}_blob'].tobytes(), self.arrays[f'{column}_offsets'].tolist()
+            self._strings[column] = [blob[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(len(offsets) - 1)]
+        return self._strings[column]
+
+    def record(self, row):
+        """One row as a dict with typed values"""
+        ordinal = int(self.date[row])
+        return {
+            'scheme_code': int(self.scheme_code[row]),
+            'scheme_name': self.string('name', int(self.name_id[row])),
+            'asset_value': float(self.nav[row]),
+            'date': date.fromordinal(ordinal).isoformat() if ordinal else None,
+            'isin_growth': self.isin_growth[row].decode('ascii') or None,
+            'isin_reinvestment': self.isin_reinvestment[row].decode('ascii') or None,
+            'fund_house': self.string('fund_house', int(self.fund_house_id[row])),
+            'scheme_type': self.string('scheme_type', int(self.scheme_type_id[row])),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Columnar AMFI NAV store")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="build the store from TSV or NAVAll.txt")
+    build.add_argument("--source", default="amfi_nav_data.tsv",
+                       help=f"amfi_nav_data.tsv, a saved NAVAll.txt, or a URL such as {AMFI_URL}")
+    build.add_argument("--store", default="amfi_nav_data.navstore", help="store file to write")
+    lookup = commands.add_parser("lookup", help="print the schemes for a code or ISIN")
+    lookup.add_argument("--store", default="amfi_nav_data.navstore", help="store file to read")
+    key = lookup.add_mutually_exclusive_group(required=True)
+    key.add_argument("--code", type=int, help="AMFI scheme code")
+    key.add_argument("--isin", help="growth or reinvestment ISIN")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        start = time.perf_counter()
+        store = NavStore.build(records_from(args.source), source=args.source)
+        store.save(args.store)
+        print(f"✅ Stored {len(store)} schemes ({store.metadata['first_date']} to {store.metadata['last_date']}) "
+              f"in {time.perf_counter() - start:.2f}s")
+        print(f"💾 {args.store} ({os.path.getsize(args.store) / 1024:.0f} KB)")
+        return
+
+    store = NavStore.load(args.store)
+    if args.code is not None:
+        row = store.row_for_code(args.code)
+        rows = [] if row is None else [row]
+    else:
+        rows = store.rows_for_isin(args.isin)
+    if not rows:
+        raise SystemExit("❌ No matching scheme")
+    for row in rows:
+        print(json.dumps(store.record(row), indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""
+AMFI Scheme Search
+Search index over AMFI scheme names ("Aditya Birla Sun Life Banking & PSU
+Debt Fund  - DIRECT - IDCW") for prefix, substring and typo-tolerant
+queries, with the plan (DIRECT/REGULAR) and option (IDCW/GROWTH) parsed out
+of each name as facets.
+
+  tokens     inverted index: name token -> scheme codes, plus the sorted
+             vocabulary for prefix ranges
+  trigrams   trigram -> vocabulary tokens, to find tokens containing a
+             substring or within edit distance 1-2 of a misspelt word
+  facets     (facet, value) -> scheme codes
+
+A query matches schemes having a match for every query word. Each word is
+tried as an exact token, then a token prefix, then a substring and then a
+fuzzy match, stopping at the first kind that matches anything (or only the
+kinds of --mode); exact matches rank above prefixes above substrings above
+fuzzy matches, and shorter names above longer ones.
+
+The index is saved with each scheme's tokens, facets and the postings, and
+updated in place from a new day's data: only schemes that are new, renamed or gone are
+(re)indexed. amfi_ingest.py --search-index keeps it current on every ingest.
+
+    python amfi_scheme_search.py update --source amfi_nav_data.tsv
+    python amfi_scheme_search.py search "hdfc mid cap" --plan DIRECT --option GROWTH
+    python amfi_scheme_search.py search "adity birla liquid"
+"""
+
+import argparse
+import heapq
+import json
+import os
+import re
+import time
+from bisect import bisect_left
+from collections import Counter, namedtuple
+from datetime import datetime, timezone
+
+from amfi_ingest import AMFI_URL, records_from
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+PLAN_MARKERS = {'direct': 'DIRECT', 'regular': 'REGULAR'}
+OPTION_MARKERS = {'growth': 'GROWTH', 'cumulative': 'GROWTH', 'idcw': 'IDCW', 'dividend': 'IDCW',
+                  'div': 'IDCW', 'payout': 'IDCW', 'reinvestment': 'IDCW'}
+MODES = ('auto', 'prefix', 'substring', 'fuzzy')
+WEIGHTS = {'exact': 1.0, 'prefix': 0.8, 'substring': 0.6, 'fuzzy': 0.5}
+CODE_MASK = (1 << 32) - 1
+
+Scheme = namedtuple('Scheme', ('code', 'name', 'plan', 'option', 'tokens'))
+
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def facets(tokens):
+    """(plan, option) from a name's tokens; the last marker wins ("Growth Fund - IDCW" is IDCW)"""
+    plan = option = None
+    for token in tokens:
+        plan = PLAN_MARKERS.get(token, plan)
+        option = OPTION_MARKERS.get(token, option)
+    return plan, option
+
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def edit_distance(a, b, limit):
+    """Levenshtein distance of a and b, or limit + 1 once it is certainly above limit"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    # Typos are local: only the differing middle needs the dynamic programme
+    start = 0
+    while start < len(a) and start < len(b) and a[start] == b[start]:
+        start += 1
+    end = 0
+    while end < len(a) - start and end < len(b) - start and a[-1 - end] == b[-1 - end]:
+        end += 1
+    a, b = a[start:len(a) - end], b[start:len(b) - end]
+    if not a or not b:
+        return max(len(a), len(b))
+    previous = list(range(len(b) + 1))
+    for i, char in enumerate(a, 1):
+        current = [i]
+        for j, other in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char != other)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+class SchemeSearchIndex:
+    def __init__(self, metadata=None):
+        self.metadata = metadata or {}
+        self.schemes = {}
+        self._postings = {}
+        self._vocabulary = []
+        self._trigrams = {}
+        self._facets = {}
+        self._token_sets = {}
+        self._rank = {}  # code -> token count << 32 | code: shorter names first among equal scores
+        self._ordered = None  # sorted ranks, rebuilt on demand after changes
+
+    @classmethod
+    def build(cls, records, source=None):
+        """Index for NavRecords (see amfi_ingest.py)"""
+        index = cls()
+        index.update(records, source)
+        return index
+
+    def __len__(self):
+        return len(self.schemes)
+
+    def _add(self, scheme):
+        self.schemes[scheme.code] = scheme
+        self._token_sets[scheme.code] = frozenset(scheme.tokens)
+        self._rank[scheme.code] = len(scheme.tokens) << 32 | scheme.code
+        self._ordered = None
+        for token in set(scheme.tokens):
+            codes = self._postings.get(token)
+            if codes is None:
+                codes = self._postings[token] = set()
+                self._vocabulary.insert(bisect_left(self._vocabulary, token), token)
+                for gram in trigrams(f' {token} '):
+                    self._trigrams.setdefault(gram, set()).add(token)
+            codes.add(scheme.code)
+        for facet in (('plan', scheme.plan), ('option', scheme.option)):
+            self._facets.setdefault(facet, set()).add(scheme.code)
+
+    def _remove(self, code):
+        scheme = self.schemes.pop(code)
+        del self._token_sets[code], self._rank[code]
+        self._ordered = None
+        for token in set(scheme.tokens):
+            codes = self._postings[token]
+            codes.discard(code)
+            if not codes:
+                del self._postings[token]
+                del self._vocabulary[bisect_left(self._vocabulary, token)]
+                for gram in trigrams(f' {token} '):
+                    self._trigrams[gram].discard(token)
+        for facet in (('plan', scheme.plan), ('option', scheme.option)):
+            self._facets[facet].discard(code)
+
+    def add(self, code, name):
+        """Index (or re-index) one scheme"""
+        if code in self.schemes:
+            self._remove(code)
+        tokens = tuple(tokenize(name))
+        self._add(Scheme(code, name, *facets(tokens), tokens))
+
+    def update(self, records, source=None):
+        """
+        Bring the index in line with a full day's NavRecords: schemes that
+        are new or renamed are (re)indexed and schemes missing from
+        `records` removed. Returns (added, renamed, removed) counts.
+        """
+        seen = set()
+        added = renamed = 0
+        for record in records:
+            code = int(record.scheme_code)
+            seen.add(code)
+            scheme = self.schemes.get(code)
+            if scheme is None:
+                added += 1
+            elif scheme.name != record.scheme_name:
+                renamed += 1
+            else:
+                continue
+            self.add(code, record.scheme_name)
+        gone = [code for code in self.schemes if code not in seen]
+        for code in gone:
+            self._remove(code)
+        self.metadata.update({
+            'source': source,
+            'updated_at': datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'schemes': len(self.schemes),
+            'tokens': len(self._vocabulary),
+        })
+        return added, renamed, len(gone)
+
+    def _prefixed(self, word):
+        start = bisect_left(self._vocabulary, word)
+        end = bisect_left(self._vocabulary, word + '￿', start)
+        return self._vocabulary[start:end]
+
+    def _containing(self, word):
+        if len(word) < 3:
+            return self._prefixed(word)
+        grams = sorted((self._trigrams.get(gram, ()) for gram in trigrams(word)), key=len)
+        return [token for token in grams[0] if word in token and all(token in tokens for tokens in grams[1:])]
+
+    def _similar(self, word):
+        """(token, distance) for vocabulary tokens within 1 edit (2 for words of 6+ characters)"""
+        limit = 1 if len(word) < 6 else 2
+        grams = trigrams(f' {word} ')
+        shared = Counter()
+        for gram in grams:
+            shared.update(self._trigrams.get(gram, ()))
+        # An edit changes at most 3 of a word's padded trigrams
+        needed = max(1, len(grams) - 3 * limit)
+        similar = []
+        for token, count in shared.items():
+            if count >= needed:
+                distance = edit_distance(word, token, limit)
+                if distance <= limit:
+                    similar.append((token, distance))
+        return similar
+
+    def _match(self, word, mode):
+        """{token: weight} for the vocabulary tokens a query word matches"""
+        matches = {}
+        if word in self._postings:
+            matches[word] = WEIGHTS['exact']
+        if mode in ('auto', 'prefix', 'substring') and (mode != 'auto' or not matches):
+            for token in self._prefixed(word):
+                matches.setdefault(token, WEIGHTS['prefix'])
+        if mode == 'substring' or (mode == 'auto' and not matches):
+            for token in self._containing(word):
+                matches.setdefault(token, WEIGHTS['substring'])
+        if mode == 'fuzzy' or (mode == 'auto' and not matches):
+            for token, distance in self._similar(word):
+                matches.setdefault(token, WEIGHTS['fuzzy'] - 0.1 * distance)
+        return matches
+
+    def search(self, query, limit=10, plan=None, option=None, mode='auto'):
+        """Up to `limit` (score, Scheme) pairs for `query`, best first"""
+        words = tokenize(query)
+        if not words:
+            return []
+        matches = []
+        for word in words:
+            match = self._match(word, mode)
+            if not match:
+                return []
+            matches.append(match)
+
+        # Start from the most selective word's schemes and narrow them by the others
+        sizes = [sum(len(self._postings[token]) for token in match) for match in matches]
+        first = sizes.index(min(sizes))
+        candidates = set().union(*(self._postings[token] for token in matches[first]))
+        for facet in (('plan', plan), ('option', option)):
+            if facet[1] is not None:
+                candidates &= self._facets.get((facet[0], facet[1].upper()), set())
+        for i, match in enumerate(matches):
+            if i == first:
+                continue
+            if sizes[i] <= 32 * len(candidates):  # set operations are far cheaper per element
+                candidates &= set().union(*(self._postings[token] for token in match))
+            else:
+                candidates = {code for code in candidates if not self._token_sets[code].isdisjoint(match)}
+
+        # Every candidate matches every word now. Split them into groups with the same
+        # total word weight; within a group shorter names score higher, so the best
+        # `limit` of each group are the only ones that can make the results
+        groups = [(sum(next(iter(match.values())) for match in matches if len(set(match.values())) == 1),
+                   candidates)]
+        for match in matches:
+            weights = sorted(set(match.values()), reverse=True)
+            if len(weights) == 1:
+                continue
+            split = []
+            for total, codes in groups:
+                for weight in weights:
+                    part = codes & set().union(*(self._postings[token] for token, w in match.items() if w == weight))
+                    if part:
+                        split.append((total + weight, part))
+                        codes = codes - part
+            groups = split
+        ranked = [(total + len(words) / max(rank >> 32, 1), -(rank & CODE_MASK))
+                  for total, codes in groups for rank in self._top(codes, limit)]
+        return [(round(score, 3), self.schemes[-code]) for score, code in heapq.nlargest(limit, ranked)]
+
+    def _top(self, codes, limit):
+        """Ranks of the `limit` best ranked schemes in `codes`"""
+        if len(codes) * 8 < len(self.schemes):
+            return heapq.nsmallest(limit, map(self._rank.__getitem__, codes))
+        # A large share of all schemes: walk every scheme in rank order until enough are in `codes`
+        if self._ordered is None:
+            self._ordered = sorted(self._rank.values())
+        top = []
+        for rank in self._ordered:
+            if rank & CODE_MASK in codes:
+                top.append(rank)
+                if len(top) == limit:
+                    break
+        return top
+
+    def save(self, path):
+        """Write the index to `path` (atomically, via a .part file)"""
+        document = {
+            'metadata': self.metadata,
+            'schemes': [[scheme.code, scheme.name, scheme.plan, scheme.option, ' '.join(scheme.tokens)]
+                        for scheme in self.schemes.values()],
+            'postings': {token: sorted(codes) for token, codes in self._postings.items()},
+            'facets': [[facet, value, sorted(codes)] for (facet, value), codes in self._facets.items()],
+        }
+        with open(path + '.part', 'w', encoding='utf-8') as f:
+            json.dump(document, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(path + '.part', path)
+
+    @classmethod
+    def load(cls, path):
+        """Open a saved index; names are not re-tokenized and postings are read as saved"""
+        with open(path, encoding='utf-8') as f:
+            document = json.load(f)
+        index = cls(document['metadata'])
+        index.schemes = {code: Scheme(code, name, plan, option, tuple(tokens.split()))
+                         for code, name, plan, option, tokens in document['schemes']}
+        index._token_sets = {code: frozenset(scheme.tokens) for code, scheme in index.schemes.items()}
+        index._rank = {code: len(scheme.tokens) << 32 | code for code, scheme in index.schemes.items()}
+        index._postings = {token: set(codes) for token, codes in document['postings'].items()}
+        index._facets = {(facet, value): set(codes) for facet, value, codes in document['facets']}
+        index._vocabulary = sorted(index._postings)
+        for token in index._vocabulary:
+            for gram in trigrams(f' {token} '):
+                index._trigrams.setdefault(gram, set()).add(token)
+        return index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AMFI scheme name search")
+    commands = parser.add_subparsers(dest="command", required=True)
+    update = commands.add_parser("update", help="create the index, or update it from a new day's data")
+    update.add_argument("--source", default="amfi_nav_data.tsv",
+                        help=f"amfi_nav_data.tsv, a saved NAVAll.txt, or a URL such as {AMFI_URL}")
+    update.add_argument("--index", default="amfi_scheme_index.json", help="index file")
+    update.add_argument("--rebuild", action="store_true", help="index from scratch even if the index exists")
+    search = commands.add_parser("search", help="search scheme names")
+    search.add_argument("query", help="words to search for, e.g. \"hdfc mid cap\"")
+    search.add_argument("--index", default="amfi_scheme_index.json", help="index file")
+    search.add_argument("--plan", choices=("DIRECT", "REGULAR"), type=str.upper, help="only this plan")
+    search.add_argument("--option", choices=("IDCW", "GROWTH"), type=str.upper, help="only this option")
+    search.add_argument("--mode", choices=MODES, default="auto", help="how query words match (default: auto)")
+    search.add_argument("--limit", type=int, default=10, help="results to show")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.command == "update":
+        if args.rebuild or not os.path.exists(args.index):
+            index = SchemeSearchIndex.build(records_from(args.source), source=args.source)
+            print(f"✅ Indexed {len(index)} schemes ({index.metadata['tokens']} tokens) "
+                  f"in {time.perf_counter() - start:.2f}s")
+        else:
+            index = SchemeSearchIndex.load(args.index)
+            added, renamed, removed = index.update(records_from(args.source), source=args.source)
+            print(f"✅ Updated {len(index)} schemes: {added} added, {renamed} renamed, {removed} removed "
+                  f"in {time.perf_counter() - start:.2f}s")
+        index.save(args.index)
+        print(f"💾 {args.index} ({os.path.getsize(args.index) / 1024:.0f} KB)")
+        return
+
+    if not os.path.exists(args.index):
+        raise SystemExit(f"❌ No index at {args.index}; create it with: python amfi_scheme_search.py update")
+    index = SchemeSearchIndex.load(args.index)
+    start = time.perf_counter()
+    results = index.search(args.query, args.limit, args.plan, args.option, args.mode)
+    elapsed = time.perf_counter() - start
+    if not results:
+        raise SystemExit("❌ No matching scheme")
+    print(f"🔍 {len(results)} results in {elapsed * 1000:.2f}ms")
+    for score, scheme in results:
+        print(f"{score:6.2f}  {scheme.code:>7}  {scheme.plan or '-':<8} {scheme.option or '-':<7} {scheme.name}")
+
+
+if __name__ == "__main__":
+    main()
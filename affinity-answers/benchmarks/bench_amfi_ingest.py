@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+AMFI Ingest Benchmark
+Rebuilds a NAVAll.txt from the checked-in amfi_nav_data.tsv (with scheme
+type and fund house section lines, CRLF endings as served by AMFI), then
+times extract_amfi_data.sh and amfi_ingest.py on it and checks that both
+write the same TSV rows and JSON records. The shell script forks a dozen
+processes per line, so by default it runs on the first --shell-records
+rows and its full-file time is extrapolated from that
+
+Usage:
+    python benchmarks/bench_amfi_ingest.py --shell-records 1000
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from amfi_ingest import TSV_HEADER, ingest, read_tsv  # noqa: E402
+
+HEADER = "Scheme Code;ISIN Div Payout/ ISIN Growth;ISIN Div Reinvestment;Scheme Name;Net Asset Value;Date"
+
+
+def write_navall(records, path):
+    """NAVAll.txt layout: a fund house line whenever the name's fund house changes"""
+    with open(path, "w", encoding="utf-8", newline="\r\n") as f:
+        f.write(HEADER + "\n\nOpen Ended Schemes(Fixture Schemes)\n\n")
+        fund_house = None
+        for record in records:
+            house = " ".join(record.scheme_name.split()[:2]) + " Mutual Fund"
+            if house != fund_house:
+                fund_house = house
+                f.write(f"{house}\n\n")
+            f.write(";".join((record.scheme_code, record.isin_growth, record.isin_reinvestment,
+                              record.scheme_name, record.asset_value, record.date)) + "\n")
+
+
+def run_shell(navall, workdir):
+    shutil.copy(os.path.join(ROOT, "extract_amfi_data.sh"), workdir)
+    env = dict(os.environ, AMFI_URL="file://" + os.path.abspath(navall))
+    start = time.perf_counter()
+    subprocess.run(["bash", "extract_amfi_data.sh"], cwd=workdir, env=env, check=True, stdout=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+def run_python(navall, workdir, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        count = ingest(navall, os.path.join(workdir, "amfi_nav_data.tsv"), os.path.join(workdir, "amfi_nav_data.json"))
+        best = min(best, time.perf_counter() - start)
+    return best, count
+
+
+def same_output(dir_a, dir_b):
+    with open(os.path.join(dir_a, "amfi_nav_data.tsv"), "rb") as a, open(os.path.join(dir_b, "amfi_nav_data.tsv"), "rb") as b:
+        same_tsv = a.read() == b.read()
+    documents = []
+    for directory in (dir_a, dir_b):
+        with open(os.path.join(directory, "amfi_nav_data.json"), encoding="utf-8") as f:
+            documents.append(json.load(f))
+    same_json = (documents[0]["data"] == documents[1]["data"]
+                 and documents[0]["metadata"]["total_records"] == documents[1]["metadata"]["total_records"])
+    return same_tsv, same_json
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AMFI ingest benchmark")
+    parser.add_argument("--fixture", default=os.path.join(ROOT, "amfi_nav_data.tsv"), help="TSV to rebuild NAVAll.txt from")
+    parser.add_argument("--shell-records", type=int, default=1000, help="rows for the shell run (0 = all)")
+    parser.add_argument("--repeat", type=int, default=5, help="Python runs (best is reported)")
+    args = parser.parse_args()
+
+    records = list(read_tsv(args.fixture))
+    sample = records[:args.shell_records] if args.shell_records else records
+    with tempfile.TemporaryDirectory() as tmp:
+        dirs = {name: os.path.join(tmp, name) for name in ("full", "shell", "python")}
+        for directory in dirs.values():
+            os.mkdir(directory)
+        write_navall(records, os.path.join(tmp, "NAVAll.txt"))
+        write_navall(sample, os.path.join(tmp, "NAVAll-sample.txt"))
+
+        python_full, count = run_python(os.path.join(tmp, "NAVAll.txt"), dirs["full"], args.repeat)
+        shell_sample = run_shell(os.path.join(tmp, "NAVAll-sample.txt"), dirs["shell"])
+        run_python(os.path.join(tmp, "NAVAll-sample.txt"), dirs["python"], 1)
+        same_tsv, same_json = same_output(dirs["shell"], dirs["python"])
+        with open(os.path.join(dirs["full"], "amfi_nav_data.tsv"), encoding="utf-8") as a, \
+                open(args.fixture, encoding="utf-8") as b:
+            round_trip = a.read() == b.read()
+
+    shell_full = shell_sample * len(records) / len(sample)
+    estimated = "" if len(sample) == len(records) else " (extrapolated)"
+    print(f"{len(records)} records, {len(TSV_HEADER)} columns\n")
+    print(f"shell   {len(sample):>6} records in {shell_sample:8.2f}s  {len(sample) / shell_sample:>10,.0f} records/s")
+    print(f"python  {count:>6} records in {python_full:8.3f}s  {count / python_full:>10,.0f} records/s")
+    print(f"\nfull file: shell {shell_full:.1f}s{estimated}, python {python_full:.3f}s "
+          f"({shell_full / python_full:,.0f}x faster)")
+    print(f"same TSV as the shell script: {same_tsv}, same JSON records: {same_json}, "
+          f"TSV round-trips the fixture: {round_trip}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+AMFI NAV Analytics Benchmark
+Appends --days trading days of simulated NAVs for every scheme (the random
+walk of bench_amfi_nav_history.py) to a NAV history, or opens an existing
+one with --history, and times on all ~14k schemes:
+  - reading the whole history into a NavPanel
+  - 1y/3y/5y trailing returns, percentile ranks within (simulated) categories,
+    rolling 1y volatility for every day, drawdowns and the deepest drawdown
+  - the same returns the per-record way: each scheme's history() and a Python
+    loop over its NAVs, extrapolated from --loop-schemes schemes
+and checks a sample of schemes' returns, volatility and drawdowns against
+plain Python over history(), and the ranks against counting
+
+Usage:
+    python benchmarks/bench_amfi_nav_analytics.py --days 1320
+"""
+
+import argparse
+import math
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from bisect import bisect_right
+from datetime import date
+
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from amfi_nav_analytics import MAX_STALE_DAYS, TRADING_DAYS, NavPanel, percentile_ranks, years_before  # noqa: E402
+from amfi_nav_history import NavHistory  # noqa: E402
+from bench_amfi_nav_history import simulate  # noqa: E402
+
+YEARS = (1, 3, 5)
+CATEGORIES = 40  # about as many as AMFI's scheme categories
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def build_history(directory, tsv, days):
+    codes, ordinals, snapshots = simulate(tsv, days)
+    history = NavHistory(directory)
+    for listed, _, last_dates, navs in snapshots:
+        history.append_arrays(codes[listed], last_dates[listed], navs[listed])
+    return history
+
+
+def loop_returns(history, code, end):
+    """Trailing returns of one scheme the per-record way"""
+    days, navs = history.history(code)
+    ordinals = [day.toordinal() for day in days.tolist()]
+    navs = navs.tolist()
+
+    def as_of(day):
+        i = bisect_right(ordinals, day) - 1
+        return navs[i] if i >= 0 and ordinals[i] >= day - MAX_STALE_DAYS else math.nan
+
+    returns = {}
+    for period in YEARS:
+        start = years_before(end, period).toordinal()
+        growth = as_of(end.toordinal()) / as_of(start)
+        returns[period] = growth ** (365 / (end.toordinal() - start)) - 1 if period > 1 else growth - 1
+    return returns
+
+
+def loop_volatility(history, code, first_day, end):
+    """Annualized volatility of the returns between consecutive NAVs dated after first_day"""
+    days, navs = history.history(code, end=end)
+    navs, days = navs.tolist(), days.tolist()
+    returns = [navs[i] / navs[i - 1] - 1 for i in range(1, len(navs)) if days[i].toordinal() > first_day]
+    return statistics.stdev(returns) * math.sqrt(TRADING_DAYS) if len(returns) >= TRADING_DAYS // 2 else math.nan
+
+
+def loop_max_drawdown(history, code):
+    high, deepest = -math.inf, 0.0
+    for nav in history.history(code)[1].tolist():
+        high = max(high, nav)
+        deepest = min(deepest, nav / high - 1)
+    return deepest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="NAV analytics benchmark")
+    parser.add_argument("--tsv", default=os.path.join(ROOT, "amfi_nav_data.tsv"), help="schemes to simulate")
+    parser.add_argument("--days", type=int, default=1320, help="trading days to simulate (5 years and a bit)")
+    parser.add_argument("--history", help="existing NAV history to use instead of simulating one")
+    parser.add_argument("--loop-schemes", type=int, default=500, help="schemes for the per-record loop")
+    parser.add_argument("--checks", type=int, default=200, help="schemes checked against plain Python")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.history:
+            history = NavHistory(args.history)
+        else:
+            print(f"Simulating {args.days} trading days...")
+            build_history(os.path.join(tmp, "history"), args.tsv, args.days)
+            history = NavHistory(os.path.join(tmp, "history"))
+
+        load_time, panel = timed(lambda: NavPanel.from_history(history))
+        end = date.fromordinal(int(panel.dates[-1]))
+        categories = np.random.default_rng(7).integers(0, CATEGORIES, len(panel))
+        fill_time, _ = timed(panel._fill)
+        returns_time, returns = timed(lambda: panel.trailing_returns(YEARS))
+        ranks_time, ranks = timed(lambda: {period: percentile_ranks(values, categories)
+                                           for period, values in returns.items()})
+        volatility_time, volatility = timed(panel.rolling_volatility)
+        drawdown_time, (depth, _, _) = timed(lambda: (panel.drawdowns(), panel.max_drawdown())[1])
+
+        rng = random.Random(7)
+        sample = rng.sample(panel.codes.tolist(), args.loop_schemes)
+        loop_time, _ = timed(lambda: [loop_returns(history, code, end) for code in sample])
+        loop_time *= len(panel) / len(sample)
+
+        mismatches = 0
+        first_day = int(panel.dates[-TRADING_DAYS - 1]) if len(panel.dates) > TRADING_DAYS else 0
+        for code in rng.sample(panel.codes.tolist(), args.checks):
+            row = panel.row(code)
+            expected = loop_returns(history, code, end)
+            got = [returns[period][row] for period in YEARS] + [volatility[row, -1], depth[row]]
+            want = [expected[period] for period in YEARS] + [loop_volatility(history, code, first_day, end),
+                                                              loop_max_drawdown(history, code)]
+            mismatches += not np.allclose(got, want, rtol=1e-9, atol=1e-12, equal_nan=True)
+        rank_mismatches = 0
+        for row in rng.sample(range(len(panel)), args.checks):
+            values = returns[1][categories == categories[row]]
+            values = values[~np.isnan(values)]
+            value = returns[1][row]
+            expected = math.nan if math.isnan(value) else \
+                100 * ((values < value).sum() + ((values == value).sum() + 1) / 2) / len(values)
+            rank_mismatches += not np.isclose(ranks[1][row], expected, equal_nan=True)
+
+    counts = {period: int((~np.isnan(values)).sum()) for period, values in returns.items()}
+    print(f"{len(panel)} schemes x {len(panel.dates)} trading days ({date.fromordinal(int(panel.dates[0]))} to "
+          f"{end}), {np.count_nonzero(~np.isnan(panel.navs)):,} NAVs; schemes with a return: "
+          + ", ".join(f"{period}y {count}" for period, count in counts.items()) + "\n")
+    print(f"read the history into a panel      {load_time * 1000:8.0f}ms")
+    print(f"carry NAVs forward (once)          {fill_time * 1000:8.0f}ms")
+    print(f"1y/3y/5y trailing returns          {returns_time * 1000:8.1f}ms")
+    print(f"  ...per-record loop over history  {loop_time * 1000:8.0f}ms (extrapolated from {len(sample)} schemes)")
+    print(f"percentile ranks in {CATEGORIES} categories  {ranks_time * 1000:8.1f}ms")
+    print(f"rolling 1y volatility, every day   {volatility_time * 1000:8.0f}ms")
+    print(f"drawdowns and max drawdown         {drawdown_time * 1000:8.0f}ms")
+    print(f"returns/volatility/drawdown matching plain Python: {args.checks - mismatches}/{args.checks}, "
+          f"ranks matching counting: {args.checks - rank_mismatches}/{args.checks}")
+
+
+if __name__ == "__main__":
+    main()
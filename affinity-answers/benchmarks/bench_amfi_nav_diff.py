@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+AMFI NAV Diff Benchmark
+Makes a next-day snapshot of the checked-in amfi_nav_data.tsv with known
+changes (--changes schemes each added, removed, given a new ISIN, left stale
+and moved past the 5% NAV threshold; every other recent scheme gets the next
+date and a smaller move) and diffs the two:
+  - in one partition and split into --partitions partitions, checking the
+    change counts against the planted ones
+  - --scale copies of both snapshots (the schemes repeated under new codes,
+    a few hundred MB per file), each run in a subprocess to measure its peak
+    memory: partitioned as the CLI does it, in one partition, and reading
+    both files into dicts before comparing them
+
+Usage:
+    python benchmarks/bench_amfi_nav_diff.py --scale 150
+"""
+
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from amfi_ingest import TSV_HEADER, read_tsv  # noqa: E402
+from amfi_nav_diff import CHANGES, PARTITION_BYTES, SnapshotDiff  # noqa: E402
+from amfi_nav_store import date_ordinal  # noqa: E402
+
+
+def next_day(records, changes, rng):
+    """The next day's records, with `changes` schemes planted for each kind of change"""
+    newest = max(date_ordinal(record.date) for record in records)
+    tomorrow = (date.fromordinal(newest) + timedelta(days=1)).strftime('%d-%b-%Y')
+    recent = [i for i, record in enumerate(records) if date_ordinal(record.date) >= newest - 7]
+    planted = rng.sample([i for i in recent if float(records[i].asset_value) > 0], 4 * changes)
+    removed, isin, stale, moved = (set(planted[k * changes:(k + 1) * changes]) for k in range(4))
+    recent = set(recent)
+    top = max(int(record.scheme_code) for record in records)
+
+    day = []
+    for i, record in enumerate(records):
+        if i in removed:
+            continue
+        if i in recent and i not in stale:
+            value = float(record.asset_value) * (rng.choice((1.08, 0.9)) if i in moved else 1 + rng.uniform(-0.02, 0.02))
+            decimals = len(record.asset_value.partition('.')[2])
+            record = record._replace(asset_value=f"{value:.{decimals}f}", date=tomorrow)
+        if i in isin:
+            record = record._replace(isin_growth=f"INF{i:09d}")
+        day.append(record)
+    for k, template in enumerate(rng.sample(records, changes), 1):
+        day.append(template._replace(scheme_code=str(top + k), date=tomorrow))
+    return day
+
+
+def write_tsv(path, records, scale=1):
+    with open(path, 'w', encoding='utf-8', newline='\n') as f:
+        f.write('\t'.join(TSV_HEADER) + '\n')
+        for copy in range(scale):
+            for record in records:
+                f.write('\t'.join((str(int(record.scheme_code) + copy * 1_000_000),) + record[1:6]) + '\n')
+
+
+def child(mode, old, new, output):
+    """One diff of the scaled files, in its own process; prints seconds, peak RSS and the summary as JSON"""
+    start = time.perf_counter()
+    if mode == 'dicts':
+        old_rows = {record.scheme_code: record for record in read_tsv(old)}
+        new_rows = {record.scheme_code: record for record in read_tsv(new)}
+        summary = SnapshotDiff(list(old_rows.values()), list(new_rows.values())).write(output)
+    else:
+        summary = SnapshotDiff(old, new, partition_bytes=2 ** 62 if mode == 'single' else PARTITION_BYTES,
+                               workdir=os.path.dirname(output)).write(output)
+    print(json.dumps({'seconds': time.perf_counter() - start, 'summary': summary,
+                      'peak_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Snapshot diff benchmark")
+    parser.add_argument("--tsv", default=os.path.join(ROOT, "amfi_nav_data.tsv"), help="snapshot to start from")
+    parser.add_argument("--changes", type=int, default=100, help="schemes planted for each kind of change")
+    parser.add_argument("--partitions", type=int, default=8, help="partitions for the partitioned day diff")
+    parser.add_argument("--scale", type=int, default=150, help="copies of the snapshots for the large diff")
+    parser.add_argument("--child", nargs=4, metavar=("MODE", "OLD", "NEW", "OUTPUT"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        return child(*args.child)
+
+    records = list(read_tsv(args.tsv))
+    day = next_day(records, args.changes, random.Random(7))
+    expected = dict.fromkeys(CHANGES, args.changes)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        old, new, output = (os.path.join(tmp, name) for name in ("old.tsv", "new.tsv", "changes.ndjson"))
+        write_tsv(old, records)
+        write_tsv(new, day)
+        print(f"{len(records)} -> {len(day)} schemes, {args.changes} planted of each change\n")
+        print(f"{'diff':<28}{'seconds':>9}{'changes':>9}  counts as planted")
+        for name, partition_bytes in (("one partition", 2 ** 62),
+                                      (f"{args.partitions} partitions", os.path.getsize(old) // args.partitions + 1)):
+            diff = SnapshotDiff(old, new, partition_bytes=partition_bytes, workdir=tmp)
+            best = float("inf")
+            for _ in range(5):
+                start = time.perf_counter()
+                summary = diff.write(output)
+                best = min(best, time.perf_counter() - start)
+            counts = {change: summary[change] for change in CHANGES}
+            print(f"{name:<28}{best:9.3f}{sum(counts.values()):9}  {counts == expected} "
+                  f"({diff.partitions} partitions)")
+
+        write_tsv(old, records, args.scale)
+        write_tsv(new, day, args.scale)
+        size = os.path.getsize(old) / 2 ** 20
+        print(f"\n{args.scale} copies: {len(records) * args.scale:,} -> {len(day) * args.scale:,} rows, "
+              f"{size:.0f} MB and {os.path.getsize(new) / 2 ** 20:.0f} MB files\n")
+        print(f"{'diff':<28}{'seconds':>9}{'peak MB':>9}  counts as planted")
+        scaled = {change: count * args.scale for change, count in expected.items()}
+        for mode, name in (("partitioned", "partitioned (64 MB)"), ("single", "one partition"),
+                           ("dicts", "both files in dicts")):
+            run = subprocess.run([sys.executable, __file__, "--child", mode, old, new, output],
+                                 capture_output=True, text=True, check=True)
+            result = json.loads(run.stdout)
+            counts = {change: result['summary'][change] for change in CHANGES}
+            print(f"{name:<28}{result['seconds']:9.2f}{result['peak_mb']:9.0f}  {counts == scaled} "
+                  f"({result['summary']['partitions']} partitions)")
+
+
+if __name__ == "__main__":
+    main()
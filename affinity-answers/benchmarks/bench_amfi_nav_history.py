@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+AMFI NAV History Benchmark
+Simulates --days trading days of NAVs for every scheme in the checked-in
+amfi_nav_data.tsv (a random walk from each scheme's NAV, rounded to the
+decimals AMFI publishes it with; some schemes skip days and repeat their
+last NAV, as AMFI does, and new schemes appear along the way), appends them
+one day at a time and reports:
+  - append time per day and per seal, store size and bytes per point
+  - a scheme's full history and a one-month range read, against loading
+    the same history from one JSON document per day
+and checks that the histories read back match the simulated ones exactly
+
+Usage:
+    python benchmarks/bench_amfi_nav_history.py --days 1250
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from amfi_ingest import read_tsv  # noqa: E402
+from amfi_nav_history import NavHistory, to_datetime64  # noqa: E402
+
+
+def trading_days(count, start=date(2021, 1, 4)):
+    days, day = [], start
+    while len(days) < count:
+        if day.weekday() < 5:
+            days.append(day.toordinal())
+        day += timedelta(days=1)
+    return days
+
+
+def simulate(tsv, days, seed=7):
+    """
+    (scheme codes, trading day ordinals, day generator) for `days` trading days
+    of the schemes in `tsv`; each day yields (listed, moved, last dates, NAVs)
+    aligned with the codes: listed schemes are the ones launched by then,
+    moved the ones that published a new NAV that day
+    """
+    rng = np.random.default_rng(seed)
+    records = list(read_tsv(tsv))
+    codes = np.array([int(record.scheme_code) for record in records], np.int64)
+    codes, first = np.unique(codes, return_index=True)
+    # NAVs are published with up to 4 decimals, a few with up to 8
+    scale = np.array([1e8 if len(records[i].asset_value.partition('.')[2]) > 4 else 1e4 for i in first])
+    navs = np.rint(np.array([float(records[i].asset_value) for i in first]) * scale) / scale
+    navs[navs <= 0] = 10.0
+    launched = rng.integers(-days, days, len(codes)).clip(0)  # about half exist from day one
+    ordinals = trading_days(days)
+
+    def generate():
+        nonlocal navs
+        last_dates = np.zeros(len(codes), np.int32)
+        for day_index, today in enumerate(ordinals):
+            listed = launched <= day_index
+            moved = listed & (rng.random(len(codes)) > 0.03)  # the rest repeat their last NAV and date
+            step = 1 + rng.normal(0.0003, 0.01, len(codes))
+            navs = np.where(moved, np.rint(navs * step * scale) / scale, navs)
+            last_dates = np.where(moved, today, last_dates)
+            yield listed, moved, last_dates, navs
+
+    return codes, ordinals, generate()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="NAV history benchmark")
+    parser.add_argument("--tsv", default=os.path.join(ROOT, "amfi_nav_data.tsv"), help="schemes to simulate")
+    parser.add_argument("--days", type=int, default=1250, help="trading days to append (1250 is about 5 years)")
+    parser.add_argument("--segment-snapshots", type=int, default=250, help="appends per sealed segment")
+    parser.add_argument("--checks", type=int, default=300, help="schemes whose history is checked")
+    parser.add_argument("--reads", type=int, default=2000, help="history reads timed")
+    args = parser.parse_args()
+
+    codes, days, snapshots = simulate(args.tsv, args.days)
+    checked = set(random.Random(7).sample(range(len(codes)), args.checks))
+    truth = {i: ([], []) for i in checked}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = NavHistory(os.path.join(tmp, "history"), args.segment_snapshots)
+        append_times, seal_times, points = [], [], 0
+        for today, (listed, moved, last_dates, navs) in zip(days, snapshots):
+            if today == days[0]:
+                founders = codes[listed].tolist()  # the schemes with a full history
+            sealing = len(store.manifest['head']['snapshots']) + 1 >= args.segment_snapshots
+            start = time.perf_counter()
+            points += store.append_arrays(codes[listed], last_dates[listed], navs[listed])
+            (seal_times if sealing else append_times).append(time.perf_counter() - start)
+            for i in checked:
+                if moved[i]:
+                    truth[i][0].append(today)
+                    truth[i][1].append(navs[i])
+
+        reopened = NavHistory(store.directory)
+        mismatches = 0
+        for i in checked:
+            dates, values = reopened.history(int(codes[i]))
+            mismatches += not (np.array_equal(dates, to_datetime64(truth[i][0])) and np.array_equal(values, truth[i][1]))
+        info = reopened.info()
+
+        # Time reads from a freshly opened store, as a new process would see it
+        reader = NavHistory(store.directory)
+        sample = random.Random(1).choices(founders, k=args.reads)
+        full_reads = []
+        for _ in range(2):  # the first pass faults the blocks' pages in, the second finds them mapped
+            start = time.perf_counter()
+            for code in sample:
+                reader.history(code)
+            full_reads.append((time.perf_counter() - start) / len(sample))
+        month = (date.fromordinal(days[len(days) // 2]), date.fromordinal(days[len(days) // 2] + 30))
+        start = time.perf_counter()
+        for code in sample:
+            reader.history(code, *month)
+        month_read = (time.perf_counter() - start) / len(sample)
+
+        # The alternative: keep every day's amfi_nav_data.json and read them back
+        snapshot = {"data": [{"scheme_code": str(code), "asset_value": f"{nav:.4f}", "date": ""}
+                             for code, nav in zip(codes.tolist(), navs.tolist())]}
+        path = os.path.join(tmp, "day.json")
+        with open(path, "w") as f:
+            json.dump(snapshot, f)
+        start = time.perf_counter()
+        with open(path) as f:
+            json.load(f)
+        json_day = time.perf_counter() - start
+        json_size = os.path.getsize(path) * len(days)
+
+    raw = points * 12  # int32 date + float64 NAV
+    print(f"{len(codes)} schemes, {len(days)} trading days ({date.fromordinal(days[0])} to "
+          f"{date.fromordinal(days[-1])}), {points:,} points in {info['segments']} segments + head\n")
+    print(f"append a day        median {statistics.median(append_times) * 1000:6.1f}ms  "
+          f"max {max(append_times) * 1000:6.1f}ms")
+    if seal_times:
+        print(f"append + seal       median {statistics.median(seal_times) * 1000:6.1f}ms")
+    print(f"sealed segments     {info['sealed_bytes'] / 2 ** 20:8.1f} MB for {info['sealed_points']:,} points "
+          f"({info['sealed_bytes'] / max(info['sealed_points'], 1):.2f} bytes/point, raw 12)")
+    print(f"store on disk       {info['bytes_on_disk'] / 2 ** 20:8.1f} MB (raw {raw / 2 ** 20:.1f} MB, "
+          f"daily JSON files {json_size / 2 ** 20:,.0f} MB)")
+    print(f"full history read   {full_reads[0] * 1e6:8.1f}µs first, {full_reads[1] * 1e6:.1f}µs again   "
+          f"(reading one JSON day: {json_day * 1000:.0f}ms, {len(days)} days {json_day * len(days):.0f}s)")
+    print(f"one month read      {month_read * 1e6:8.1f}µs")
+    print(f"histories matching the simulation: {args.checks - mismatches}/{args.checks}")
+
+
+if __name__ == "__main__":
+    main()
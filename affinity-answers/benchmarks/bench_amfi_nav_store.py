@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+AMFI NAV Store Benchmark
+Compares the checked-in amfi_nav_data.json with the columnar store built
+from amfi_nav_data.tsv: file size, time to load, lookups by scheme code and
+ISIN (hash index vs scanning the JSON records) and a NAV range filter
+
+Usage:
+    python benchmarks/bench_amfi_nav_store.py --lookups 20000
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from amfi_ingest import read_tsv  # noqa: E402
+from amfi_nav_store import NavStore  # noqa: E402
+
+
+def best_of(fn, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def load_json(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)["data"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="NAV store benchmark")
+    parser.add_argument("--json", default=os.path.join(ROOT, "amfi_nav_data.json"), help="JSON dump to compare with")
+    parser.add_argument("--tsv", default=os.path.join(ROOT, "amfi_nav_data.tsv"), help="TSV to build the store from")
+    parser.add_argument("--lookups", type=int, default=20000, help="random lookups per method")
+    parser.add_argument("--scans", type=int, default=200, help="lookups for the JSON scan (it is slow)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "amfi_nav_data.navstore")
+        build_time, store = best_of(lambda: NavStore.build(read_tsv(args.tsv)), repeat=1)
+        store.save(path)
+
+        json_load, records = best_of(lambda: load_json(args.json))
+        store_open, store = best_of(lambda: NavStore.load(path))
+        store_read, _ = best_of(lambda: NavStore.load(path, mmap=False))
+
+        rng = random.Random(7)
+        codes = [rng.choice(records)["scheme_code"] for _ in range(args.lookups)]
+        isins = [rng.choice(records)["isin_growth"] for _ in range(args.lookups)]
+        isins = [isin for isin in isins if isin != "-"]
+
+        by_code, _ = best_of(lambda: [store.row_for_code(code) for code in codes], repeat=3)
+        by_isin, _ = best_of(lambda: [store.rows_for_isin(isin) for isin in isins], repeat=3)
+        scan_code, _ = best_of(lambda: [next(r for r in records if r["scheme_code"] == code)
+                                        for code in codes[:args.scans]], repeat=1)
+        scan_isin, _ = best_of(lambda: [[r for r in records if isin in (r["isin_growth"], r["isin_reinvestment"])]
+                                        for isin in isins[:args.scans]], repeat=1)
+
+        json_filter, json_hits = best_of(lambda: sum(1 for r in records if 100 <= float(r["asset_value"]) <= 500))
+        store_filter, store_hits = best_of(lambda: int(((store.nav >= 100) & (store.nav <= 500)).sum()))
+
+        print(f"{len(store)} schemes; JSON {os.path.getsize(args.json) / 1024:.0f} KB, "
+              f"store {os.path.getsize(path) / 1024:.0f} KB (built in {build_time * 1000:.0f}ms)\n")
+        print(f"{'load':<22} JSON {json_load * 1000:8.2f}ms   store mmap {store_open * 1000:6.2f}ms, "
+              f"read {store_read * 1000:6.2f}ms")
+        print(f"{'lookup by code':<22} JSON scan {scan_code / args.scans * 1e6:9.1f}µs   "
+              f"store {by_code / len(codes) * 1e6:6.2f}µs")
+        print(f"{'lookup by ISIN':<22} JSON scan {scan_isin / args.scans * 1e6:9.1f}µs   "
+              f"store {by_isin / len(isins) * 1e6:6.2f}µs")
+        print(f"{'NAV 100-500 filter':<22} JSON {json_filter * 1000:8.2f}ms   store {store_filter * 1000:6.3f}ms "
+              f"({store_hits} schemes{'' if store_hits == json_hits else ', MISMATCH'})")
+
+
+if __name__ == "__main__":
+    main()
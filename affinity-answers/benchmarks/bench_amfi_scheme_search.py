@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+AMFI Scheme Search Benchmark
+Builds the scheme search index from the checked-in amfi_nav_data.tsv and
+times:
+  - a full build against an incremental update() from a simulated next day
+    (--changes schemes each renamed, removed and added), in memory and as
+    load + update + save of the index file, checking that the updated index
+    answers queries the same way as one built from scratch
+  - prefix, substring, fuzzy and faceted queries generated from the scheme
+    names, against scanning the ~14k names for the same words
+
+Usage:
+    python benchmarks/bench_amfi_scheme_search.py --queries 2000
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from amfi_ingest import read_tsv  # noqa: E402
+from amfi_scheme_search import SchemeSearchIndex, tokenize  # noqa: E402
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def next_day(records, changes, rng):
+    """records with `changes` schemes renamed, removed and added"""
+    records = list(records)
+    for i in rng.sample(range(len(records)), changes):
+        records[i] = records[i]._replace(scheme_name=records[i].scheme_name + " - Segregated Portfolio 1")
+    for i in sorted(rng.sample(range(len(records)), changes), reverse=True):
+        del records[i]
+    top = max(int(record.scheme_code) for record in records)
+    for i, template in enumerate(rng.sample(records, changes), 1):
+        records.append(template._replace(scheme_code=str(top + i), scheme_name=template.scheme_name + " - Series II"))
+    return records
+
+
+def typo(word, rng):
+    i = rng.randrange(1, len(word) - 1)
+    return word[:i] + word[i + 1:] if rng.random() < 0.5 else word[:i] + word[i + 1] + word[i] + word[i + 2:]
+
+
+def make_queries(names, count, rng):
+    """(mode, query, plan) triples from random scheme names"""
+    queries = []
+    for _ in range(count):
+        words = [word for word in tokenize(rng.choice(names)) if not word.isdigit()]
+        long_words = [word for word in words if len(word) >= 6] or ["liquid"]
+        queries += [
+            ("prefix", " ".join(words[:2]) + " " + (words[2][:3] if len(words) > 2 else ""), None),
+            ("substring", rng.choice(long_words)[1:5], None),
+            ("fuzzy", " ".join(words[:1] + [typo(rng.choice(long_words), rng)]), None),
+            ("faceted", " ".join(words[:2]), "DIRECT"),
+        ]
+    return queries
+
+
+def scan(names, query):
+    """What grepping the names does: every query word has to appear in the name"""
+    words = tokenize(query)
+    return [name for name in names if all(word in name for word in words)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scheme search benchmark")
+    parser.add_argument("--tsv", default=os.path.join(ROOT, "amfi_nav_data.tsv"), help="TSV to index")
+    parser.add_argument("--changes", type=int, default=50, help="schemes renamed, removed and added next day")
+    parser.add_argument("--queries", type=int, default=2000, help="queries per kind")
+    parser.add_argument("--scans", type=int, default=100, help="queries per kind for the name scan (it is slow)")
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    records = list(read_tsv(args.tsv))
+    today = next_day(records, args.changes, rng)
+
+    build_time, index = timed(lambda: SchemeSearchIndex.build(records))
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "amfi_scheme_index.json")
+        save_time, _ = timed(lambda: index.save(path))
+        load_time, _ = timed(lambda: SchemeSearchIndex.load(path))
+        rebuild_time, fresh = timed(lambda: SchemeSearchIndex.build(today))
+        update_time, counts = timed(lambda: index.update(today))
+        reloaded = SchemeSearchIndex.load(path)
+        file_update_time, _ = timed(lambda: (reloaded.update(today), reloaded.save(path)))
+        file_rebuild_time, _ = timed(lambda: SchemeSearchIndex.build(today).save(path))
+        size = os.path.getsize(path)
+
+    names = [scheme.name for scheme in index.schemes.values()]
+    queries = make_queries(names, args.queries, rng)
+    same = all(index.search(query, plan=plan) == fresh.search(query, plan=plan) for _, query, plan in queries[:400])
+
+    print(f"{len(index)} schemes, {index.metadata['tokens']} tokens, index file {size / 1024:.0f} KB\n")
+    print(f"build {build_time * 1000:.0f}ms, save {save_time * 1000:.0f}ms, load {load_time * 1000:.0f}ms")
+    print(f"next day ({counts[0]} added, {counts[1]} renamed, {counts[2]} removed):")
+    print(f"  in memory   rebuild {rebuild_time * 1000:7.1f}ms   update {update_time * 1000:6.1f}ms")
+    print(f"  index file  rebuild {file_rebuild_time * 1000:7.1f}ms   load+update+save {file_update_time * 1000:6.1f}ms")
+    print(f"  updated index ranks like a fresh build: {same}\n")
+
+    lowered = [name.lower() for name in names]
+    print(f"{'query':<10}{'median µs':>10}{'p99 µs':>9}{'max µs':>9}{'hits':>7}{'scan µs':>10}")
+    for kind in ("prefix", "substring", "fuzzy", "faceted"):
+        selected = [(query, plan) for mode, query, plan in queries if mode == kind]
+        latencies, hits = [], 0
+        for query, plan in selected:
+            elapsed, results = timed(lambda: index.search(query, plan=plan))
+            latencies.append(elapsed * 1e6)
+            hits += bool(results)
+        scan_time, _ = timed(lambda: [scan(lowered, query) for query, _ in selected[:args.scans]])
+        latencies.sort()
+        print(f"{kind:<10}{statistics.median(latencies):10.1f}{latencies[int(len(latencies) * 0.99)]:9.1f}"
+              f"{latencies[-1]:9.0f}{hits / len(selected):7.0%}{scan_time / args.scans * 1e6:10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+OLX Browser Pool Benchmark
+Loads fixture result pages in headless Chrome the old way (one driver,
+wait for <body>, then a fixed 3 second sleep) and through BrowserPool with
+readiness waits, reporting pages/second and per-page latency. Needs Chrome
+and chromedriver on the machine
+
+Usage:
+    python benchmarks/bench_olx_browser_pool.py --pages 20 --browsers 4
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from olx_browser_pool import SELENIUM_AVAILABLE, BrowserPool, create_chrome_driver  # noqa: E402
+from olx_fixtures import FixtureServer  # noqa: E402
+
+
+def single_driver(urls):
+    """The previous get_page_content_headless loop"""
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.webdriver.support.ui import WebDriverWait
+
+    driver = create_chrome_driver()
+    latencies = []
+    try:
+        for url in urls:
+            start = time.perf_counter()
+            driver.get(url)
+            WebDriverWait(driver, 30).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
+            time.sleep(3)
+            driver.page_source
+            latencies.append(time.perf_counter() - start)
+    finally:
+        driver.quit()
+    return latencies
+
+
+def pooled(urls, browsers):
+    pool = BrowserPool(size=browsers)
+    if not pool.start():
+        raise SystemExit("❌ Could not start Chrome")
+    latencies = []
+
+    def fetch(url):
+        start = time.perf_counter()
+        pool.fetch(url)
+        latencies.append(time.perf_counter() - start)
+
+    try:
+        with ThreadPoolExecutor(max_workers=browsers) as executor:
+            list(executor.map(fetch, urls))
+    finally:
+        pool.close()
+    return latencies
+
+
+def report(name, elapsed, latencies):
+    print(f"{name:<14} {len(latencies) / elapsed:6.2f} pages/s  "
+          f"median {statistics.median(latencies) * 1000:7.0f}ms  max {max(latencies) * 1000:7.0f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless browser pool benchmark")
+    parser.add_argument("--pages", type=int, default=20, help="result pages to load")
+    parser.add_argument("--browsers", type=int, default=4, help="pool size")
+    parser.add_argument("--latency", type=float, default=0.1, help="fixture server latency per page")
+    args = parser.parse_args()
+    if not SELENIUM_AVAILABLE:
+        raise SystemExit("❌ Selenium not available. Install with: pip install selenium")
+
+    server = FixtureServer(pages=args.pages, latency=args.latency)
+    urls = [f"{server.url}/items/q-car-cover?page={page}" for page in range(1, args.pages + 1)]
+    try:
+        for name, run in (("single driver", lambda: single_driver(urls)),
+                          (f"pool x{args.browsers}", lambda: pooled(urls, args.browsers))):
+            start = time.perf_counter()
+            latencies = run()
+            report(name, time.perf_counter() - start, latencies)
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+OLX Crawl Benchmark
+Crawls several queries x pages from the local fixture server (with a fixed
+per-response latency standing in for the network) and compares the old
+serial behaviour (one worker, one page at a time) with the concurrent engine
+
+Usage:
+    python benchmarks/bench_olx_crawl.py --queries 12 --pages 5 --latency 0.2
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from olx_car_cover_scraper import OLXCarCoverScraper  # noqa: E402
+from olx_fixtures import FixtureServer  # noqa: E402
+
+QUERY_WORDS = ["car cover", "bike cover", "seat covers", "alloy wheels", "dash camera", "car charger",
+               "roof rack", "floor mats", "steering cover", "car perfume", "tyre inflator", "car vacuum"]
+
+
+def crawl(server, queries, pages, workers, per_host, rate):
+    scraper = OLXCarCoverScraper(queries=queries, max_pages=pages, workers=workers,
+                                 per_host_concurrency=per_host, per_host_rate=rate,
+                                 base_url=server.url, use_browser=False)
+    start = server.requests
+    began = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        scraper.scrape_search_results()
+    elapsed = time.perf_counter() - began
+    return elapsed, server.requests - start, len(scraper.results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OLX crawl engine benchmark")
+    parser.add_argument("--queries", type=int, default=12, help="number of queries (max 12)")
+    parser.add_argument("--pages", type=int, default=5, help="pages per query")
+    parser.add_argument("--latency", type=float, default=0.2, help="server latency per page in seconds")
+    parser.add_argument("--workers", type=int, default=16, help="workers for the concurrent run")
+    args = parser.parse_args()
+
+    queries = QUERY_WORDS[:args.queries]
+    server = FixtureServer(pages=args.pages, latency=args.latency)
+    print(f"{len(queries)} queries x {args.pages} pages, {args.latency * 1000:.0f}ms per response\n")
+    try:
+        for name, workers, per_host in (("serial", 1, 1), ("concurrent", args.workers, args.workers)):
+            elapsed, pages, listings = crawl(server, queries, args.pages, workers, per_host, rate=0)
+            print(f"{name:<11} {pages:4d} pages in {elapsed:6.2f}s  {pages / elapsed:7.1f} pages/s  "
+                  f"{listings} unique listings")
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+OLX Fetch Policy Benchmark
+Fetches fixture pages concurrently with the previous retry loop (up to 5
+attempts, sleeping 2**attempt seconds) and with FetchPolicy, against a
+server that is flaky (503s), rate limiting (429 + Retry-After) or blocking
+every request (429), reporting wall time, requests sent and pages fetched
+
+Usage:
+    python benchmarks/bench_olx_fetch_policy.py --pages 24 --workers 8
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from olx_fetch_policy import FetchPolicy  # noqa: E402
+from olx_fixtures import FixtureServer  # noqa: E402
+
+
+def previous_loop(session, url, max_retries=5):
+    """The old get_page_content retry loop"""
+    for attempt in range(max_retries):
+        try:
+            response = session.get(url, timeout=(10, 20))
+            response.raise_for_status()
+            return response.text
+        except requests.RequestException as e:
+            status = e.response.status_code if e.response is not None else None
+            if status is not None and 400 <= status < 500 and status not in (408, 429):
+                return None
+            if attempt < max_retries - 1:
+                time.sleep(min(2 ** attempt, 10))
+    return None
+
+
+def with_policy(policy):
+    def fetch(session, url):
+        response = policy.execute(url, lambda: session.get(url, timeout=(10, 20)))
+        return response.text if response is not None else None
+    return fetch
+
+
+def setup(server, scenario, paths):
+    server.blocked = None
+    if scenario == "flaky":
+        for path in paths[::3]:
+            server.fail(path, [503, 503])
+    elif scenario == "rate limited":
+        for path in paths[::2]:
+            server.fail(path, [429], retry_after=1)
+    elif scenario == "blocked":
+        server.blocked = (429, None)
+
+
+def run(server, fetch, paths, workers):
+    session = requests.Session()
+    before = server.requests
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pages = list(executor.map(lambda path: fetch(session, server.url + path), paths))
+    return time.perf_counter() - start, server.requests - before, sum(page is not None for page in pages)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fetch policy benchmark")
+    parser.add_argument("--pages", type=int, default=24, help="pages fetched per scenario")
+    parser.add_argument("--workers", type=int, default=8, help="concurrent fetches")
+    parser.add_argument("--latency", type=float, default=0.05, help="fixture server latency per response")
+    args = parser.parse_args()
+
+    server = FixtureServer(pages=args.pages, latency=args.latency)
+    paths = [f"/items/q-car-cover?page={page}" for page in range(1, args.pages + 1)]
+    print(f"{'scenario':<14} {'fetcher':<10} {'time':>8} {'requests':>9} {'pages':>6}")
+    try:
+        for scenario in ("flaky", "rate limited", "blocked"):
+            for name in ("previous", "policy"):
+                setup(server, scenario, paths)
+                # No pacing here: the comparison is about retries and blocking
+                fetch = previous_loop if name == "previous" else with_policy(FetchPolicy(rate=0))
+                elapsed, requests_sent, pages = run(server, fetch, paths, args.workers)
+                print(f"{scenario:<14} {name:<10} {elapsed:7.1f}s {requests_sent:>9} {pages:>6}")
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+OLX Listing Store Benchmark
+Fills a ListingStore with synthetic listings over several runs (a few
+percent new, repriced and gone each run), then times upserts and the
+change-tracking queries the scraper reports after every run. A last, large
+run writes --pages pages of --page-size new listings one upsert per page, as
+the scraper does, into a fresh store; an upsert late in the run should cost
+what one early in the run does
+
+Usage:
+    python benchmarks/bench_olx_listing_store.py --listings 300000 --runs 4
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from olx_listing_store import ListingStore  # noqa: E402
+
+QUERIES = ["car cover", "bike cover", "seat cover", "dash camera"]
+LOCATIONS = ["Periyamet, Chennai", "Andheri East, Mumbai", "Koramangala, Bengaluru", "Salt Lake, Kolkata"]
+
+
+def make_listing(item_id, rng):
+    return {
+        'title': f"Listing {item_id}",
+        'price': f"₹ {rng.randrange(200, 50000):,}",
+        'location': rng.choice(LOCATIONS),
+        'link': f"https://www.olx.in/item/listing-iid-{item_id}",
+        'image_url': f"https://apollo.olx.in/v1/files/{item_id}-IN/image",
+        'posted_date': "Aug 20",
+    }
+
+
+def timed(fn, repeat=20):
+    """Median milliseconds per call, and the last result"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Listing store benchmark")
+    parser.add_argument("--listings", type=int, default=300000, help="live listings per run")
+    parser.add_argument("--runs", type=int, default=4, help="scraper runs to simulate")
+    parser.add_argument("--churn", type=float, default=0.03, help="fraction new/repriced/gone per run")
+    parser.add_argument("--pages", type=int, default=3000, help="pages in the large page-by-page run")
+    parser.add_argument("--page-size", type=int, default=40, help="new listings per page in that run")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    live = {item_id: make_listing(item_id, rng) for item_id in range(args.listings)}
+    next_id = args.listings
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ListingStore(os.path.join(tmp, "listings.db"))
+        for run in range(args.runs):
+            if run:
+                changed = int(args.listings * args.churn)
+                for item_id in rng.sample(sorted(live), changed):
+                    live[item_id]['price'] = f"₹ {rng.randrange(200, 50000):,}"
+                for item_id in rng.sample(sorted(live), changed):
+                    del live[item_id]
+                for item_id in range(next_id, next_id + changed):
+                    live[item_id] = make_listing(item_id, rng)
+                next_id += changed
+
+            by_query = {query: [] for query in QUERIES}
+            for item_id, listing in live.items():
+                by_query[QUERIES[item_id % len(QUERIES)]].append(listing)
+            start = time.perf_counter()
+            run_id = store.start_run(QUERIES)
+            written = sum(store.upsert(run_id, query, listings) for query, listings in by_query.items())
+            store.finish_run(run_id, QUERIES)
+            elapsed = time.perf_counter() - start
+            summary = store.run_summary(run_id)
+            print(f"run {run_id}: {len(live):,} listings in {elapsed:.2f}s ({len(live) / elapsed:,.0f}/s), "
+                  f"{written:,} rows written: {summary['new']:,} new, {summary['repriced']:,} repriced, "
+                  f"{summary['gone']:,} gone")
+
+        total = store.conn.execute("SELECT count(*) FROM listings").fetchone()[0]
+        history = store.conn.execute("SELECT count(*) FROM price_history").fetchone()[0]
+        print(f"\n{total:,} listings, {history:,} price history rows, "
+              f"{os.path.getsize(store.path) / 2**20:.0f} MiB\n")
+
+        since = store.conn.execute("SELECT started_at FROM runs WHERE id = ?", (run_id,)).fetchone()[0]
+        checks = [
+            ("new in last run", lambda: store.new_listings(run_id)),
+            ("new since timestamp", lambda: store.new_since(since)),
+            ("repriced in last run", lambda: store.repriced(run_id)),
+            ("gone in last run", lambda: store.gone(run_id)),
+            ("location + price range", lambda: store.search(location=LOCATIONS[0], min_price=1000, max_price=1500)),
+            ("price history of one", lambda: store.price_history(live[next(iter(live))]['link'])),
+        ]
+        print(f"{'query':<24} {'rows':>8} {'median':>10}")
+        for name, fn in checks:
+            ms, rows = timed(fn)
+            print(f"{name:<24} {len(rows):>8,} {ms:>8.2f}ms")
+        ms, _ = timed(lambda: store.run_summary(run_id))
+        print(f"{'run summary (counts)':<24} {'3':>8} {ms:>8.2f}ms")
+        store.close()
+
+        store = ListingStore(os.path.join(tmp, "pages.db"))
+        run_id = store.start_run(QUERIES[:1])
+        samples = []
+        start = time.perf_counter()
+        for page in range(args.pages):
+            listings = [make_listing(item_id, rng)
+                        for item_id in range(page * args.page_size, (page + 1) * args.page_size)]
+            page_start = time.perf_counter()
+            store.upsert(run_id, QUERIES[0], listings)
+            samples.append((time.perf_counter() - page_start) * 1000)
+        store.finish_run(run_id, QUERIES[:1])
+        elapsed = time.perf_counter() - start
+        print(f"\none run of {args.pages:,} pages x {args.page_size} new listings: {elapsed:.2f}s")
+        for first in sorted({0, args.pages // 10, args.pages // 3, max(0, args.pages - 100)}):
+            window = samples[first:first + 100]
+            print(f"  upsert at pages {first + 1:>6,}-{first + len(window):<6,} median "
+                  f"{statistics.median(window):6.2f}ms")
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
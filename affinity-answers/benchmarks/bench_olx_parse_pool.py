@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+OLX Parse Pool Benchmark
+Crawls fixture queries with parsing inline on the fetch threads and with
+the parse stage in worker processes, for each parser backend, reporting
+pages/second and listings found. The fixture server runs in its own process
+
+Usage:
+    python benchmarks/bench_olx_parse_pool.py --queries 16 --pages 10 --parse-workers 2,4
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from olx_car_cover_scraper import OLXCarCoverScraper  # noqa: E402
+from olx_crawler import CrawlEngine  # noqa: E402
+from olx_fetch_policy import FetchPolicy  # noqa: E402
+from olx_fixtures import FixtureProcess  # noqa: E402
+from olx_parsers import PARSERS  # noqa: E402
+
+
+def crawl(base_url, queries, pages, workers, parser, parse_workers):
+    scraper = OLXCarCoverScraper(base_url=base_url, use_browser=False, parser=parser, workers=workers,
+                                 parse_workers=parse_workers, fetch_policy=FetchPolicy(rate=0))
+    engine = CrawlEngine(
+        fetch=scraper.fetch_page,
+        extract=lambda query, content, url: scraper.extract_listings(content, url),
+        base_url=base_url, workers=workers, per_host_concurrency=workers, per_host_rate=0, max_pages=pages)
+    try:
+        start = time.perf_counter()
+        results = engine.crawl(queries)
+        elapsed = time.perf_counter() - start
+    finally:
+        scraper.cleanup()
+    return elapsed, engine.pages_fetched, sum(len(listings) for listings in results.values())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parse stage benchmark")
+    parser.add_argument("--queries", type=int, default=16, help="queries crawled concurrently")
+    parser.add_argument("--pages", type=int, default=10, help="result pages per query")
+    parser.add_argument("--workers", type=int, default=16, help="fetch threads")
+    parser.add_argument("--latency", type=float, default=0.05, help="fixture server latency per response")
+    parser.add_argument("--parse-workers", default="2,4", help="parse pool sizes to compare with inline parsing")
+    parser.add_argument("--parsers", default=",".join(sorted(PARSERS)), help="parser backends to run")
+    args = parser.parse_args()
+
+    server = FixtureProcess(pages=args.pages, latency=args.latency)
+    queries = [f"car cover {i}" for i in range(args.queries)]
+    sizes = [0] + [int(n) for n in args.parse_workers.split(",")]
+    rows = []
+    sys.stdout = open(os.devnull, "w")  # the scraper prints a line per page
+    try:
+        crawl(server.url, queries, args.pages, args.workers, "lxml", 0)  # warm-up: the server renders each page once
+        for name in args.parsers.split(","):
+            for parse_workers in sizes:
+                label = f"{name} {f'pool x{parse_workers}' if parse_workers else 'inline'}"
+                rows.append((label,) + crawl(server.url, queries, args.pages, args.workers, name, parse_workers))
+    finally:
+        sys.stdout = sys.__stdout__
+        server.close()
+
+    print(f"{args.queries} queries x {args.pages} pages, {args.workers} fetch threads, "
+          f"{args.latency * 1000:.0f}ms per response, {os.cpu_count()} CPUs\n")
+    for label, elapsed, pages, listings in rows:
+        print(f"{label:<18} {pages:>5} pages in {elapsed:6.2f}s  {pages / elapsed:7.1f} pages/s  {listings} listings")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+OLX Parser Benchmark
+Parses saved OLX result pages with each parser backend and reports pages and
+listings per second plus peak memory. Every backend runs in its own process
+so peak RSS is not shared between them (lxml allocates outside the Python
+heap, so RSS is reported alongside tracemalloc's Python-only peak)
+
+Usage:
+    python benchmarks/bench_olx_parsers.py                      # generated fixtures
+    python benchmarks/bench_olx_parsers.py --fixtures saved/    # *.html pages saved from OLX
+"""
+
+import argparse
+import glob
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from olx_fixtures import render_search_page  # noqa: E402
+from olx_parsers import CAR_COVER_KEYWORDS, PARSERS, get_parser  # noqa: E402
+
+BASE_URL = "https://www.olx.in"
+
+
+def load_fixtures(directory, pages, per_page):
+    if directory:
+        paths = sorted(glob.glob(os.path.join(directory, "*.html")))
+        if not paths:
+            raise SystemExit(f"❌ No *.html files in {directory}")
+        pages_html = []
+        for path in paths:
+            with open(path, encoding="utf-8") as f:
+                pages_html.append(f.read())
+        return pages_html
+    return [render_search_page("car-cover", page, pages, per_page) for page in range(1, pages + 1)]
+
+
+def run_backend(name, pages_html, repeat):
+    """Worker: parse every page `repeat` times and return timings and memory"""
+    parser = get_parser(name, BASE_URL)
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    listings = records = 0
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for html in pages_html:
+            page = parser.parse(html, CAR_COVER_KEYWORDS)
+            listings += page.item_count
+            records += len(page.listings)
+    elapsed = time.perf_counter() - start
+    rss_growth = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before
+
+    # Separate pass: tracemalloc slows allocation-heavy parsers too much to time them with it on
+    tracemalloc.start()
+    for html in pages_html:
+        parser.parse(html, CAR_COVER_KEYWORDS)
+    _, python_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "pages_per_s": len(pages_html) * repeat / elapsed,
+        "listings_per_s": listings / elapsed,
+        "records": records // repeat,
+        "python_peak_mb": python_peak / 2**20,
+        "rss_growth_mb": rss_growth / 1024,
+    }
+
+
+def strip_timestamps(records):
+    return [{k: v for k, v in record.items() if k != "scraped_at"} for record in records]
+
+
+def check_equivalence(pages_html):
+    """Count pages where backends disagree on records or the next link"""
+    mismatches = 0
+    parsers = [get_parser(name, BASE_URL) for name in PARSERS]
+    for html in pages_html:
+        results = [parser.parse(html, CAR_COVER_KEYWORDS) for parser in parsers]
+        first = results[0]
+        for other in results[1:]:
+            if (strip_timestamps(other.listings) != strip_timestamps(first.listings)
+                    or other.next_href != first.next_href or other.item_count != first.item_count):
+                mismatches += 1
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OLX parser backend benchmark")
+    parser.add_argument("--fixtures", help="directory of saved *.html result pages (default: generate)")
+    parser.add_argument("--pages", type=int, default=20, help="pages to generate")
+    parser.add_argument("--per-page", type=int, default=40, help="listings per generated page")
+    parser.add_argument("--repeat", type=int, default=3, help="passes over the pages per backend")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    pages_html = load_fixtures(args.fixtures, args.pages, args.per_page)
+    if args.worker:
+        print(json.dumps(run_backend(args.worker, pages_html, args.repeat)))
+        return
+
+    size_mb = sum(len(html.encode("utf-8")) for html in pages_html) / 2**20
+    print(f"{len(pages_html)} pages ({size_mb:.1f} MiB), {args.repeat} passes per backend")
+    print(f"backends disagree on {check_equivalence(pages_html)} page(s)\n")
+    print(f"{'backend':<8}{'pages/s':>10}{'listings/s':>12}{'records':>9}{'py peak MB':>12}{'RSS growth MB':>15}")
+    for name in PARSERS:
+        command = [sys.executable, os.path.abspath(__file__), "--worker", name, "--repeat", str(args.repeat),
+                   "--pages", str(args.pages), "--per-page", str(args.per_page)]
+        if args.fixtures:
+            command += ["--fixtures", args.fixtures]
+        result = json.loads(subprocess.run(command, check=True, capture_output=True, text=True).stdout)
+        print(f"{name:<8}{result['pages_per_s']:10.1f}{result['listings_per_s']:12.0f}{result['records']:9d}"
+              f"{result['python_peak_mb']:12.1f}{result['rss_growth_mb']:15.1f}")
+
+
+if __name__ == "__main__":
+    main()
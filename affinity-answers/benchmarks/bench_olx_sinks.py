@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+OLX Result Sinks Benchmark
+Writes N synthetic listings the old way (collect everything, then dump JSON,
+CSV and text) and through the streaming sinks, reporting time and, in a
+second pass, peak Python memory for each
+
+Usage:
+    python benchmarks/bench_olx_sinks.py --records 200000
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from olx_sinks import open_sinks  # noqa: E402
+
+
+def records(count, page_size=40):
+    """Pages of listings, as the crawl hands them over"""
+    for start in range(0, count, page_size):
+        yield [{
+            'title': f"Waterproof car cover {i}",
+            'price': f"₹ {200 + i % 5000:,}",
+            'location': "Periyamet, Chennai",
+            'link': f"https://www.olx.in/item/car-cover-iid-{i}",
+            'image_url': f"https://apollo.olx.in/v1/files/{i}-IN/image",
+            'posted_date': "Aug 20",
+            'scraped_at': "2025-08-26T09:56:18.428271",
+        } for i in range(start, min(start + page_size, count))]
+
+
+def snapshot(count, prefix):
+    """The previous save_to_json/save_to_csv/save_to_txt after the crawl"""
+    results = []
+    for page in records(count):
+        results.extend(page)
+    with open(prefix + ".json", "w", encoding="utf-8") as f:
+        json.dump({'search_query': "car cover", 'total_results': len(results), 'results': results},
+                  f, indent=2, ensure_ascii=False)
+    with open(prefix + ".csv", "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=results[0].keys())
+        writer.writeheader()
+        writer.writerows(results)
+    with open(prefix + ".txt", "w", encoding="utf-8") as f:
+        for i, result in enumerate(results, 1):
+            f.write(f"Listing {i}:\n  Title: {result['title']}\n  Price: {result['price']}\n"
+                    f"  Location: {result['location']}\n  Link: {result['link']}\n"
+                    f"  Posted: {result['posted_date']}\n" + "-" * 30 + "\n\n")
+
+
+def streaming(count, prefix, formats=("json", "csv", "txt")):
+    with open_sinks(prefix, formats, search_query="car cover") as sinks:
+        for page in records(count):
+            sinks.write_many(page)
+
+
+def measure(fn, *args):
+    # Timed without tracemalloc, which slows allocation-heavy code unevenly
+    start = time.perf_counter()
+    fn(*args)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    fn(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Result writer benchmark")
+    parser.add_argument("--records", type=int, default=200000, help="listings to write")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, fn in (("snapshot", snapshot), ("streaming", streaming)):
+            elapsed, peak = measure(fn, args.records, os.path.join(tmp, name))
+            print(f"{name:<10} {elapsed:6.2f}s  peak {peak / 2**20:7.1f} MiB  "
+                  f"({args.records / elapsed:,.0f} records/s)")
+
+
+if __name__ == "__main__":
+    main()
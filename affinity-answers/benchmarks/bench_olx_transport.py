@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+OLX Transport Benchmark
+Fetches fixture result pages through the scraper's fetch path with the
+requests transport (worker threads sharing one Session) and the async
+transport (tasks on one event loop, with the aiohttp and httpx backends),
+reporting pages/second. The fixture server runs in its own process so it
+doesn't share the client's interpreter
+
+Usage:
+    python benchmarks/bench_olx_transport.py --pages 400 --latency 0.2
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from olx_car_cover_scraper import OLXCarCoverScraper  # noqa: E402
+from olx_fixtures import FixtureProcess  # noqa: E402
+from olx_fetch_policy import FetchPolicy  # noqa: E402
+from olx_transport import AIOHTTP_AVAILABLE, HTTPX_AVAILABLE  # noqa: E402
+
+
+def scraper(base_url, transport, concurrency):
+    return OLXCarCoverScraper(base_url=base_url, use_browser=False, workers=concurrency, transport=transport,
+                              max_connections=concurrency, fetch_policy=FetchPolicy(rate=0))
+
+
+def run_sync(urls, base_url, threads):
+    client = scraper(base_url, "sync", threads)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        pages = list(executor.map(client.get_page_content, urls))
+    return time.perf_counter() - start, sum(page is not None for page in pages)
+
+
+def run_async(urls, base_url, in_flight, backend):
+    client = scraper(base_url, "async", in_flight)
+    client.async_transport.backend = backend
+
+    async def fetch_all():
+        slots = asyncio.Semaphore(in_flight)
+
+        async def fetch(url):
+            async with slots:
+                return await client.async_get_page_content(url)
+
+        async with client.async_transport:
+            return await asyncio.gather(*(fetch(url) for url in urls))
+
+    start = time.perf_counter()
+    pages = asyncio.run(fetch_all())
+    return time.perf_counter() - start, sum(page is not None for page in pages)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sync vs async transport benchmark")
+    parser.add_argument("--pages", type=int, default=400, help="pages to fetch per run")
+    parser.add_argument("--latency", type=float, default=0.2, help="fixture server latency per response")
+    parser.add_argument("--threads", default="10,64", help="thread counts for the requests transport")
+    parser.add_argument("--in-flight", default="64,256", help="concurrent fetches for the async transport")
+    args = parser.parse_args()
+    backends = [name for name, available in (("aiohttp", AIOHTTP_AVAILABLE), ("httpx", HTTPX_AVAILABLE)) if available]
+    if not backends:
+        raise SystemExit("❌ No async HTTP client available. Install with: pip install aiohttp httpx")
+
+    server = FixtureProcess(pages=args.pages, latency=args.latency)
+    base_url = server.url
+    urls = [f"{base_url}/items/q-car-cover?page={page}" for page in range(1, args.pages + 1)]
+    sys.stdout = open(os.devnull, "w")  # the fetch path prints a line per retry/304
+    rows = []
+    try:
+        run_sync(urls, base_url, 32)  # warm-up: the server renders each page once
+        for threads in (int(n) for n in args.threads.split(",")):
+            rows.append((f"sync x{threads} threads",) + run_sync(urls, base_url, threads))
+        for backend in backends:
+            for in_flight in (int(n) for n in args.in_flight.split(",")):
+                rows.append((f"{backend} x{in_flight} in flight",) + run_async(urls, base_url, in_flight, backend))
+    finally:
+        sys.stdout = sys.__stdout__
+        server.close()
+
+    print(f"{args.pages} pages, {args.latency * 1000:.0f}ms per response\n")
+    for name, elapsed, fetched in rows:
+        print(f"{name:<26} {fetched:>5} pages in {elapsed:6.2f}s  {fetched / elapsed:8.1f} pages/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+OLX Fixtures
+Synthetic OLX search result pages (same markup as the live site, see README)
+and a local HTTP server that serves them with pagination, optional latency and
+ETag/Last-Modified validators, for benchmarking the scraper without touching
+olx.in
+"""
+
+import argparse
+import html
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+import zlib
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+TITLES = [
+    "Car body cover available in wholesale market price",
+    "Waterproof car cover for hatchback",
+    "Premium vehicle cover with mirror pockets",
+    "Auto cover for SUV, dust and UV proof",
+    "Bike cover heavy duty",
+    "Alloy wheels 15 inch set of 4",
+    "Car seat covers leather finish",
+    "Dash camera full HD",
+]
+LOCATIONS = ["Periyamet, Chennai", "Andheri East, Mumbai", "Koramangala, Bengaluru", "Salt Lake, Kolkata"]
+
+
+def render_listing(query_slug, page, index, rng):
+    title = rng.choice(TITLES)
+    item_id = f"{query_slug}-{page}-{index}"
+    return f"""
+<li data-aut-id="itemBox{index}" class="_1DNjI">
+    <a class="_2cbZ2" href="/item/{item_id}-iid-{zlib.crc32(item_id.encode())}">
+        <figure class="_2grx4"><img class="_3vnjf" src="https://apollo.olx.in/v1/files/{item_id}-IN/image" alt="{html.escape(title)}"></figure>
+        <span class="_2Ks63" data-aut-id="itemPrice">₹ {rng.randrange(200, 5000):,}</span>
+        <span class="_2poNJ" data-aut-id="itemTitle">{html.escape(title)}</span>
+        <div class="_3rmDx">
+            <span class="_2VQu4" data-aut-id="item-location">{rng.choice(LOCATIONS)}</span>
+            <span class="_2jcGx"><span>Aug {rng.randrange(1, 29)}</span></span>
+        </div>
+    </a>
+</li>"""
+
+
+def render_search_page(query_slug, page, pages=5, per_page=40, padding_kb=50, seed=0):
+    """A search results page; links to the next page unless it is the last one"""
+    rng = random.Random(f"{seed}-{query_slug}-{page}")
+    listings = "".join(render_listing(query_slug, page, i, rng) for i in range(per_page))
+    next_link = ""
+    if page < pages:
+        next_link = f'<a data-aut-id="pageNext" rel="next" href="/items/q-{query_slug}?page={page + 1}">Next</a>'
+    # Real result pages carry a lot of script/markup around the listings
+    padding = "<script>window.__APP={}</script>\n" + ("<div class=\"_pad\"><span>x</span></div>\n" * (padding_kb * 24))
+    return f"""<!DOCTYPE html>
+<html><head><title>{html.escape(query_slug)} - OLX</title></head>
+<body>
+<header><nav><a href="/">OLX</a></nav></header>
+{padding}
+<ul class="_266Ly _10aCo" data-aut-id="itemsList">{listings}
+</ul>
+{next_link}
+</body></html>"""
+
+
+class FixtureServer:
+    """Serves /items/q-<slug>?page=N and /search?q=... from render_search_page"""
+
+    def __init__(self, pages=5, per_page=40, latency=0.0, padding_kb=50, port=0):
+        self.pages = pages
+        self.per_page = per_page
+        self.latency = latency
+        self.padding_kb = padding_kb
+        self.requests = 0
+        self.not_modified = 0
+        self.blocked = None  # (status, Retry-After or None) answered to every request while set
+        self._lock = threading.Lock()
+        self._cache = {}
+        self._versions = {}
+        self._failures = {}
+        fixtures = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                page = fixtures.page_for(self.path)
+                if fixtures.latency:
+                    time.sleep(fixtures.latency)
+                with fixtures._lock:
+                    fixtures.requests += 1
+                    failure = fixtures.blocked or fixtures._next_failure(self.path)
+                if failure:
+                    status, retry_after = failure
+                    self.send_response(status)
+                    if retry_after is not None:
+                        self.send_header("Retry-After", str(retry_after))
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                if page is None:
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                body, etag, last_modified = page
+                if self.headers.get("If-None-Match") == etag:
+                    with fixtures._lock:
+                        fixtures.not_modified += 1
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("ETag", etag)
+                self.send_header("Last-Modified", last_modified)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        ThreadingHTTPServer.daemon_threads = True
+        ThreadingHTTPServer.request_queue_size = 1024  # default 5 drops SYNs under hundreds of clients
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def _slug_and_page(self, path):
+        parts = urlsplit(path)
+        params = parse_qs(parts.query)
+        if parts.path.startswith("/items/q-"):
+            slug = parts.path[len("/items/q-"):]
+        elif parts.path == "/search" and "q" in params:
+            slug = "-".join(params["q"][0].split())
+        else:
+            return None
+        page = int(params.get("page", ["1"])[0])
+        if not 1 <= page <= self.pages:
+            return None
+        return slug, page
+
+    def page_for(self, path):
+        """(body, ETag, Last-Modified) for a request path, or None for a 404"""
+        key = self._slug_and_page(path)
+        if key is None:
+            return None
+        with self._lock:
+            page = self._cache.get(key)
+            version = self._versions.get(key, 0)
+        if page is None:
+            body = render_search_page(*key, self.pages, self.per_page, self.padding_kb, seed=version).encode("utf-8")
+            page = (body, f'"{zlib.crc32(body):08x}"', formatdate(time.time(), usegmt=True))
+            with self._lock:
+                self._cache[key] = page
+        return page
+
+    def touch(self, path):
+        """Change the listings served at `path` (as if new ads were posted)"""
+        key = self._slug_and_page(path)
+        with self._lock:
+            self._versions[key] = self._versions.get(key, 0) + 1
+            self._cache.pop(key, None)
+
+    def fail(self, path, statuses, retry_after=None):
+        """Answer the next requests for `path` with `statuses` before serving it normally"""
+        with self._lock:
+            self._failures.setdefault(path, []).extend((status, retry_after) for status in statuses)
+
+    def _next_failure(self, path):
+        queue = self._failures.get(path)
+        return queue.pop(0) if queue else None
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class FixtureProcess:
+    """
+    The fixture server in a child process, for benchmarks where serving pages
+    must not compete with the client for this interpreter's GIL
+    """
+
+    def __init__(self, pages=5, per_page=40, latency=0.0):
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}"
+        self.process = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "--port", str(port), "--pages", str(pages),
+             "--per-page", str(per_page), "--latency", str(latency)],
+            stdout=subprocess.DEVNULL)
+        for _ in range(100):
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+                return
+            except OSError:
+                time.sleep(0.05)
+        self.close()
+        raise RuntimeError("Fixture server process did not start")
+
+    def close(self):
+        self.process.terminate()
+        self.process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve synthetic OLX search pages")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--pages", type=int, default=5, help="result pages per query")
+    parser.add_argument("--per-page", type=int, default=40, help="listings per page")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds to wait before each response")
+    args = parser.parse_args()
+    server = FixtureServer(args.pages, args.per_page, args.latency, port=args.port)
+    print(f"🧪 Serving OLX fixtures at {server.url}/items/q-car-cover (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
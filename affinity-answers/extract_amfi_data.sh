@@ -7,7 +7,7 @@
 set -e  # Exit on any error
 
 # Configuration
-AMFI_URL="https://www.amfiindia.com/spages/NAVAll.txt"
+AMFI_URL="${AMFI_URL:-https://www.amfiindia.com/spages/NAVAll.txt}"  # override for a local copy (file://...)
 OUTPUT_TSV="amfi_nav_data.tsv"
 OUTPUT_JSON="amfi_nav_data.json"
 TEMP_FILE="temp_nav_data.txt"
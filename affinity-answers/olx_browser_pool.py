@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+OLX Browser Pool
+A pool of warm headless Chrome sessions with checkout/return, health checks
+and recycling after a number of pages. Pages are considered loaded as soon as
+the listing selector appears instead of after a fixed sleep
+"""
+
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.common.exceptions import TimeoutException, WebDriverException
+    SELENIUM_AVAILABLE = True
+except ImportError:
+    SELENIUM_AVAILABLE = False
+
+USER_AGENT = ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+              '(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
+LISTING_SELECTOR = 'li[data-aut-id^="itemBox"]'
+
+
+def create_chrome_driver():
+    """Start one headless Chrome"""
+    chrome_options = Options()
+    chrome_options.add_argument("--headless")
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    chrome_options.add_argument("--disable-gpu")
+    chrome_options.add_argument("--window-size=1920,1080")
+    chrome_options.add_argument(f"--user-agent={USER_AGENT}")
+
+    # Disable images and CSS for faster loading
+    chrome_options.add_argument("--disable-images")
+    chrome_options.add_argument("--disable-javascript")
+
+    # Set Chrome binary path for macOS
+    chrome_path = "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome"
+    if os.path.exists(chrome_path):
+        chrome_options.binary_location = chrome_path
+
+    return webdriver.Chrome(options=chrome_options)
+
+
+class BrowserSession:
+    def __init__(self, driver):
+        self.driver = driver
+        self.pages = 0
+        self.created_at = time.time()
+
+    def is_healthy(self):
+        """True if the browser still answers commands"""
+        try:
+            self.driver.execute_script("return document.readyState")
+            return True
+        except WebDriverException:
+            return False
+
+    def quit(self):
+        try:
+            self.driver.quit()
+        except Exception as e:
+            print(f"⚠️  Error closing headless browser: {e}")
+
+
+class BrowserPool:
+    """
+    `size` headless browsers shared by fetch threads. A session is checked out
+    for one page and returned; it is replaced when it fails a health check,
+    when a page load breaks it, or after `max_pages` pages (long-lived Chrome
+    sessions grow in memory). fetch() waits for `ready_selector` rather than
+    sleeping; a page that finishes loading without it (an empty or last result
+    page) is returned after `empty_grace` more seconds.
+    """
+
+    def __init__(self, size=2, max_pages=50, ready_selector=LISTING_SELECTOR, ready_timeout=15,
+                 empty_grace=1.0, load_timeout=30, driver_factory=None):
+        self.size = size
+        self.max_pages = max_pages
+        self.ready_selector = ready_selector
+        self.ready_timeout = ready_timeout
+        self.empty_grace = empty_grace
+        self.load_timeout = load_timeout
+        self.driver_factory = driver_factory or create_chrome_driver
+        self.pages_fetched = 0
+        self.recycled = 0
+
+        self._idle = queue.LifoQueue()  # most recently used session first: it is the warmest
+        self._lock = threading.Lock()
+        self._live = 0
+        self._closed = False
+
+    def _new_session(self):
+        try:
+            driver = self.driver_factory()
+            driver.set_page_load_timeout(self.load_timeout)
+        except Exception as e:
+            print(f"❌ Failed to initialize headless browser: {e}")
+            return None
+        with self._lock:
+            self._live += 1
+        return BrowserSession(driver)
+
+    def _retire(self, session):
+        session.quit()
+        with self._lock:
+            self._live -= 1
+            self.recycled += 1
+
+    def start(self):
+        """Start all browsers in parallel; returns how many came up"""
+        sessions = []
+        threads = [threading.Thread(target=lambda: sessions.append(self._new_session()))
+                   for _ in range(self.size)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for session in sessions:
+            if session is not None:
+                self._idle.put(session)
+        return self._live
+
+    def checkout(self, timeout=None):
+        """Take a healthy session, or None if the pool has none left or times out"""
+        while True:
+            if self._live == 0 or self._closed:
+                return None
+            try:
+                session = self._idle.get(timeout=timeout if timeout is not None else self.load_timeout)
+            except queue.Empty:
+                return None
+            if session.is_healthy():
+                return session
+            print("⚠️  Headless browser failed its health check, replacing it")
+            self._retire(session)
+            replacement = self._new_session()
+            if replacement is not None:
+                return replacement
+
+    def checkin(self, session, broken=False):
+        """Return a session; broken or worn-out sessions are replaced"""
+        if self._closed:
+            self._retire(session)
+            return
+        if broken or session.pages >= self.max_pages:
+            self._retire(session)
+            session = self._new_session()
+            if session is None:
+                return
+        self._idle.put(session)
+
+    @contextmanager
+    def session(self, timeout=None):
+        session = self.checkout(timeout)
+        broken = False
+        try:
+            yield session
+        except TimeoutException:
+            raise  # a slow page, not a broken browser
+        except WebDriverException:
+            broken = True
+            raise
+        finally:
+            if session is not None:
+                self.checkin(session, broken)
+
+    def _wait_until_ready(self, driver):
+        loaded_at = None
+
+        def ready(d):
+            nonlocal loaded_at
+            if d.find_elements(By.CSS_SELECTOR, self.ready_selector):
+                return True
+            if d.execute_script("return document.readyState") != "complete":
+                return False
+            loaded_at = loaded_at or time.monotonic()
+            return time.monotonic() - loaded_at >= self.empty_grace
+
+        WebDriverWait(driver, self.ready_timeout, poll_frequency=0.05).until(ready)
+
+    def fetch(self, url):
+        """Load `url` in a pooled browser and return its HTML, or None"""
+        try:
+            with self.session() as session:
+                if session is None:
+                    print(f"❌ No headless browser available for {url}")
+                    return None
+                session.driver.get(url)
+                self._wait_until_ready(session.driver)
+                session.pages += 1
+                page_source = session.driver.page_source
+        except TimeoutException:
+            print(f"❌ Headless browser timeout for {url}")
+            return None
+        except WebDriverException as e:
+            print(f"❌ Headless browser error: {e}")
+            return None
+        with self._lock:
+            self.pages_fetched += 1
+        return page_source
+
+    def close(self):
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().quit()
+            except queue.Empty:
+                break
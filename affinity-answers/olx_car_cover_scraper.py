@@ -1,36 +1,58 @@
 #!/usr/bin/env python3
 """
 OLX Car Cover Scraper
-Searches for "Car Cover" on OLX and saves results to a file
+Searches for "Car Cover" (or any list of queries) on OLX and saves results to a file
 Uses headless browser to bypass blocking
 """
 
 import requests
-from bs4 import BeautifulSoup
+import argparse
+import asyncio
 import json
 import time
-import csv
-from datetime import datetime
-import re
-import os
-
-# Try to import Selenium for headless browsing
-try:
-    from selenium import webdriver
-    from selenium.webdriver.chrome.options import Options
-    from selenium.webdriver.common.by import By
-    from selenium.webdriver.support.ui import WebDriverWait
-    from selenium.webdriver.support import expected_conditions as EC
-    from selenium.common.exceptions import TimeoutException, WebDriverException
-    SELENIUM_AVAILABLE = True
-except ImportError:
-    SELENIUM_AVAILABLE = False
+
+from olx_crawler import AsyncCrawlEngine, CrawlEngine, next_page_url, search_urls
+from olx_fetch_policy import FetchPolicy
+from olx_listing_store import ListingStore
+from olx_page_cache import PageCache
+from olx_sinks import SINKS, CSVSink, JSONSink, TextSink, open_sinks
+from olx_transport import AsyncTransport
+from olx_parsers import CAR_COVER_KEYWORDS, DEFAULT_PARSER, PARSERS, ParsedPage, get_parser
+from olx_parse_pool import ParsePool
+
+# Headless browsing needs Selenium (see olx_browser_pool.py)
+from olx_browser_pool import SELENIUM_AVAILABLE, BrowserPool
+
+if not SELENIUM_AVAILABLE:
     print("⚠️  Selenium not available. Install with: pip install selenium")
 
+
+def keywords_for_query(query):
+    """Title keywords a listing must contain to count as a result for `query`"""
+    if query.lower() == 'car cover':
+        return CAR_COVER_KEYWORDS
+    return [query.lower()]
+
+
 class OLXCarCoverScraper:
-    def __init__(self):
-        self.base_url = "https://www.olx.in"
-        self.search_url = "https://www.olx.in/items/q-car-cover"
+    def __init__(self, queries=None, max_pages=5, workers=8, per_host_concurrency=4, per_host_rate=2.0,
+                 base_url="https://www.olx.in", use_browser=True, browsers=2, browser_max_pages=50,
+                 parser=DEFAULT_PARSER, cache_dir=None, cache_ttl=120, cache_max_mb=200,
+                 db_path=None, output_prefix="olx_car_cover_results", formats=('json', 'csv', 'txt'),
+                 rotate_records=0, flush_interval=5.0, keep_results=True, fetch_policy=None,
+                 transport='sync', max_connections=100, http2=False, parse_workers=0, parse_queue=None):
+        self.base_url = base_url.rstrip('/')
+        self.parser = get_parser(parser, self.base_url)
+        # Optional process pool for parsing: fetching and parsing then overlap across cores
+        self.parse_pool = None
+        if parse_workers:
+            self.parse_pool = ParsePool(parser, self.base_url, workers=parse_workers, max_pending=parse_queue)
+        self.queries = queries or ['car cover']
+        self.search_url = search_urls(self.base_url, self.queries[0])[0]
+        self.max_pages = max_pages
+        self.workers = workers
+        self.per_host_concurrency = per_host_concurrency
+        self.per_host_rate = per_host_rate
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8',
@@ -42,371 +64,319 @@ class OLXCarCoverScraper:
             'Pragma': 'no-cache',
         }
         self.results = []
+        self.result_count = 0
+        self.keep_results = keep_results
+        self.output_prefix = output_prefix
+        self.formats = formats
+        self.rotate_records = rotate_records
+        self.flush_interval = flush_interval
+        # Optional SQLite store tracking new, repriced and gone listings across runs
+        self.listing_store = ListingStore(db_path) if db_path else None
+        # Optional on-disk page cache for conditional GETs and skipping unchanged pages
+        self.page_cache = None
+        if cache_dir:
+            self.page_cache = PageCache(cache_dir, ttl=cache_ttl, max_bytes=int(cache_max_mb * 1024 * 1024))
+        # Rate limiting, retries and circuit breaking for every request to a host
+        self.fetch_policy = fetch_policy or FetchPolicy(rate=per_host_rate)
         self.session = requests.Session()
-        # Configure session for better reliability
+        # Optional asyncio transport: pages become tasks on one event loop instead of threads
+        self.async_transport = None
+        if transport == 'async':
+            self.async_transport = AsyncTransport(max_connections=max_connections, http2=http2)
+        # Connection pooling only: retries are left to the fetch policy, not repeated underneath it
         self.session.mount('https://', requests.adapters.HTTPAdapter(
-            max_retries=3,
+            max_retries=0,
             pool_connections=10,
-            pool_maxsize=10
+            pool_maxsize=max(10, workers)
         ))
         
-        # Initialize headless browser if available
-        self.driver = None
-        if SELENIUM_AVAILABLE:
+        # Initialize a pool of headless browsers if available
+        self.browsers = browsers
+        self.browser_max_pages = browser_max_pages
+        self.browser_pool = None
+        if SELENIUM_AVAILABLE and use_browser:
             self.setup_headless_browser()
     
     def setup_headless_browser(self):
-        """Setup headless Chrome browser for scraping"""
-        try:
-            chrome_options = Options()
-            chrome_options.add_argument("--headless")
-            chrome_options.add_argument("--no-sandbox")
-            chrome_options.add_argument("--disable-dev-shm-usage")
-            chrome_options.add_argument("--disable-gpu")
-            chrome_options.add_argument("--window-size=1920,1080")
-            chrome_options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
-            
-            # Disable images and CSS for faster loading
-            chrome_options.add_argument("--disable-images")
-            chrome_options.add_argument("--disable-javascript")
-            
-            # Set Chrome binary path for macOS
-            chrome_path = "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome"
-            if os.path.exists(chrome_path):
-                chrome_options.binary_location = chrome_path
-            
-            self.driver = webdriver.Chrome(options=chrome_options)
-            print("✅ Headless browser initialized successfully")
-        except Exception as e:
-            print(f"❌ Failed to initialize headless browser: {e}")
+        """Start the pool of headless Chrome browsers used for scraping"""
+        pool = BrowserPool(size=self.browsers, max_pages=self.browser_max_pages)
+        started = pool.start()
+        if started:
+            self.browser_pool = pool
+            print(f"✅ {started} headless browser(s) initialized successfully")
+        else:
             print("💡 Make sure Chrome/Chromium is installed and chromedriver is in PATH")
-            self.driver = None
     
-    def get_page_content_headless(self, url, timeout=30):
-        """Fetch page content using headless browser"""
-        if not self.driver:
+    def get_page_content_headless(self, url):
+        """Fetch page content using a pooled headless browser"""
+        if not self.browser_pool:
             return None
-            
+        
+        if not self.fetch_policy.gate(url):
+            return None
+        print(f"🌐 Using headless browser to fetch: {url}")
+        breaker = self.fetch_policy.breaker(url)
+        settled = False
         try:
-            print(f"🌐 Using headless browser to fetch: {url}")
-            self.driver.get(url)
-            
-            # Wait for page to load
-            WebDriverWait(self.driver, timeout).until(
-                EC.presence_of_element_located((By.TAG_NAME, "body"))
-            )
-            
-            # Additional wait for dynamic content
-            time.sleep(3)
-            
-            # Get page source
-            page_source = self.driver.page_source
-            
-            if len(page_source.strip()) > 1000:
+            start = time.monotonic()
+            page_source = self.browser_pool.fetch(url)
+            self.fetch_policy.metrics.record_attempt(url, 'browser' if page_source else 'browser error',
+                                                     time.monotonic() - start)
+            if page_source is None:
+                return None
+            # A nearly empty page is what a block or challenge page looks like to the browser
+            blocked = len(page_source.strip()) <= 1000
+            breaker.record(blocked=blocked)
+            settled = True
+            if not blocked:
                 print(f"✅ Successfully fetched {len(page_source)} characters via headless browser")
                 return page_source
-            else:
-                print("⚠️  Headless browser returned insufficient content")
-                return None
-                
-        except TimeoutException:
-            print(f"❌ Headless browser timeout for {url}")
-            return None
-        except WebDriverException as e:
-            print(f"❌ Headless browser error: {e}")
-            return None
-        except Exception as e:
-            print(f"❌ Unexpected error in headless browser: {e}")
+            print("⚠️  Headless browser returned insufficient content")
             return None
+        finally:
+            if not settled:
+                breaker.release()
 
-    def get_page_content(self, url, max_retries=5):
-        """Fetch page content with improved error handling and retries"""
-        for attempt in range(max_retries):
-            try:
-                print(f"Attempt {attempt + 1}/{max_retries} to fetch {url}")
-                
-                # Use shorter timeout for faster failure detection
-                timeout = (10, 20)  # (connect_timeout, read_timeout)
-                response = self.session.get(url, headers=self.headers, timeout=timeout)
-                response.raise_for_status()
-                
-                # Check if we got actual content
-                if len(response.text.strip()) < 100:
-                    print(f"Warning: Received very short response ({len(response.text)} characters)")
-                    if attempt < max_retries - 1:
-                        print(f"Retrying in {2 ** attempt} seconds...")
-                        time.sleep(2 ** attempt)
-                        continue
-                
-                return response.text
-                
-            except requests.exceptions.Timeout as e:
-                print(f"Timeout error (attempt {attempt + 1}): {e}")
-                if attempt < max_retries - 1:
-                    wait_time = min(2 ** attempt, 10)  # Cap at 10 seconds
-                    print(f"Retrying in {wait_time} seconds...")
-                    time.sleep(wait_time)
-                else:
-                    print(f"Failed to fetch {url} after {max_retries} attempts due to timeouts")
-                    return None
-                    
-            except requests.RequestException as e:
-                print(f"Request error (attempt {attempt + 1}): {e}")
-                if attempt < max_retries - 1:
-                    wait_time = min(2 ** attempt, 10)
-                    print(f"Retrying in {wait_time} seconds...")
-                    time.sleep(wait_time)
-                else:
-                    print(f"Failed to fetch {url} after {max_retries} attempts")
-                    return None
-
-    def parse_listing(self, listing_element):
-        """Parse individual listing data based on actual OLX HTML structure"""
-        try:
-            # Extract title - using the correct class from the HTML example
-            title_element = listing_element.find('span', class_='_2poNJ', attrs={'data-aut-id': 'itemTitle'})
-            title = title_element.get_text(strip=True) if title_element else "N/A"
-            
-            # Check if this is a car cover item (more flexible matching)
-            title_lower = title.lower()
-            car_cover_keywords = ['car cover', 'car body cover', 'vehicle cover', 'auto cover']
-            is_car_cover = any(keyword in title_lower for keyword in car_cover_keywords)
-            
-            if not is_car_cover:
-                return None  # Skip non-car-cover items
-            
-            # Extract price - using the correct class from the HTML example
-            price_element = listing_element.find('span', class_='_2Ks63', attrs={'data-aut-id': 'itemPrice'})
-            price = price_element.get_text(strip=True) if price_element else "N/A"
-            
-            # Extract location - using the correct class from the HTML example
-            location_element = listing_element.find('span', class_='_2VQu4', attrs={'data-aut-id': 'item-location'})
-            location = location_element.get_text(strip=True) if location_element else "N/A"
-            
-            # Extract link - try multiple selectors for better compatibility
-            link = "N/A"
-            link_selectors = [
-                'a[href*="/item/"]',  # Any link containing /item/
-                'a._2cbZ2',           # Original selector
-                'a[data-aut-id="itemLink"]',  # Alternative selector
-                'a'                   # Fallback to any link
-            ]
-            
-            for selector in link_selectors:
-                link_element = listing_element.select_one(selector)
-                if link_element and link_element.get('href'):
-                    href = link_element.get('href')
-                    if href.startswith('/'):
-                        link = self.base_url + href
-                    elif href.startswith('http'):
-                        link = href
-                    else:
-                        link = self.base_url + '/' + href
-                    break
-            
-            # Extract image URL - try multiple selectors
-            image_url = "N/A"
-            img_selectors = [
-                'img._3vnjf',         # Original selector
-                'img[src*="apollo.olx.in"]',  # Apollo CDN images
-                'img[src*="olx.in"]',         # Any OLX image
-                'img'                 # Fallback to any image
-            ]
-            
-            for selector in img_selectors:
-                img_element = listing_element.select_one(selector)
-                if img_element and img_element.get('src'):
-                    image_url = img_element.get('src')
-                    break
-            
-            # Extract posted date - look for the date span in the _3rmDx div
-            date_div = listing_element.find('div', class_='_3rmDx')
-            posted_date = "N/A"
-            if date_div:
-                date_spans = date_div.find_all('span')
-                for span in date_spans:
-                    if span.get('class') and '_2jcGx' in span.get('class'):
-                        posted_date = span.get_text(strip=True)
-                        break
-            
-            return {
-                'title': title,
-                'price': price,
-                'location': location,
-                'link': link,
-                'image_url': image_url,
-                'posted_date': posted_date,
-                'scraped_at': datetime.now().isoformat()
-            }
-        except Exception as e:
-            print(f"Error parsing listing: {e}")
-            return None
+    def _request_headers(self, url, validators=True):
+        if validators and self.page_cache:
+            return {**self.headers, **self.page_cache.conditional_headers(url)}
+        return self.headers
 
-    def scrape_search_results(self):
-        """Scrape car cover search results from OLX"""
-        print("🔍 Searching for 'Car Cover' on OLX...")
-        
-        # Try multiple search URLs in case one fails
-        search_urls = [
-            "https://www.olx.in/items/q-car-cover",
-            "https://www.olx.in/cars/car-accessories/car-covers",
-            "https://www.olx.in/search?q=car+cover"
-        ]
-        
+    @staticmethod
+    def _is_complete(response):
+        # A 304 has no body; anything else must carry actual content
+        return response.status_code == 304 or len(response.text.strip()) >= 100
+
+    def _content_from_response(self, url, response):
+        """Page body for a response (from the cache on a 304); None if a 304 has nothing cached"""
+        if response.status_code == 304 and self.page_cache:
+            content = self.page_cache.not_modified(url)
+            if content is not None:
+                print(f"♻️  Not modified: {url}")
+            return content
+        if self.page_cache:
+            self.page_cache.store(url, response.text, response.headers.get('ETag'),
+                                  response.headers.get('Last-Modified'))
+        return response.text
+
+    def get_page_content(self, url, max_retries=None):
+        """Fetch page content with requests; pacing and retries follow self.fetch_policy"""
+        timeout = (10, 20)  # (connect_timeout, read_timeout)
+        for validators in (True, False):
+            response = self.fetch_policy.execute(
+                url, lambda: self.session.get(url, headers=self._request_headers(url, validators), timeout=timeout),
+                accept=self._is_complete, max_attempts=max_retries)
+            if response is None:
+                return None
+            content = self._content_from_response(url, response)
+            if content is not None:
+                return content
+            # Cached body vanished after a 304; fetch it again without validators
+        return None
+
+    async def async_get_page_content(self, url, max_retries=None):
+        """get_page_content() over the async transport"""
+        for validators in (True, False):
+            response = await self.fetch_policy.aexecute(
+                url, lambda: self.async_transport.get(url, self._request_headers(url, validators)),
+                accept=self._is_complete, max_attempts=max_retries)
+            if response is None:
+                return None
+            content = self._content_from_response(url, response)
+            if content is not None:
+                return content
+        return None
+
+    def _fresh_from_cache(self, url):
+        if self.page_cache:
+            content = self.page_cache.fresh_body(url)
+            if content is not None:
+                print(f"♻️  Using cached copy of {url}")
+                return content
+        return None
+
+    def _browser_content(self, url):
+        content = self.get_page_content_headless(url)
+        if content and self.page_cache:
+            # The browser can't send validators; the content hash still spots unchanged pages
+            self.page_cache.store(url, content)
+        return content
+
+    @staticmethod
+    def _substantial(content):
+        # Ensure we got substantial content
+        return content if content and len(content.strip()) > 1000 else None
+
+    def fetch_page(self, url):
+        """Fetch a page with the headless browser if available, falling back to requests"""
+        content = self._fresh_from_cache(url)
+        if content is not None:
+            return content
+        content = self._browser_content(url)
+        if not content:
+            content = self.get_page_content(url)
+        return self._substantial(content)
+
+    async def async_fetch_page(self, url):
+        """fetch_page() for the async crawl; the browser pool still runs in threads"""
+        content = self._fresh_from_cache(url)
+        if content is not None:
+            return content
         content = None
-        used_url = None
-        method_used = "requests"
+        if self.browser_pool:
+            content = await asyncio.to_thread(self._browser_content, url)
+        if not content:
+            content = await self.async_get_page_content(url)
+        return self._substantial(content)
+
+    def extract_listings(self, content, url, keywords=CAR_COVER_KEYWORDS):
+        """
+        Parse a search results page into (listings, next page URL or None).
+        With a parse pool, returns a Future of that instead: the page is parsed
+        in a worker process while the caller goes back to fetching.
+        """
+        variant = '|'.join(keywords)
+        cached = self.page_cache.cached_parse(url, content, variant) if self.page_cache else None
+        if cached is not None:
+            return self._page_results(ParsedPage(**cached), url)
+        if self.parse_pool:
+            return self.parse_pool.submit(content, keywords,
+                                          then=lambda page: self._parsed(page, content, url, variant))
+        return self._parsed(self.parser.parse(content, keywords), content, url, variant)
+
+    def _parsed(self, page, content, url, variant):
+        if self.page_cache:
+            self.page_cache.store_parse(url, content, variant, page._asdict())
+        return self._page_results(page, url)
+
+    def _page_results(self, page, url):
+        # If no matching items found, show what we got
+        if not page.item_count:
+            print(f"⚠️  No listings found on {url}")
+        elif not page.listings and page.sample_titles:
+            print(f"📋 No matching items on {url}. Sample titles found:")
+            for i, title in enumerate(page.sample_titles, 1):
+                print(f"   {i}. {title}")
         
-        # Try headless browser first (more reliable for bypassing blocks)
-        if self.driver:
-            print("🌐 Using headless browser for reliable scraping...")
-            for url in search_urls:
-                print(f"Trying URL with headless browser: {url}")
-                content = self.get_page_content_headless(url)
-                if content and len(content.strip()) > 1000:
-                    used_url = url
-                    method_used = "headless browser"
-                    break
-                else:
-                    print(f"URL {url} failed with headless browser")
+        # Follow the page's next link, or guess ?page=N+1 while pages still have listings
+        next_url = None
+        if page.next_href:
+            href = page.next_href
+            next_url = href if href.startswith('http') else self.base_url + '/' + href.lstrip('/')
+        elif page.item_count:
+            next_url = next_page_url(url)
+        return page.listings, next_url
+
+    def scrape_search_results(self, sinks=None):
+        """
+        Scrape search results for every query from OLX, following pagination.
+        Unique listings are streamed to `sinks` (a SinkPipeline) and the listing
+        store as each page is parsed; they are kept in self.results only when
+        keep_results is set.
+        """
+        print(f"🔍 Searching for {', '.join(repr(q) for q in self.queries)} on OLX "
+              f"(up to {self.max_pages} pages each, {self.workers} workers)...")
         
-        # Fallback to requests if headless browser is not available
-        if not content:
-            print("🔄 Headless browser failed, trying requests as fallback...")
-            for url in search_urls:
-                print(f"Trying URL with requests: {url}")
-                content = self.get_page_content(url)
-                if content and len(content.strip()) > 1000:  # Ensure we got substantial content
-                    used_url = url
-                    method_used = "requests"
-                    break
-                else:
-                    print(f"URL {url} failed with requests")
+        engine_class = AsyncCrawlEngine if self.async_transport else CrawlEngine
+        engine = engine_class(
+            fetch=self.async_fetch_page if self.async_transport else self.fetch_page,
+            extract=lambda query, content, url: self.extract_listings(content, url, keywords_for_query(query)),
+            base_url=self.base_url,
+            workers=self.workers,
+            per_host_concurrency=self.per_host_concurrency,
+            per_host_rate=0,  # paced per request attempt by self.fetch_policy instead
+            max_pages=self.max_pages,
+        )
+        run_id = self.listing_store.start_run(self.queries) if self.listing_store else None
+        seen_links = set()
+
+        def on_page(query, page, url, listings):
+            unique = []
+            for listing in listings:
+                # Featured listings repeat across pages; keep the first sighting
+                if listing['link'] != "N/A" and listing['link'] in seen_links:
+                    continue
+                seen_links.add(listing['link'])
+                unique.append(listing)
+            self.result_count += len(unique)
+            if self.keep_results:
+                self.results.extend(unique)
+            if sinks:
+                sinks.write_many(unique)
+            if run_id:
+                self.listing_store.upsert(run_id, query, unique)
+
+        start_time = time.time()
+        if self.async_transport:
+            asyncio.run(self._crawl_async(engine, on_page))
+        else:
+            engine.crawl(self.queries, on_page=on_page, collect=False)
+        elapsed = time.time() - start_time
         
-        if not content:
+        print(f"✅ Fetched {engine.pages_fetched} pages ({engine.pages_failed} failed) in {elapsed:.1f}s, "
+              f"{self.result_count} unique listings")
+        print(f"📶 Fetches: {self.fetch_policy.metrics.summary()}")
+        if self.page_cache:
+            print(f"♻️  Page cache: {self.page_cache.summary()}")
+        if not engine.pages_fetched:
             print("❌ Failed to fetch search results from all URLs using both methods")
+        if run_id:
+            self.finish_store_run(run_id, engine.pages_fetched)
+
+    async def _crawl_async(self, engine, on_page):
+        async with self.async_transport:
+            await engine.crawl_async(self.queries, on_page=on_page, collect=False)
+
+    def finish_store_run(self, run_id, pages_fetched):
+        """Close the listing store run and report what changed since the last one"""
+        if not pages_fetched:
+            # A failed crawl must not make every known listing look gone next time
+            print("⚠️  Nothing fetched, listing store run left unfinished")
             return
-        
-        print(f"✅ Successfully fetched content from: {used_url} using {method_used}")
-        
-        soup = BeautifulSoup(content, 'html.parser')
-        
-        # Look for listing containers - using the actual OLX HTML structure
-        # Try multiple possible selectors based on the provided HTML example
-        listing_selectors = [
-            'li[data-aut-id^="itemBox"]',  # Primary selector based on the HTML example
-            'li[class*="_1DNjI"]',        # Alternative using the class name
-            'div[data-aut-id="itemBox"]', # Fallback for div-based structure
-            'div[data-cy="l-card"]',      # Legacy selector
-            'div[data-testid="adCard"]',  # Another fallback
-            'div[class*="listing"]',      # Generic listing class
-            'div[class*="card"]'          # Generic card class
-        ]
-        
-        listings = []
-        for selector in listing_selectors:
-            listings = soup.select(selector)
-            if listings:
-                print(f"✅ Found {len(listings)} listings using selector: {selector}")
-                break
-        
-        if not listings:
-            # Fallback: look for any div that might contain listing info
-            print("⚠️  No listings found with standard selectors, trying fallback...")
-            # Look for elements containing price patterns
-            price_pattern = re.compile(r'₹|Rs\.|INR')
-            all_divs = soup.find_all('div')
-            for div in all_divs:
-                if price_pattern.search(div.get_text()):
-                    listings.append(div)
-                    if len(listings) >= 20:  # Limit fallback results
-                        break
-        
-        print(f"📊 Processing {len(listings)} listings...")
-        
-        car_cover_count = 0
-        for listing in listings:
-            parsed_data = self.parse_listing(listing)
-            if parsed_data:
-                self.results.append(parsed_data)
-                car_cover_count += 1
-        
-        print(f"✅ Successfully parsed {len(self.results)} car cover listings out of {len(listings)} total listings")
-        
-        # If no car cover items found, try to analyze what we got
-        if not self.results and listings:
-            print("🔍 No car cover items found. Analyzing available listings...")
-            sample_titles = []
-            for listing in listings[:5]:  # Check first 5 listings
-                title_element = listing.find('span', class_='_2poNJ', attrs={'data-aut-id': 'itemTitle'})
-                if title_element:
-                    title = title_element.get_text(strip=True)
-                    sample_titles.append(title)
-            
-            if sample_titles:
-                print("📋 Sample titles found:")
-                for i, title in enumerate(sample_titles, 1):
-                    print(f"   {i}. {title}")
-                print("💡 Tip: The website might not have car cover items, or the search query needs adjustment")
-    
+        store = self.listing_store
+        store.finish_run(run_id, self.queries)
+        summary = store.run_summary(run_id)
+        print(f"🗄️  Listing store {store.path}: {summary['new']} new, {summary['repriced']} repriced, "
+              f"{summary['gone']} gone since the last run")
+
+    def open_sinks(self):
+        """Streaming writers for the configured output formats"""
+        return open_sinks(self.output_prefix, self.formats, search_query=', '.join(self.queries),
+                          search_url=self.search_url, rotate_records=self.rotate_records,
+                          flush_interval=self.flush_interval)
+
     def cleanup(self):
         """Clean up resources"""
-        if self.driver:
-            try:
-                self.driver.quit()
-                print("✅ Headless browser closed successfully")
-            except Exception as e:
-                print(f"⚠️  Error closing headless browser: {e}")
+        if self.listing_store:
+            self.listing_store.close()
+        if self.parse_pool:
+            self.parse_pool.close()
+        if self.browser_pool:
+            self.browser_pool.close()
+            print(f"✅ Headless browsers closed ({self.browser_pool.pages_fetched} pages, "
+                  f"{self.browser_pool.recycled} recycled)")
+
+    def _save(self, sink_class, filename):
+        sink = sink_class(filename, search_query=', '.join(self.queries), search_url=self.search_url)
+        for result in self.results:
+            sink.write(result)
+        sink.close()
+        print(f"💾 Results saved to {filename}")
 
     def save_to_json(self, filename="olx_car_cover_results.json"):
         """Save results to JSON file"""
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump({
-                'search_query': 'Car Cover',
-                'search_url': self.search_url,
-                'total_results': len(self.results),
-                'scraped_at': datetime.now().isoformat(),
-                'results': self.results
-            }, f, indent=2, ensure_ascii=False)
-        print(f"💾 Results saved to {filename}")
+        self._save(JSONSink, filename)
 
     def save_to_csv(self, filename="olx_car_cover_results.csv"):
         """Save results to CSV file"""
         if not self.results:
             print("❌ No results to save")
             return
-        
-        fieldnames = self.results[0].keys()
-        with open(filename, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(self.results)
-        print(f"💾 Results saved to {filename}")
+        self._save(CSVSink, filename)
 
     def save_to_txt(self, filename="olx_car_cover_results.txt"):
         """Save results to human-readable text file"""
-        with open(filename, 'w', encoding='utf-8') as f:
-            f.write("OLX Car Cover Search Results\n")
-            f.write("=" * 50 + "\n\n")
-            f.write(f"Search Query: Car Cover\n")
-            f.write(f"Search URL: {self.search_url}\n")
-            f.write(f"Total Results: {len(self.results)}\n")
-            f.write(f"Scraped At: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-            
-            for i, result in enumerate(self.results, 1):
-                f.write(f"Listing {i}:\n")
-                f.write(f"  Title: {result['title']}\n")
-                f.write(f"  Price: {result['price']}\n")
-                f.write(f"  Location: {result['location']}\n")
-                f.write(f"  Link: {result['link']}\n")
-                f.write(f"  Posted: {result['posted_date']}\n")
-                f.write("-" * 30 + "\n\n")
-        
-        print(f"💾 Results saved to {filename}")
-
-
-
-
+        self._save(TextSink, filename)
 
     def run(self):
         """Main execution method"""
@@ -414,17 +384,14 @@ class OLXCarCoverScraper:
         print("=" * 30)
         
         try:
-            self.scrape_search_results()
+            # Results are written while the crawl runs; closing the sinks finalizes the files
+            with self.open_sinks() as sinks:
+                self.scrape_search_results(sinks)
             
-            if self.results:
-                # Save in multiple formats
-                self.save_to_json()
-                self.save_to_csv()
-                self.save_to_txt()
-                
+            if self.result_count:
                 print(f"\n📈 Summary:")
-                print(f"   Total car cover listings found: {len(self.results)}")
-                print(f"   Files created: olx_car_cover_results.json, olx_car_cover_results.csv, olx_car_cover_results.txt")
+                print(f"   Total car cover listings found: {self.result_count}")
+                print(f"   Files created: {', '.join(sinks.files)}")
             else:
                 print("❌ No car cover listings found.")
                 print("   This could be due to:")
@@ -437,5 +404,83 @@ class OLXCarCoverScraper:
             self.cleanup()
 
 if __name__ == "__main__":
-    scraper = OLXCarCoverScraper()
+    parser = argparse.ArgumentParser(description="Scrape OLX search results")
+    parser.add_argument("--queries", default="car cover",
+                        help="comma-separated search queries (default: car cover)")
+    parser.add_argument("--max-pages", type=int, default=5, help="result pages to follow per query")
+    parser.add_argument("--workers", type=int, default=8, help="concurrent page fetches")
+    parser.add_argument("--per-host", type=int, default=4, help="max concurrent requests per host")
+    parser.add_argument("--rate", type=float, default=2.0, help="max requests per second per host (0 = no limit)")
+    parser.add_argument("--base-url", default="https://www.olx.in", help="site to search (default: https://www.olx.in)")
+    parser.add_argument("--no-browser", action="store_true", help="fetch with requests only, no headless Chrome")
+    parser.add_argument("--browsers", type=int, default=2, help="headless browsers in the pool")
+    parser.add_argument("--browser-max-pages", type=int, default=50, help="pages before a browser is recycled")
+    parser.add_argument("--parser", choices=sorted(PARSERS), default=DEFAULT_PARSER,
+                        help=f"HTML parser backend (default: {DEFAULT_PARSER})")
+    parser.add_argument("--parse-workers", type=int, default=0,
+                        help="parse pages in this many worker processes (default: 0, parse on the fetch workers)")
+    parser.add_argument("--parse-queue", type=int,
+                        help="fetched pages that may wait for a parse worker (default: 2 per worker)")
+    parser.add_argument("--cache-dir", help="on-disk page cache for incremental re-runs (default: off)")
+    parser.add_argument("--cache-ttl", type=float, default=120,
+                        help="seconds a cached page is reused without revalidating (default: 120)")
+    parser.add_argument("--cache-max-mb", type=float, default=200, help="page cache size limit in MB")
+    parser.add_argument("--db", help="SQLite listing store tracking new/repriced/gone listings (default: off)")
+    parser.add_argument("--output", default="olx_car_cover_results", help="output file prefix")
+    parser.add_argument("--formats", default="json,csv,txt",
+                        help=f"comma-separated output formats: {', '.join(SINKS)} (default: json,csv,txt)")
+    parser.add_argument("--rotate-records", type=int, default=0,
+                        help="start a new numbered file every N results (default: one file per format)")
+    parser.add_argument("--flush-interval", type=float, default=5.0, help="seconds between output flushes")
+    parser.add_argument("--max-attempts", type=int, default=4, help="request attempts per page")
+    parser.add_argument("--burst", type=int, default=2, help="requests a host may receive back to back")
+    parser.add_argument("--breaker-threshold", type=int, default=3,
+                        help="consecutive 403/429 answers before requests to a host are stopped")
+    parser.add_argument("--breaker-cooldown", type=float, default=60.0,
+                        help="seconds before a blocked host is probed again")
+    parser.add_argument("--transport", choices=["sync", "async"], default="sync",
+                        help="requests with worker threads, or aiohttp/httpx on an asyncio event loop")
+    parser.add_argument("--max-connections", type=int, default=100,
+                        help="connection pool size for the async transport")
+    parser.add_argument("--http2", action="store_true", help="negotiate HTTP/2 with the async transport")
+    parser.add_argument("--fetch-metrics", help="write per-URL attempts, statuses and latencies to this JSON file")
+    args = parser.parse_args()
+    
+    scraper = OLXCarCoverScraper(
+        queries=[q.strip() for q in args.queries.split(',') if q.strip()],
+        max_pages=args.max_pages,
+        workers=args.workers,
+        per_host_concurrency=args.per_host,
+        per_host_rate=args.rate,
+        base_url=args.base_url,
+        use_browser=not args.no_browser,
+        browsers=args.browsers,
+        browser_max_pages=args.browser_max_pages,
+        parser=args.parser,
+        parse_workers=args.parse_workers,
+        parse_queue=args.parse_queue,
+        cache_dir=args.cache_dir,
+        cache_ttl=args.cache_ttl,
+        cache_max_mb=args.cache_max_mb,
+        db_path=args.db,
+        output_prefix=args.output,
+        formats=[f.strip() for f in args.formats.split(',') if f.strip()],
+        rotate_records=args.rotate_records,
+        flush_interval=args.flush_interval,
+        keep_results=False,  # everything is streamed to the output files
+        transport=args.transport,
+        max_connections=args.max_connections,
+        http2=args.http2,
+        fetch_policy=FetchPolicy(
+            rate=args.rate,
+            burst=args.burst,
+            max_attempts=args.max_attempts,
+            breaker_threshold=args.breaker_threshold,
+            breaker_cooldown=args.breaker_cooldown,
+        ),
+    )
     scraper.run()
+    if args.fetch_metrics:
+        with open(args.fetch_metrics, 'w', encoding='utf-8') as f:
+            json.dump(scraper.fetch_policy.metrics.to_dict(), f, indent=2)
+        print(f"💾 Fetch metrics saved to {args.fetch_metrics}")
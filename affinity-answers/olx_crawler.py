@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+OLX Crawl Engine
+Fetches search result pages for many queries concurrently and follows
+pagination, with a bounded worker pool (threads, or tasks on an event loop
+for coroutine fetchers) and per-host concurrency/rate limits. Parsing can be
+handed off to another stage (see olx_parse_pool.py) so fetch workers don't
+wait for it
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import asynccontextmanager, contextmanager
+from urllib.parse import parse_qs, urlencode, urlsplit, urlunsplit
+
+# Search URL layouts to try for page 1 of a query, in order
+SEARCH_URL_TEMPLATES = [
+    "{base}/items/q-{slug}",
+    "{base}/search?q={plus}",
+]
+
+
+def search_urls(base_url, query):
+    """Candidate page-1 URLs for a search query"""
+    words = query.lower().split()
+    return [template.format(base=base_url, slug="-".join(words), plus="+".join(words))
+            for template in SEARCH_URL_TEMPLATES]
+
+
+def next_page_url(url):
+    """`url` with its `page` query parameter incremented (page 1 when absent)"""
+    parts = urlsplit(url)
+    params = parse_qs(parts.query)
+    page = int(params.get("page", ["1"])[0])
+    params["page"] = [str(page + 1)]
+    return urlunsplit(parts._replace(query=urlencode(params, doseq=True)))
+
+
+class HostLimiter:
+    """Caps concurrent requests per host and spaces them at least 1/rate apart"""
+
+    def __init__(self, max_concurrency=4, rate=2.0):
+        self.max_concurrency = max_concurrency
+        self.rate = rate
+        self._lock = threading.Lock()
+        self._semaphores = {}
+        self._next_slot = {}
+
+    @contextmanager
+    def slot(self, url):
+        host = urlsplit(url).netloc
+        with self._lock:
+            semaphore = self._semaphores.setdefault(host, threading.BoundedSemaphore(self.max_concurrency))
+        with semaphore:
+            if self.rate:
+                with self._lock:
+                    now = time.monotonic()
+                    start = max(now, self._next_slot.get(host, now))
+                    self._next_slot[host] = start + 1 / self.rate
+                if start > now:
+                    time.sleep(start - now)
+            yield
+
+
+class CrawlEngine:
+    """
+    Crawls queries page by page. `fetch(url)` returns HTML or None and
+    `extract(query, html, url)` returns (listings, next page URL or None), or
+    a concurrent.futures.Future of that when parsing happens elsewhere; the
+    fetch worker is then free as soon as extract returns. Pages of different
+    queries are fetched concurrently; each query follows its own pagination
+    until there is no next page, a page fails, a page brings no listing links
+    not already seen for the query, or `max_pages` is reached.
+    """
+
+    def __init__(self, fetch, extract, base_url, workers=8, per_host_concurrency=4,
+                 per_host_rate=2.0, max_pages=5):
+        self.fetch = fetch
+        self.extract = extract
+        self.base_url = base_url
+        self.workers = workers
+        self.max_pages = max_pages
+        self.limiter = HostLimiter(per_host_concurrency, per_host_rate)
+        self.pages_fetched = 0
+        self.pages_failed = 0
+
+    def _fetch_page(self, urls):
+        """Fetch the first of `urls` that returns content"""
+        for url in urls:
+            with self.limiter.slot(url):
+                content = self.fetch(url)
+            if content:
+                return url, content
+        return None, None
+
+    def _crawl_page(self, query, page, urls):
+        url, content = self._fetch_page(urls)
+        if not content:
+            print(f"❌ {query!r} page {page}: no content from {', '.join(urls)}")
+            return query, page, None, None
+        return query, page, url, self.extract(query, content, url)
+
+    def _page_done(self, query, page, url, extracted, results, seen_links, on_page, collect):
+        """Record a finished page; returns the next page to crawl as (query, page, urls) or None"""
+        if url is None:
+            self.pages_failed += 1
+            return None
+        listings, next_url = extracted
+        print(f"📄 {query!r} page {page}: {len(listings)} listings from {url}")
+        self.pages_fetched += 1
+        if collect:
+            results[query].extend(listings)
+        if on_page:
+            on_page(query, page, url, listings)
+        links = {listing.get("link") for listing in listings}
+        if listings and links <= seen_links[query]:
+            return None  # the site ignored the page number and served a page we have
+        seen_links[query] |= links
+        if next_url and page < self.max_pages:
+            return query, page + 1, [next_url]
+        return None
+
+    def crawl(self, queries, on_page=None, collect=True):
+        """
+        Crawl every query and return {query: [listings]}. `on_page(query, page,
+        url, listings)` is called from this thread as each page completes; with
+        collect=False listings are only passed to on_page, not kept.
+        """
+        results = {query: [] for query in queries}
+        seen_links = {query: set() for query in queries}
+        parsing = {}  # Futures returned by extract -> (query, page, url)
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="olx-fetch") as pool:
+            pending = {pool.submit(self._crawl_page, query, 1, search_urls(self.base_url, query))
+                       for query in queries}
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future in parsing:
+                        query, page, url = parsing.pop(future)
+                        extracted = future.result()
+                    else:
+                        query, page, url, extracted = future.result()
+                        if isinstance(extracted, Future):
+                            parsing[extracted] = query, page, url
+                            pending.add(extracted)
+                            continue
+                    following = self._page_done(query, page, url, extracted, results, seen_links, on_page, collect)
+                    if following:
+                        pending.add(pool.submit(self._crawl_page, *following))
+        return results
+
+
+class AsyncHostLimiter:
+    """HostLimiter for coroutines: per-host asyncio semaphores and request spacing"""
+
+    def __init__(self, max_concurrency=4, rate=2.0):
+        self.max_concurrency = max_concurrency
+        self.rate = rate
+        self._semaphores = {}
+        self._next_slot = {}
+
+    @asynccontextmanager
+    async def slot(self, url):
+        host = urlsplit(url).netloc
+        semaphore = self._semaphores.setdefault(host, asyncio.Semaphore(self.max_concurrency))
+        async with semaphore:
+            if self.rate:
+                now = time.monotonic()
+                start = max(now, self._next_slot.get(host, now))
+                self._next_slot[host] = start + 1 / self.rate
+                if start > now:
+                    await asyncio.sleep(start - now)
+            yield
+
+
+class AsyncCrawlEngine(CrawlEngine):
+    """
+    CrawlEngine for a coroutine `fetch(url)`: pages are tasks on one event
+    loop rather than threads, so `workers` (the cap on pages in flight) can
+    be in the thousands. `extract` runs in a thread so parsing doesn't stall
+    the loop; a Future it returns is awaited without holding a worker slot.
+    """
+
+    def __init__(self, fetch, extract, base_url, workers=8, per_host_concurrency=4,
+                 per_host_rate=2.0, max_pages=5):
+        super().__init__(fetch, extract, base_url, workers, per_host_concurrency, per_host_rate, max_pages)
+        self.limiter = AsyncHostLimiter(per_host_concurrency, per_host_rate)
+
+    async def _fetch_page(self, urls):
+        for url in urls:
+            async with self.limiter.slot(url):
+                content = await self.fetch(url)
+            if content:
+                return url, content
+        return None, None
+
+    async def _crawl_page(self, query, page, urls):
+        async with self._workers:
+            url, content = await self._fetch_page(urls)
+        if not content:
+            print(f"❌ {query!r} page {page}: no content from {', '.join(urls)}")
+            return query, page, None, None
+        extracted = await asyncio.to_thread(self.extract, query, content, url)
+        if isinstance(extracted, Future):
+            extracted = await asyncio.wrap_future(extracted)
+        return query, page, url, extracted
+
+    async def crawl_async(self, queries, on_page=None, collect=True):
+        """crawl() as a coroutine, for callers already running an event loop"""
+        self._workers = asyncio.Semaphore(self.workers)
+        results = {query: [] for query in queries}
+        seen_links = {query: set() for query in queries}
+        pending = {asyncio.ensure_future(self._crawl_page(query, 1, search_urls(self.base_url, query)))
+                   for query in queries}
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                following = self._page_done(*task.result(), results, seen_links, on_page, collect)
+                if following:
+                    pending.add(asyncio.ensure_future(self._crawl_page(*following)))
+        return results
+
+    def crawl(self, queries, on_page=None, collect=True):
+        return asyncio.run(self.crawl_async(queries, on_page, collect))
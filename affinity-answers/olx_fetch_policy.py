@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+OLX Fetch Policy
+Decides how requests to a host are paced and retried:
+
+  - a token bucket per host (every attempt, retries included, takes a token)
+  - jittered exponential backoff, or the server's Retry-After when it sends one
+  - a circuit breaker per host that opens after consecutive 403/429 answers,
+    failing fast until a cooldown has passed and a probe request succeeds
+  - per-URL metrics: attempts, statuses and latency
+"""
+
+import asyncio
+import random
+import statistics
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import requests
+
+BLOCKED_STATUSES = (403, 429)      # the host is pushing back: counts towards the breaker
+RETRYABLE_STATUSES = (408, 429, 500, 502, 503, 504)
+
+
+def retry_after_seconds(value):
+    """Seconds from a Retry-After header (delta-seconds or HTTP date), or None"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """`rate` tokens per second, up to `burst` saved; acquire() blocks until a token is free"""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """Take a token; returns the seconds to wait before using it"""
+        if not self.rate:
+            return 0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # Take the token now, even if that goes negative: later callers queue behind it
+            self._tokens -= 1
+            return -self._tokens / self.rate if self._tokens < 0 else 0
+
+    def acquire(self):
+        wait = self.reserve()
+        if wait:
+            time.sleep(wait)
+
+
+class CircuitBreaker:
+    """Opens after `threshold` consecutive blocked answers; one probe is let through per cooldown"""
+
+    def __init__(self, threshold=3, cooldown=60.0):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.trips = 0
+        self._blocked = 0
+        self._opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self):
+        return self._opened_at is not None
+
+    def allow(self):
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._probing or time.monotonic() - self._opened_at < self.cooldown:
+                return False
+            self._probing = True  # half-open: this caller probes the host
+            return True
+
+    def release(self):
+        """End a probe that says nothing about blocking (e.g. a connection error)"""
+        with self._lock:
+            self._probing = False
+
+    def record(self, blocked):
+        with self._lock:
+            self._probing = False
+            if not blocked:
+                self._blocked = 0
+                self._opened_at = None
+                return
+            self._blocked += 1
+            if self._opened_at is not None or self._blocked >= self.threshold:
+                if self._opened_at is None:
+                    self.trips += 1
+                self._opened_at = time.monotonic()
+
+
+class FetchMetrics:
+    """Attempts, statuses and latency per URL"""
+
+    def __init__(self):
+        self.urls = {}
+        self._lock = threading.Lock()
+
+    def _entry(self, url):
+        return self.urls.setdefault(url, {'attempts': 0, 'statuses': [], 'latencies': [], 'outcome': None})
+
+    def record_attempt(self, url, status, latency):
+        with self._lock:
+            entry = self._entry(url)
+            entry['attempts'] += 1
+            entry['statuses'].append(status)
+            entry['latencies'].append(round(latency, 4))
+
+    def record_outcome(self, url, outcome):
+        with self._lock:
+            self._entry(url)['outcome'] = outcome
+
+    def summary(self):
+        with self._lock:
+            entries = list(self.urls.values())
+        attempts = sum(entry['attempts'] for entry in entries)
+        latencies = sorted(latency for entry in entries for latency in entry['latencies'])
+        outcomes = {}
+        for entry in entries:
+            outcomes[entry['outcome']] = outcomes.get(entry['outcome'], 0) + 1
+        text = f"{attempts} requests for {len(entries)} URLs ({attempts - len(entries)} retries)"
+        if latencies:
+            p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+            text += f", latency median {statistics.median(latencies) * 1000:.0f}ms p95 {p95 * 1000:.0f}ms"
+        return text + ", " + ", ".join(f"{count} {outcome}" for outcome, count in sorted(outcomes.items(), key=str))
+
+    def to_dict(self):
+        with self._lock:
+            return {url: dict(entry) for url, entry in self.urls.items()}
+
+
+class FetchPolicy:
+    """
+    Runs request attempts for a URL under per-host rate limiting, backoff
+    and circuit breaking. `execute(url, attempt)` calls `attempt()` (which
+    returns a requests.Response or raises requests exceptions) until it gets
+    an acceptable response, a non-retryable one, or runs out of attempts.
+    aexecute() is the same for coroutine attempts on an event loop.
+    """
+
+    def __init__(self, rate=2.0, burst=2, max_attempts=4, backoff_base=0.5, backoff_cap=20.0,
+                 max_retry_after=60.0, breaker_threshold=3, breaker_cooldown=60.0):
+        self.rate = rate
+        self.burst = burst
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.max_retry_after = max_retry_after
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+        self.metrics = FetchMetrics()
+        self._buckets = {}
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    def _host_state(self, url):
+        host = urlsplit(url).netloc
+        with self._lock:
+            if host not in self._buckets:
+                self._buckets[host] = TokenBucket(self.rate, self.burst)
+                self._breakers[host] = CircuitBreaker(self.breaker_threshold, self.breaker_cooldown)
+            return self._buckets[host], self._breakers[host]
+
+    def breaker(self, url):
+        return self._host_state(url)[1]
+
+    def backoff(self, attempt, retry_after=None):
+        """Delay before retry number `attempt` (1-based): full jitter, or Retry-After if sent"""
+        if retry_after is not None:
+            return min(retry_after, self.max_retry_after)
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+
+    def _reserve(self, url):
+        """Seconds to wait for a request slot for `url`, or None if the host's breaker is open"""
+        bucket, breaker = self._host_state(url)
+        if not breaker.allow():
+            return None
+        return bucket.reserve()
+
+    def gate(self, url):
+        """Wait for a request slot for `url`; False if the host's breaker is open"""
+        wait = self._reserve(url)
+        if wait:
+            try:
+                time.sleep(wait)
+            except BaseException:
+                self.breaker(url).release()
+                raise
+        return wait is not None
+
+    async def agate(self, url):
+        wait = self._reserve(url)
+        if wait:
+            try:
+                await asyncio.sleep(wait)
+            except BaseException:  # e.g. the crawl task was cancelled while it waited
+                self.breaker(url).release()
+                raise
+        return wait is not None
+
+    def _circuit_open(self, url):
+        print(f"⛔ {urlsplit(url).netloc} is blocking requests, skipping {url}")
+        self.metrics.record_outcome(url, 'circuit open')
+
+    def _assess(self, url, number, max_attempts, started, response, error, accept):
+        """
+        Record attempt `number` and decide what follows: (True, response or
+        None) when done, (False, seconds to wait) when it should be retried.
+        """
+        retry_after = None
+        if error is not None:
+            self.metrics.record_attempt(url, type(error).__name__, time.monotonic() - started)
+            self.breaker(url).release()
+            reason = f"{type(error).__name__}: {error}"
+        else:
+            status = response.status_code
+            self.metrics.record_attempt(url, status, time.monotonic() - started)
+            self.breaker(url).record(blocked=status in BLOCKED_STATUSES)
+            if status < 400:
+                if accept is None or accept(response):
+                    self.metrics.record_outcome(url, 'ok')
+                    return True, response
+                reason = f"incomplete response ({len(response.content)} bytes)"
+            elif status in BLOCKED_STATUSES or status in RETRYABLE_STATUSES:
+                reason = f"HTTP {status}"
+                retry_after = retry_after_seconds(response.headers.get('Retry-After'))
+            else:
+                # Missing page (e.g. past the last result page): retrying won't help
+                print(f"Request error: HTTP {status} for {url}")
+                self.metrics.record_outcome(url, f'HTTP {status}')
+                return True, None
+
+        if number == max_attempts:
+            print(f"Failed to fetch {url} after {max_attempts} attempts ({reason})")
+            self.metrics.record_outcome(url, 'gave up')
+            return True, None
+        delay = self.backoff(number, retry_after)
+        print(f"⏳ {reason} for {url}, retrying in {delay:.1f}s (attempt {number + 1}/{max_attempts})")
+        return False, delay
+
+    def execute(self, url, attempt, accept=None, max_attempts=None):
+        """
+        Response from `attempt()` for `url`, or None. `accept(response)` can
+        reject a 2xx/3xx response (e.g. a truncated page) so it is retried.
+        """
+        max_attempts = max_attempts or self.max_attempts
+        for number in range(1, max_attempts + 1):
+            if not self.gate(url):
+                return self._circuit_open(url)
+            started = time.monotonic()
+            try:
+                response, error = attempt(), None
+            except requests.RequestException as e:
+                response, error = None, e
+            except BaseException:
+                # Anything else ends the fetch; a half-open probe must not stay held
+                self.breaker(url).release()
+                raise
+            done, value = self._assess(url, number, max_attempts, started, response, error, accept)
+            if done:
+                return value
+            time.sleep(value)
+
+    async def aexecute(self, url, attempt, accept=None, max_attempts=None):
+        """execute() for an `attempt` returning an awaitable"""
+        max_attempts = max_attempts or self.max_attempts
+        for number in range(1, max_attempts + 1):
+            if not await self.agate(url):
+                return self._circuit_open(url)
+            started = time.monotonic()
+            try:
+                response, error = await attempt(), None
+            except requests.RequestException as e:
+                response, error = None, e
+            except BaseException:
+                # Anything else (e.g. asyncio.CancelledError) ends the fetch; a half-open probe must not stay held
+                self.breaker(url).release()
+                raise
+            done, value = self._assess(url, number, max_attempts, started, response, error, accept)
+            if done:
+                return value
+            await asyncio.sleep(value)
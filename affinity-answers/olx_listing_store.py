@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+OLX Listing Store
+SQLite database of every listing the scraper has seen, keyed by normalized
+link, with first/last-seen times, price history and the run in which a
+listing went away. A run only writes deltas: new listings are inserted,
+changed ones updated, vanished ones marked gone, and unchanged listings are
+not touched at all (their last sighting is the last run of their query).
+"New since the last run" and friends are single indexed queries
+"""
+
+import re
+import sqlite3
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    queries TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    finished_at REAL
+);
+-- Last finished run per query: the last sighting of every live listing of that query
+CREATE TABLE IF NOT EXISTS queries (
+    query TEXT PRIMARY KEY,
+    last_run INTEGER NOT NULL,
+    last_seen REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS listings (
+    id INTEGER PRIMARY KEY,
+    link TEXT NOT NULL UNIQUE,
+    query TEXT NOT NULL,
+    title TEXT,
+    price INTEGER,
+    price_text TEXT,
+    location TEXT,
+    image_url TEXT,
+    posted_date TEXT,
+    first_seen REAL NOT NULL,
+    first_run INTEGER NOT NULL,
+    last_seen REAL,          -- only set once the listing is gone
+    last_run INTEGER,
+    gone_run INTEGER         -- NULL while the listing is live
+);
+CREATE TABLE IF NOT EXISTS price_history (
+    listing_id INTEGER NOT NULL,
+    run_id INTEGER NOT NULL,
+    price INTEGER,
+    price_text TEXT
+);
+CREATE INDEX IF NOT EXISTS listings_query ON listings (query, gone_run);
+CREATE INDEX IF NOT EXISTS listings_gone_run ON listings (gone_run);
+CREATE INDEX IF NOT EXISTS listings_location ON listings (location, price);
+CREATE INDEX IF NOT EXISTS listings_price ON listings (price);
+CREATE INDEX IF NOT EXISTS listings_first_run ON listings (first_run);
+CREATE INDEX IF NOT EXISTS listings_first_seen ON listings (first_seen);
+CREATE INDEX IF NOT EXISTS price_history_listing ON price_history (listing_id, run_id);
+CREATE INDEX IF NOT EXISTS price_history_run ON price_history (run_id);
+
+CREATE TRIGGER IF NOT EXISTS listing_first_price AFTER INSERT ON listings
+BEGIN
+    INSERT INTO price_history VALUES (new.id, new.first_run, new.price, new.price_text);
+END;
+
+-- Effective last sighting: live listings were seen in the last run of their query
+CREATE VIEW IF NOT EXISTS listing_status AS
+SELECT l.*,
+       CASE WHEN l.gone_run IS NULL THEN q.last_seen ELSE l.last_seen END AS seen_at,
+       CASE WHEN l.gone_run IS NULL THEN q.last_run ELSE l.last_run END AS seen_run
+FROM listings l LEFT JOIN queries q ON q.query = l.query;
+"""
+
+FIELDS = ('title', 'price_text', 'location', 'image_url', 'posted_date')
+LOOKUP_CHUNK = 500  # links per IN (...) lookup, below SQLite's variable limit
+PRICE_NUMBER = re.compile(r'\d[\d,]*')
+
+
+def normalize_link(link):
+    """Listing key: scheme/host lower-cased, query, fragment and trailing slash dropped"""
+    # Plain string splitting: urlsplit dominated upserts of large batches
+    link = link.strip().split('#', 1)[0].split('?', 1)[0].rstrip('/')
+    scheme, sep, rest = link.partition('://')
+    if not sep:
+        return link
+    host, slash, path = rest.partition('/')
+    return f"{scheme.lower()}://{host.lower()}{slash}{path}"
+
+
+def parse_price(price_text):
+    """'₹ 1,200' -> 1200; None when the text holds no number"""
+    match = PRICE_NUMBER.search(price_text or '')
+    return int(match.group().replace(',', '')) if match else None
+
+
+class ListingStore:
+    def __init__(self, path="olx_listings.db"):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self._runs = {}  # run id -> (started_at, ids of earlier runs' listings seen so far)
+
+    def start_run(self, queries):
+        started_at = time.time()
+        with self.conn:
+            cursor = self.conn.execute("INSERT INTO runs (queries, started_at) VALUES (?, ?)",
+                                       (', '.join(queries), started_at))
+        self._runs[cursor.lastrowid] = (started_at, set())
+        return cursor.lastrowid
+
+    def upsert(self, run_id, query, listings):
+        """Write the new and changed listings among `listings`; returns how many rows were written"""
+        started_at, seen = self._runs[run_id]
+        batch = {}
+        for listing in listings:
+            if listing.get('link', "N/A") != "N/A":  # nothing stable to key on otherwise
+                batch.setdefault(normalize_link(listing['link']), listing)
+
+        existing = {}
+        links = list(batch)
+        for i in range(0, len(links), LOOKUP_CHUNK):
+            chunk = links[i:i + LOOKUP_CHUNK]
+            rows = self.conn.execute(
+                f"SELECT id, link, gone_run, {', '.join(FIELDS)} FROM listings "
+                f"WHERE link IN ({', '.join('?' * len(chunk))})", chunk)
+            for row in rows:
+                existing[row['link']] = row
+
+        inserts, updates, repriced, returned = [], [], [], []
+        for link, listing in batch.items():
+            values = [listing.get(field if field != 'price_text' else 'price') for field in FIELDS]
+            row = existing.get(link)
+            if row is None:
+                inserts.append((link, query, *values, parse_price(values[1]), started_at, run_id))
+                continue
+            seen.add(row['id'])
+            if row['gone_run'] is not None:
+                returned.append((row['id'],))
+            if [row[field] for field in FIELDS] != values:
+                updates.append((*values, parse_price(values[1]), row['id']))
+                if row['price_text'] != values[1]:
+                    repriced.append((row['id'], run_id, parse_price(values[1]), values[1]))
+
+        with self.conn:
+            if inserts:
+                self.conn.executemany(
+                    f"INSERT INTO listings (link, query, {', '.join(FIELDS)}, price, first_seen, first_run) "
+                    f"VALUES ({', '.join('?' * (len(FIELDS) + 5))})", inserts)
+            self.conn.executemany(
+                f"UPDATE listings SET {', '.join(f'{field} = ?' for field in FIELDS)}, price = ? WHERE id = ?",
+                updates)
+            self.conn.executemany("INSERT INTO price_history VALUES (?, ?, ?, ?)", repriced)
+            self.conn.executemany(
+                "UPDATE listings SET gone_run = NULL, last_seen = NULL, last_run = NULL WHERE id = ?", returned)
+        return len(inserts) + len(updates) + len(returned)
+
+    def finish_run(self, run_id, queries):
+        """Mark listings of `queries` not seen in this run as gone, then close the run"""
+        started_at, seen = self._runs.pop(run_id)
+        with self.conn:
+            for query in queries:
+                previous = self.conn.execute("SELECT last_run, last_seen FROM queries WHERE query = ?",
+                                             (query,)).fetchone()
+                if previous is not None:
+                    live = self.conn.execute(
+                        "SELECT id FROM listings WHERE query = ? AND gone_run IS NULL AND first_run < ?",
+                        (query, run_id))
+                    gone = [(run_id, previous['last_seen'], previous['last_run'], row[0])
+                            for row in live if row[0] not in seen]
+                    self.conn.executemany(
+                        "UPDATE listings SET gone_run = ?, last_seen = ?, last_run = ? WHERE id = ?", gone)
+                self.conn.execute("INSERT INTO queries VALUES (?, ?, ?) ON CONFLICT (query) DO UPDATE SET "
+                                  "last_run = excluded.last_run, last_seen = excluded.last_seen",
+                                  (query, run_id, started_at))
+            self.conn.execute("UPDATE runs SET finished_at = ? WHERE id = ?", (time.time(), run_id))
+
+    def new_listings(self, run_id):
+        """Listings first seen in `run_id`"""
+        return self.conn.execute("SELECT * FROM listings WHERE first_run = ?", (run_id,)).fetchall()
+
+    def new_since(self, timestamp):
+        """Listings first seen at or after a Unix timestamp"""
+        return self.conn.execute("SELECT * FROM listings WHERE first_seen >= ? ORDER BY first_seen",
+                                 (timestamp,)).fetchall()
+
+    def repriced(self, run_id):
+        """Listings whose price changed in `run_id`, with the previous price as old_price_text"""
+        return self.conn.execute("""
+            SELECT l.*, (SELECT h.price_text FROM price_history h
+                         WHERE h.listing_id = l.id AND h.run_id < p.run_id
+                         ORDER BY h.run_id DESC LIMIT 1) AS old_price_text
+            FROM price_history p JOIN listings l ON l.id = p.listing_id
+            WHERE p.run_id = ? AND l.first_run < p.run_id""", (run_id,)).fetchall()
+
+    def gone(self, run_id):
+        """Listings that disappeared in `run_id`"""
+        return self.conn.execute("SELECT * FROM listings WHERE gone_run = ?", (run_id,)).fetchall()
+
+    def search(self, query=None, location=None, min_price=None, max_price=None, include_gone=False, limit=100):
+        """Newest listings matching the given filters, with their last sighting as seen_at"""
+        clauses, params = [], []
+        for clause, value in (("query = ?", query), ("location = ?", location),
+                              ("price >= ?", min_price), ("price <= ?", max_price)):
+            if value is not None:
+                clauses.append(clause)
+                params.append(value)
+        if not include_gone:
+            clauses.append("gone_run IS NULL")
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        return self.conn.execute(f"SELECT * FROM listing_status {where} ORDER BY first_seen DESC LIMIT ?",
+                                 (*params, limit)).fetchall()
+
+    def price_history(self, link):
+        return self.conn.execute("""
+            SELECT h.run_id, r.started_at AS seen_at, h.price, h.price_text
+            FROM price_history h JOIN listings l ON l.id = h.listing_id JOIN runs r ON r.id = h.run_id
+            WHERE l.link = ? ORDER BY h.run_id""", (normalize_link(link),)).fetchall()
+
+    def run_summary(self, run_id):
+        def count(sql):
+            return self.conn.execute(sql, (run_id,)).fetchone()[0]
+
+        return {
+            'new': count("SELECT count(*) FROM listings WHERE first_run = ?"),
+            'repriced': count("SELECT count(*) FROM price_history p JOIN listings l ON l.id = p.listing_id "
+                              "WHERE p.run_id = ? AND l.first_run < p.run_id"),
+            'gone': count("SELECT count(*) FROM listings WHERE gone_run = ?"),
+        }
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+OLX Page Cache
+On-disk HTTP cache for search result pages, keyed by URL. Each entry keeps
+the body, its ETag/Last-Modified validators and a content hash, plus the
+listings parsed from it per query, so that a re-run can:
+
+  - reuse a page younger than `ttl` seconds without any request
+  - revalidate older pages with a conditional GET (304 = reuse the body)
+  - skip parsing whenever the body hash matches the one already parsed
+
+The cache is bounded to `max_bytes` of bodies; least recently used entries
+are evicted first
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+
+def content_hash(content):
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+def _atomic_write(path, data):
+    tmp_path = f"{path}.tmp.{os.getpid()}.{threading.get_ident()}"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+class PageCache:
+    def __init__(self, directory, ttl=120, max_bytes=200 * 1024 * 1024):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.stats = {'fresh': 0, 'not_modified': 0, 'unchanged': 0, 'changed': 0, 'new': 0,
+                      'parse_skipped': 0, 'evicted': 0}
+        self._lock = threading.Lock()
+        self._entries = {}
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+
+    def _key(self, url):
+        return hashlib.sha256(url.encode('utf-8')).hexdigest()[:32]
+
+    def _paths(self, key):
+        base = os.path.join(self.directory, key)
+        return base + '.html', base + '.json'
+
+    def _load(self):
+        for name in os.listdir(self.directory):
+            if not name.endswith('.json'):
+                continue
+            body_path, meta_path = self._paths(name[:-len('.json')])
+            try:
+                with open(meta_path, encoding='utf-8') as f:
+                    meta = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if os.path.exists(body_path):
+                self._entries[meta['url']] = meta
+
+    @staticmethod
+    def _snapshot(meta):
+        """Copy of an entry to write out once the lock is released (other threads keep changing it)"""
+        return dict(meta, parsed=dict(meta['parsed']))
+
+    def _save_meta(self, meta):
+        _atomic_write(self._paths(self._key(meta['url']))[1], json.dumps(meta, ensure_ascii=False))
+
+    def _count(self, stat):
+        with self._lock:
+            self.stats[stat] += 1
+
+    def fresh_body(self, url):
+        """Cached body if it was fetched or revalidated less than `ttl` seconds ago"""
+        with self._lock:
+            meta = self._entries.get(url)
+            if not meta or time.time() - meta['validated_at'] >= self.ttl:
+                return None
+        body = self._read_body(url)
+        if body is not None:
+            self._touch(url)
+            self._count('fresh')
+        return body
+
+    def conditional_headers(self, url):
+        """If-None-Match / If-Modified-Since for revalidating the cached copy"""
+        with self._lock:
+            meta = self._entries.get(url)
+        headers = {}
+        if meta:
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+        return headers
+
+    def not_modified(self, url):
+        """Handle a 304: mark the entry revalidated and return its body"""
+        body = self._read_body(url)
+        if body is None:
+            return None
+        with self._lock:
+            meta = self._entries.get(url)
+            if meta is None:  # evicted or replaced since the body was read
+                return None
+            meta['validated_at'] = meta['accessed_at'] = time.time()
+            self.stats['not_modified'] += 1
+            snapshot = self._snapshot(meta)
+        self._save_meta(snapshot)
+        return body
+
+    def store(self, url, body, etag=None, last_modified=None):
+        """Record a fetched page; parses cached for an identical body are kept"""
+        digest = content_hash(body)
+        now = time.time()
+        with self._lock:
+            old = self._entries.get(url)
+            parsed = old['parsed'] if old and old['hash'] == digest else {}
+            self.stats['new' if not old else 'unchanged' if old['hash'] == digest else 'changed'] += 1
+            meta = {
+                'url': url,
+                'etag': etag,
+                'last_modified': last_modified,
+                'hash': digest,
+                'size': len(body.encode('utf-8')),
+                'validated_at': now,
+                'accessed_at': now,
+                'parsed': parsed,
+            }
+            self._entries[url] = meta
+            snapshot = self._snapshot(meta)
+        body_path, _ = self._paths(self._key(url))
+        _atomic_write(body_path, body)
+        self._save_meta(snapshot)
+        self._evict()
+
+    def cached_parse(self, url, body, variant):
+        """Parse result stored for this exact body and `variant` (e.g. the query), or None"""
+        with self._lock:
+            meta = self._entries.get(url)
+            if not meta or variant not in meta['parsed'] or meta['hash'] != content_hash(body):
+                return None
+            self.stats['parse_skipped'] += 1
+            return meta['parsed'][variant]
+
+    def store_parse(self, url, body, variant, result):
+        with self._lock:
+            meta = self._entries.get(url)
+            if not meta or meta['hash'] != content_hash(body):
+                return
+            meta['parsed'][variant] = result
+            snapshot = self._snapshot(meta)
+        self._save_meta(snapshot)
+
+    def _read_body(self, url):
+        try:
+            with open(self._paths(self._key(url))[0], encoding='utf-8') as f:
+                return f.read()
+        except OSError:
+            with self._lock:
+                self._entries.pop(url, None)
+            return None
+
+    def _touch(self, url):
+        with self._lock:
+            if url in self._entries:
+                self._entries[url]['accessed_at'] = time.time()
+
+    def size_bytes(self):
+        with self._lock:
+            return sum(meta['size'] for meta in self._entries.values())
+
+    def _evict(self):
+        with self._lock:
+            total = sum(meta['size'] for meta in self._entries.values())
+            if total <= self.max_bytes:
+                return
+            victims = []
+            for meta in sorted(self._entries.values(), key=lambda m: m['accessed_at']):
+                if total <= self.max_bytes:
+                    break
+                total -= meta['size']
+                victims.append(meta['url'])
+            for url in victims:
+                del self._entries[url]
+                self.stats['evicted'] += 1
+        for url in victims:
+            for path in self._paths(self._key(url)):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def summary(self):
+        stats = self.stats
+        return (f"{stats['fresh']} fresh, {stats['not_modified']} not modified, {stats['unchanged']} unchanged, "
+                f"{stats['changed']} changed, {stats['new']} new; {stats['parse_skipped']} parses skipped, "
+                f"{stats['evicted']} evicted, {self.size_bytes() / 2**20:.1f} MiB cached")
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+OLX Parse Pool
+Parses fetched result pages in worker processes, so parsing uses every core
+while the fetch threads (or event loop) keep requests in flight. Each worker
+builds its own parser backend once; pages go in as HTML and come back as
+compact tuples, rebuilt into ParsedPage records in the calling process.
+At most `max_pending` pages wait in or for the pool: submit() blocks when it
+is full, which holds back the fetch stage until parsing catches up.
+"""
+
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from olx_parsers import ParsedPage, get_parser
+
+RECORD_FIELDS = ('title', 'price', 'location', 'link', 'image_url', 'posted_date', 'scraped_at')
+
+_worker_parser = None
+
+
+def _init_worker(parser_name, base_url):
+    global _worker_parser
+    _worker_parser = get_parser(parser_name, base_url)
+
+
+def _parse_page(content, keywords):
+    """Runs in a worker: parse one page into plain tuples (cheaper to pickle than dicts)"""
+    page = _worker_parser.parse(content, keywords)
+    listings = [tuple(record[field] for field in RECORD_FIELDS) for record in page.listings]
+    return listings, page.item_count, page.sample_titles, page.next_href
+
+
+class ParsePool:
+    """Process pool running one parser backend (see olx_parsers.py) per worker"""
+
+    def __init__(self, parser_name, base_url, workers=None, max_pending=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending or 2 * self.workers
+        self.pages_parsed = 0
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._lock = threading.Lock()
+        self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                             initargs=(parser_name, base_url))
+        # Start the workers now, before the crawl has threads whose locks a fork would copy
+        self._executor.submit(int).result()
+
+    def submit(self, content, keywords, then=None):
+        """
+        Queue a page for parsing, blocking while the pool is full. Returns a
+        Future of its ParsedPage, or of then(page) when `then` is given;
+        `then` runs in a pool thread of this process.
+        """
+        self._slots.acquire()
+        try:
+            parsing = self._executor.submit(_parse_page, content, tuple(keywords))
+        except BaseException:
+            self._slots.release()
+            raise
+        result = Future()
+
+        def finished(parsing):
+            self._slots.release()
+            try:
+                listings, item_count, sample_titles, next_href = parsing.result()
+                page = ParsedPage([dict(zip(RECORD_FIELDS, row)) for row in listings],
+                                  item_count, sample_titles, next_href)
+                with self._lock:
+                    self.pages_parsed += 1
+                result.set_result(then(page) if then else page)
+            except BaseException as e:
+                result.set_exception(e)
+
+        parsing.add_done_callback(finished)
+        return result
+
+    def parse(self, content, keywords):
+        return self.submit(content, keywords).result()
+
+    def close(self):
+        self._executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
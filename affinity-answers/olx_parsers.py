@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+OLX Listing Parsers
+Pluggable backends that turn a search results page into listing records:
+
+  bs4   BeautifulSoup with html.parser, one find/select_one call per field
+  lxml  lxml.html with precompiled XPath expressions and a single pass over
+        each listing's fields (default when lxml is installed)
+
+Both produce the same records for the OLX markup described in the README
+"""
+
+import re
+from collections import namedtuple
+from datetime import datetime
+
+from bs4 import BeautifulSoup
+
+try:
+    import lxml.html
+    from lxml import etree
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+CAR_COVER_KEYWORDS = ['car cover', 'car body cover', 'vehicle cover', 'auto cover']
+FALLBACK_LIMIT = 20  # max price-bearing blocks taken when no listing selector matches
+PRICE_PATTERN = re.compile(r'₹|Rs\.|INR')
+
+# Listing containers, most specific first; the first selector that matches wins
+LISTING_SELECTORS = [
+    'li[data-aut-id^="itemBox"]',  # Primary selector based on the HTML example
+    'li[class*="_1DNjI"]',        # Alternative using the class name
+    'div[data-aut-id="itemBox"]', # Fallback for div-based structure
+    'div[data-cy="l-card"]',      # Legacy selector
+    'div[data-testid="adCard"]',  # Another fallback
+    'div[class*="listing"]',      # Generic listing class
+    'div[class*="card"]'          # Generic card class
+]
+LINK_SELECTORS = [
+    'a[href*="/item/"]',  # Any link containing /item/
+    'a._2cbZ2',           # Original selector
+    'a[data-aut-id="itemLink"]',  # Alternative selector
+    'a'                   # Fallback to any link
+]
+IMAGE_SELECTORS = [
+    'img._3vnjf',         # Original selector
+    'img[src*="apollo.olx.in"]',  # Apollo CDN images
+    'img[src*="olx.in"]',         # Any OLX image
+    'img'                 # Fallback to any image
+]
+NEXT_PAGE_SELECTOR = 'a[rel="next"], link[rel="next"], a[data-aut-id="pageNext"]'
+
+ParsedPage = namedtuple('ParsedPage', ['listings', 'item_count', 'sample_titles', 'next_href'])
+
+
+def absolute_link(base_url, href):
+    if href.startswith('/'):
+        return base_url + href
+    if href.startswith('http'):
+        return href
+    return base_url + '/' + href
+
+
+def is_match(title, keywords):
+    title_lower = title.lower()
+    return any(keyword in title_lower for keyword in keywords)
+
+
+class BS4Parser:
+    """BeautifulSoup backend (the scraper's original parsing code)"""
+
+    name = 'bs4'
+
+    def __init__(self, base_url):
+        self.base_url = base_url
+
+    def parse_listing(self, listing_element, keywords=CAR_COVER_KEYWORDS):
+        """Parse individual listing data based on actual OLX HTML structure"""
+        try:
+            # Extract title - using the correct class from the HTML example
+            title_element = listing_element.find('span', class_='_2poNJ', attrs={'data-aut-id': 'itemTitle'})
+            title = title_element.get_text(strip=True) if title_element else "N/A"
+
+            # Check if this matches the search (more flexible matching)
+            if not is_match(title, keywords):
+                return None  # Skip non-matching items
+
+            # Extract price - using the correct class from the HTML example
+            price_element = listing_element.find('span', class_='_2Ks63', attrs={'data-aut-id': 'itemPrice'})
+            price = price_element.get_text(strip=True) if price_element else "N/A"
+
+            # Extract location - using the correct class from the HTML example
+            location_element = listing_element.find('span', class_='_2VQu4', attrs={'data-aut-id': 'item-location'})
+            location = location_element.get_text(strip=True) if location_element else "N/A"
+
+            # Extract link - try multiple selectors for better compatibility
+            link = "N/A"
+            for selector in LINK_SELECTORS:
+                link_element = listing_element.select_one(selector)
+                if link_element and link_element.get('href'):
+                    link = absolute_link(self.base_url, link_element.get('href'))
+                    break
+
+            # Extract image URL - try multiple selectors
+            image_url = "N/A"
+            for selector in IMAGE_SELECTORS:
+                img_element = listing_element.select_one(selector)
+                if img_element and img_element.get('src'):
+                    image_url = img_element.get('src')
+                    break
+
+            # Extract posted date - look for the date span in the _3rmDx div
+            date_div = listing_element.find('div', class_='_3rmDx')
+            posted_date = "N/A"
+            if date_div:
+                date_spans = date_div.find_all('span')
+                for span in date_spans:
+                    if span.get('class') and '_2jcGx' in span.get('class'):
+                        posted_date = span.get_text(strip=True)
+                        break
+
+            return {
+                'title': title,
+                'price': price,
+                'location': location,
+                'link': link,
+                'image_url': image_url,
+                'posted_date': posted_date,
+                'scraped_at': datetime.now().isoformat()
+            }
+        except Exception as e:
+            print(f"Error parsing listing: {e}")
+            return None
+
+    def parse(self, content, keywords=CAR_COVER_KEYWORDS):
+        soup = BeautifulSoup(content, 'html.parser')
+
+        listings = []
+        for selector in LISTING_SELECTORS:
+            listings = soup.select(selector)
+            if listings:
+                break
+
+        if not listings:
+            # Fallback: look for any div that might contain listing info
+            for div in soup.find_all('div'):
+                if PRICE_PATTERN.search(div.get_text()):
+                    listings.append(div)
+                    if len(listings) >= FALLBACK_LIMIT:
+                        break
+
+        results = [record for record in (self.parse_listing(listing, keywords) for listing in listings) if record]
+
+        sample_titles = []
+        if not results:
+            for listing in listings[:5]:
+                title_element = listing.find('span', class_='_2poNJ', attrs={'data-aut-id': 'itemTitle'})
+                if title_element:
+                    sample_titles.append(title_element.get_text(strip=True))
+
+        next_link = soup.select_one(NEXT_PAGE_SELECTOR)
+        next_href = next_link.get('href') if next_link else None
+        return ParsedPage(results, len(listings), sample_titles, next_href)
+
+
+def _has_class(name):
+    return f'contains(concat(" ", normalize-space(@class), " "), " {name} ")'
+
+
+if LXML_AVAILABLE:
+    # XPath equivalents of the CSS selectors above, compiled once per process
+    _LISTING_XPATHS = [etree.XPath(expr) for expr in (
+        '//li[starts-with(@data-aut-id, "itemBox")]',
+        '//li[contains(@class, "_1DNjI")]',
+        '//div[@data-aut-id="itemBox"]',
+        '//div[@data-cy="l-card"]',
+        '//div[@data-testid="adCard"]',
+        '//div[contains(@class, "listing")]',
+        '//div[contains(@class, "card")]',
+    )]
+    _TITLE = etree.XPath(f'(.//span[{_has_class("_2poNJ")}][@data-aut-id="itemTitle"])[1]')
+    _PRICE = etree.XPath(f'(.//span[{_has_class("_2Ks63")}][@data-aut-id="itemPrice"])[1]')
+    _LOCATION = etree.XPath(f'(.//span[{_has_class("_2VQu4")}][@data-aut-id="item-location"])[1]')
+    _LINK_XPATHS = [etree.XPath(expr) for expr in (
+        '(.//a[contains(@href, "/item/")])[1]',
+        f'(.//a[{_has_class("_2cbZ2")}])[1]',
+        '(.//a[@data-aut-id="itemLink"])[1]',
+        '(.//a)[1]',
+    )]
+    _IMAGE_XPATHS = [etree.XPath(expr) for expr in (
+        f'(.//img[{_has_class("_3vnjf")}])[1]',
+        '(.//img[contains(@src, "apollo.olx.in")])[1]',
+        '(.//img[contains(@src, "olx.in")])[1]',
+        '(.//img)[1]',
+    )]
+    _POSTED_DATE = etree.XPath(f'((.//div[{_has_class("_3rmDx")}])[1]//span[{_has_class("_2jcGx")}])[1]')
+    _NEXT_PAGE = etree.XPath('(//a[@rel="next"] | //link[@rel="next"] | //a[@data-aut-id="pageNext"])[1]')
+    _PRICE_TEXT_BLOCKS = etree.XPath(
+        '//text()[contains(., "₹") or contains(., "Rs.") or contains(., "INR")]/ancestor::div[1]')
+    _HTML_PARSER = lxml.html.HTMLParser(encoding='utf-8')
+
+
+def _text(element):
+    """Same as BeautifulSoup's get_text(strip=True)"""
+    return "".join(piece.strip() for piece in element.itertext())
+
+
+def _first_attr(element, xpaths, attribute):
+    # Like the BS4 loops: the first element each selector finds must carry the attribute
+    for xpath in xpaths:
+        found = xpath(element)
+        if found and found[0].get(attribute):
+            return found[0].get(attribute)
+    return None
+
+
+class LxmlParser:
+    """lxml backend with precompiled XPath; one pass over each listing's fields"""
+
+    name = 'lxml'
+
+    def __init__(self, base_url):
+        if not LXML_AVAILABLE:
+            raise RuntimeError("lxml is not installed. Install with: pip install lxml")
+        self.base_url = base_url
+
+    def parse_listing(self, listing_element, keywords=CAR_COVER_KEYWORDS):
+        found = _TITLE(listing_element)
+        title = _text(found[0]) if found else "N/A"
+        if not is_match(title, keywords):
+            return None
+
+        found = _PRICE(listing_element)
+        price = _text(found[0]) if found else "N/A"
+        found = _LOCATION(listing_element)
+        location = _text(found[0]) if found else "N/A"
+        href = _first_attr(listing_element, _LINK_XPATHS, 'href')
+        image_url = _first_attr(listing_element, _IMAGE_XPATHS, 'src')
+        found = _POSTED_DATE(listing_element)
+        return {
+            'title': title,
+            'price': price,
+            'location': location,
+            'link': absolute_link(self.base_url, href) if href else "N/A",
+            'image_url': image_url or "N/A",
+            'posted_date': _text(found[0]) if found else "N/A",
+            'scraped_at': datetime.now().isoformat()
+        }
+
+    def parse(self, content, keywords=CAR_COVER_KEYWORDS):
+        if isinstance(content, str):
+            content = content.encode('utf-8')
+        try:
+            root = lxml.html.document_fromstring(content, parser=_HTML_PARSER)
+        except etree.ParserError:
+            return ParsedPage([], 0, [], None)  # empty document
+
+        listings = []
+        for xpath in _LISTING_XPATHS:
+            listings = xpath(root)
+            if listings:
+                break
+
+        if not listings:
+            # Fallback: innermost divs holding a price-like text node, found in one
+            # pass over text nodes instead of calling get_text() on every div
+            seen = set()
+            for div in _PRICE_TEXT_BLOCKS(root):
+                if div not in seen:
+                    seen.add(div)
+                    listings.append(div)
+                    if len(listings) >= FALLBACK_LIMIT:
+                        break
+
+        results = []
+        for listing in listings:
+            try:
+                record = self.parse_listing(listing, keywords)
+            except Exception as e:
+                print(f"Error parsing listing: {e}")
+                continue
+            if record:
+                results.append(record)
+
+        sample_titles = []
+        if not results:
+            for listing in listings[:5]:
+                found = _TITLE(listing)
+                if found:
+                    sample_titles.append(_text(found[0]))
+
+        found = _NEXT_PAGE(root)
+        next_href = found[0].get('href') if found else None
+        return ParsedPage(results, len(listings), sample_titles, next_href)
+
+
+PARSERS = {'bs4': BS4Parser, 'lxml': LxmlParser}
+DEFAULT_PARSER = 'lxml' if LXML_AVAILABLE else 'bs4'
+
+
+def get_parser(name, base_url):
+    """Parser backend `name` ('bs4' or 'lxml') for links relative to `base_url`"""
+    if name not in PARSERS:
+        raise ValueError(f"Unknown parser {name!r}, expected one of: {', '.join(PARSERS)}")
+    return PARSERS[name](base_url)
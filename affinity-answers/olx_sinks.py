@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+OLX Result Sinks
+Streaming writers for scraped listings. Records are written as pages are
+parsed instead of after the crawl, so memory stays bounded and a crash loses
+at most the last flush interval:
+
+  json     the scraper's original document ({"search_query": ..., "results": [...]})
+  ndjson   one JSON object per line
+  csv      fixed columns, header written up front
+  txt      the human-readable listing report
+  parquet  columnar row groups (needs pyarrow)
+
+Each sink writes to "<file>.part", flushes every `flush_interval` seconds or
+`flush_records` records, and on close (or every `rotate_records` records)
+fsyncs and atomically renames the part file to its final name
+"""
+
+import csv
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+_encode = json.JSONEncoder(ensure_ascii=False).encode
+
+FIELDNAMES = ['title', 'price', 'location', 'link', 'image_url', 'posted_date', 'scraped_at']
+
+
+class FileSink:
+    """Base class: part files, flush intervals and rotation; subclasses format records"""
+
+    extension = ''
+    binary = False
+
+    def __init__(self, path, search_query='', search_url='', rotate_records=0, flush_interval=5.0,
+                 flush_records=500):
+        self.path = path
+        self.search_query = search_query
+        self.search_url = search_url
+        self.rotate_records = rotate_records
+        self.flush_interval = flush_interval
+        self.flush_records = flush_records
+        self.files = []  # final paths written so far
+        self.total = 0
+        self._file = None
+        self._part = 0
+        self._count = 0  # records in the current file
+        self._unflushed = 0
+        self._flushed_at = time.monotonic()
+
+    def _final_path(self):
+        if not self.rotate_records:
+            return self.path
+        stem, ext = os.path.splitext(self.path)
+        return f"{stem}-{self._part:04d}{ext}"
+
+    def _open(self):
+        self._part += 1
+        self._count = 0
+        self._file = open(self._final_path() + '.part', 'wb' if self.binary else 'w',
+                          **({} if self.binary else {'newline': '', 'encoding': 'utf-8'}))
+        self._begin()
+
+    def _close_file(self):
+        self._end()
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        final_path = self._final_path()
+        os.replace(final_path + '.part', final_path)
+        self.files.append(final_path)
+        self._file = None
+
+    def write(self, record):
+        if self._file is None:
+            self._open()
+        self._write(record)
+        self._count += 1
+        self.total += 1
+        self._unflushed += 1
+        if self.rotate_records and self._count >= self.rotate_records:
+            self._close_file()
+            self._unflushed = 0
+        elif (self._unflushed >= self.flush_records
+              or time.monotonic() - self._flushed_at >= self.flush_interval):
+            self.flush()
+
+    def flush(self):
+        if self._file is not None:
+            self._flush()
+        self._unflushed = 0
+        self._flushed_at = time.monotonic()
+
+    def close(self):
+        if self._file is not None:
+            self._close_file()
+
+    def _begin(self):
+        pass
+
+    def _write(self, record):
+        raise NotImplementedError
+
+    def _flush(self):
+        self._file.flush()
+
+    def _end(self):
+        pass
+
+
+class JSONSink(FileSink):
+    """The scraper's JSON document, streamed; total_results is written after the results"""
+
+    extension = 'json'
+
+    def _begin(self):
+        header = {
+            'search_query': self.search_query,
+            'search_url': self.search_url,
+            'scraped_at': datetime.now().isoformat(),
+        }
+        self._file.write(json.dumps(header, indent=2, ensure_ascii=False)[:-2] + ',\n  "results": [')
+
+    def _write(self, record):
+        # Same layout as json.dump(indent=2), but indent= would force the pure-Python encoder
+        fields = ',\n      '.join(f'{_encode(key)}: {_encode(value)}' for key, value in record.items())
+        self._file.write(('\n    {\n      ' if self._count == 0 else ',\n    {\n      ') + fields + '\n    }')
+
+    def _end(self):
+        closing = '\n  ]' if self._count else ']'
+        self._file.write(f'{closing},\n  "total_results": {self._count}\n}}\n')
+
+
+class NDJSONSink(FileSink):
+    extension = 'ndjson'
+
+    def _write(self, record):
+        self._file.write(_encode(record) + '\n')
+
+
+class CSVSink(FileSink):
+    """Fixed FIELDNAMES columns, so the header doesn't depend on the first result"""
+
+    extension = 'csv'
+
+    def _begin(self):
+        self._writer = csv.DictWriter(self._file, fieldnames=FIELDNAMES, extrasaction='ignore')
+        self._writer.writeheader()
+
+    def _write(self, record):
+        self._writer.writerow(record)
+
+
+class TextSink(FileSink):
+    extension = 'txt'
+
+    def _begin(self):
+        self._file.write("OLX Car Cover Search Results\n")
+        self._file.write("=" * 50 + "\n\n")
+        self._file.write(f"Search Query: {self.search_query}\n")
+        self._file.write(f"Search URL: {self.search_url}\n")
+        self._file.write(f"Scraped At: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
+
+    def _write(self, record):
+        self._file.write(f"Listing {self._count + 1}:\n")
+        self._file.write(f"  Title: {record['title']}\n")
+        self._file.write(f"  Price: {record['price']}\n")
+        self._file.write(f"  Location: {record['location']}\n")
+        self._file.write(f"  Link: {record['link']}\n")
+        self._file.write(f"  Posted: {record['posted_date']}\n")
+        self._file.write("-" * 30 + "\n\n")
+
+    def _end(self):
+        self._file.write(f"Total Results: {self._count}\n")
+
+
+class ParquetSink(FileSink):
+    """Buffers records column by column and writes a row group per flush"""
+
+    extension = 'parquet'
+    binary = True
+
+    def __init__(self, path, row_group_size=10000, **kwargs):
+        if not PYARROW_AVAILABLE:
+            raise RuntimeError("pyarrow is not installed. Install with: pip install pyarrow")
+        # A part file without its footer is unreadable anyway: only flush full row groups
+        kwargs['flush_records'] = row_group_size
+        kwargs['flush_interval'] = float('inf')
+        super().__init__(path, **kwargs)
+        self._schema = pa.schema([(name, pa.string()) for name in FIELDNAMES])
+        self._columns = {name: [] for name in FIELDNAMES}
+
+    def _begin(self):
+        self._writer = pq.ParquetWriter(self._file, self._schema, compression='zstd')
+
+    def _write(self, record):
+        for name in FIELDNAMES:
+            value = record.get(name)
+            self._columns[name].append(None if value is None else str(value))
+
+    def _flush(self):
+        if self._columns['title']:
+            self._writer.write_table(pa.table(self._columns, schema=self._schema))
+            self._columns = {name: [] for name in FIELDNAMES}
+        self._file.flush()
+
+    def _end(self):
+        self._flush()
+        self._writer.close()
+
+
+SINKS = {sink.extension: sink for sink in (JSONSink, NDJSONSink, CSVSink, TextSink, ParquetSink)}
+
+
+class SinkPipeline:
+    """Fans records out to several sinks; safe to call from crawl callbacks"""
+
+    def __init__(self, sinks):
+        self.sinks = sinks
+        self._lock = threading.Lock()
+
+    def write_many(self, records):
+        with self._lock:
+            for record in records:
+                for sink in self.sinks:
+                    sink.write(record)
+
+    def flush(self):
+        with self._lock:
+            for sink in self.sinks:
+                sink.flush()
+
+    def close(self):
+        with self._lock:
+            for sink in self.sinks:
+                sink.close()
+
+    @property
+    def files(self):
+        return [path for sink in self.sinks for path in sink.files]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_sinks(prefix, formats, **kwargs):
+    """SinkPipeline writing `<prefix>.<format>` for each of `formats`"""
+    unknown = [fmt for fmt in formats if fmt not in SINKS]
+    if unknown:
+        raise ValueError(f"Unknown output format(s) {', '.join(unknown)}, expected: {', '.join(SINKS)}")
+    return SinkPipeline([SINKS[fmt](f"{prefix}.{fmt}", **kwargs) for fmt in formats])
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+OLX Async Transport
+asyncio HTTP client for the scraper: one bounded pool of keep-alive
+connections shared by every page fetch on the event loop. aiohttp is used
+for HTTP/1.1; httpx when HTTP/2 is asked for (and the h2 package is
+installed), since aiohttp doesn't speak it. Responses expose status_code,
+headers, text and content like requests, and transport errors are raised as
+requests exceptions, so FetchPolicy and the page cache handle both
+transports the same way
+"""
+
+import asyncio
+
+import requests
+
+try:
+    import aiohttp
+    AIOHTTP_AVAILABLE = True
+except ImportError:
+    AIOHTTP_AVAILABLE = False
+
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
+
+try:
+    import h2  # noqa: F401  (enables http2=True in httpx)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+class AsyncResponse:
+    """The parts of requests.Response the scraper reads, for an aiohttp response"""
+
+    def __init__(self, status_code, headers, content, text):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.text = text
+
+
+class AsyncTransport:
+    """
+    Use as `async with AsyncTransport(...) as transport:` on the loop that
+    makes the requests. At most `max_connections` are open at once; further
+    requests wait for a free connection rather than failing.
+    """
+
+    def __init__(self, max_connections=100, http2=False, timeout=(10, 20)):
+        if http2 and not (HTTPX_AVAILABLE and HTTP2_AVAILABLE):
+            print("⚠️  HTTP/2 needs httpx and h2, using HTTP/1.1. Install with: pip install 'httpx[http2]'")
+            http2 = False
+        if http2:
+            self.backend = 'httpx'
+        elif AIOHTTP_AVAILABLE:
+            self.backend = 'aiohttp'
+        elif HTTPX_AVAILABLE:
+            # httpx rescans its whole pool on every request, so aiohttp is preferred for HTTP/1.1
+            self.backend = 'httpx'
+        else:
+            raise RuntimeError("No async HTTP client installed. Install with: pip install aiohttp")
+        self.max_connections = max_connections
+        self.http2 = http2
+        self.timeout = timeout
+        self._client = None
+
+    async def __aenter__(self):
+        connect_timeout, read_timeout = self.timeout
+        if self.backend == 'aiohttp':
+            self._client = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_connections, limit_per_host=0),
+                timeout=aiohttp.ClientTimeout(sock_connect=connect_timeout, sock_read=read_timeout),
+            )
+        else:
+            self._client = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=self.max_connections,
+                                    max_keepalive_connections=self.max_connections),
+                timeout=httpx.Timeout(read_timeout, connect=connect_timeout, pool=None),
+                http2=self.http2,
+                follow_redirects=True,  # as requests and aiohttp do
+            )
+        return self
+
+    async def __aexit__(self, *exc):
+        if self.backend == 'aiohttp':
+            await self._client.close()
+        else:
+            await self._client.aclose()
+        self._client = None
+
+    async def get(self, url, headers=None):
+        if self.backend == 'httpx':
+            try:
+                return await self._client.get(url, headers=headers)
+            except httpx.TimeoutException as e:
+                raise requests.exceptions.Timeout(str(e)) from e
+            except httpx.HTTPError as e:
+                raise requests.exceptions.ConnectionError(str(e)) from e
+        try:
+            async with self._client.get(url, headers=headers) as response:
+                content = await response.read()
+                text = await response.text(errors='replace')
+                return AsyncResponse(response.status, response.headers, content, text)
+        except asyncio.TimeoutError as e:
+            # Checked first: aiohttp's read timeouts are also ClientErrors
+            raise requests.exceptions.Timeout(str(e) or "read timed out") from e
+        except aiohttp.ClientError as e:
+            raise requests.exceptions.ConnectionError(str(e)) from e
@@ -2,12 +2,12 @@
 import time
 import random
 import logging
+import os
 import json
 import requests
-from datetime import datetime
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Query, Request
 from fastapi.responses import JSONResponse, Response
-from prometheus_client import Counter, Histogram, generate_latest, CONTENT_TYPE_LATEST
+from prometheus_client import Counter, Histogram
 from opentelemetry import trace
 from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
 from opentelemetry.sdk.trace import TracerProvider
@@ -15,6 +15,13 @@ from opentelemetry.sdk.trace.export import BatchSpanProcessor
 from opentelemetry.exporter.jaeger.thrift import JaegerExporter
 import uvicorn
 
+from loki_client import LokiClient
+from work_models import ENDPOINT_WORK_MODELS, simulate_work, shutdown_pools
+from multiprocess_metrics import mark_worker_dead, metrics_registry, multiprocess_enabled
+from metrics_exposition import MetricsExpositionCache
+from route_labels import LabelLimiter, resolve_route_template
+from nav_index import NavIndex
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -22,61 +29,42 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Simple Loki client for direct log shipping
-class LokiClient:
-    def __init__(self, loki_url="http://loki:3100"):
-        self.loki_url = loki_url
-        self.endpoint = f"{loki_url}/loki/api/v1/push"
-        logger.info(f"Loki client initialized with endpoint: {self.endpoint}")
-    
-    def send_log(self, message, level="INFO", labels=None):
-        if labels is None:
-            labels = {"job": "vibe-monitor-app", "service": "fastapi"}
-        
-        timestamp_ns = int(datetime.now().timestamp() * 1e9)
-        
-        payload = {
-            "streams": [
-                {
-                    "stream": labels,
-                    "values": [
-                        [str(timestamp_ns), message]
-                    ]
-                }
-            ]
-        }
-        
-        try:
-            response = requests.post(
-                self.endpoint,
-                json=payload,
-                headers={"Content-Type": "application/json"},
-                timeout=2
-            )
-            if response.status_code == 204:
-                logger.debug(f"Successfully sent log to Loki: {message[:50]}...")
-            else:
-                logger.warning(f"Failed to send log to Loki: {response.status_code}")
-        except Exception as e:
-            logger.warning(f"Error sending log to Loki: {e}")
-
-# Initialize Loki client
-loki_client = LokiClient()
-
-# Initialize OpenTelemetry
-trace.set_tracer_provider(TracerProvider())
+# Initialize Loki client (logs are shipped in batches by a background flusher,
+# which is started per worker in the startup hook)
+loki_client = LokiClient(
+    loki_url=os.getenv("LOKI_URL", "http://loki:3100"),
+    batch_size=int(os.getenv("LOKI_BATCH_SIZE", "500")),
+    flush_interval=float(os.getenv("LOKI_FLUSH_INTERVAL", "1.0")),
+    max_queue_size=int(os.getenv("LOKI_QUEUE_SIZE", "10000")),
+    overflow_policy=os.getenv("LOKI_OVERFLOW_POLICY", "drop_oldest"),
+    sample_ratio=float(os.getenv("LOKI_SAMPLE_RATIO", "0.1")),
+    spool_dir=os.getenv("LOKI_SPOOL_DIR") or None,
+    spool_max_bytes=int(os.getenv("LOKI_SPOOL_MAX_BYTES", str(256 * 1024 * 1024))),
+    replay_rate=float(os.getenv("LOKI_REPLAY_RATE", "5")),
+)
+
+# OpenTelemetry tracer: a proxy until init_tracing() installs the provider
 tracer = trace.get_tracer(__name__)
 
-# Configure Jaeger exporter
-jaeger_exporter = JaegerExporter(
-    agent_host_name="jaeger",
-    agent_port=6831,
-)
-trace.get_tracer_provider().add_span_processor(
-    BatchSpanProcessor(jaeger_exporter)
-)
+def init_tracing():
+    """Install the tracer provider and Jaeger exporter for this worker.
+
+    Called from the startup hook so every worker process gets its own
+    BatchSpanProcessor export thread after it has been forked or spawned.
+    """
+    provider = TracerProvider()
+    jaeger_exporter = JaegerExporter(
+        agent_host_name=os.getenv("JAEGER_AGENT_HOST", "jaeger"),
+        agent_port=int(os.getenv("JAEGER_AGENT_PORT", "6831")),
+    )
+    provider.add_span_processor(BatchSpanProcessor(jaeger_exporter))
+    trace.set_tracer_provider(provider)
+    return provider
 
-# Configure Prometheus metrics
+tracer_provider = None
+
+# Configure Prometheus metrics (aggregated across workers when
+# PROMETHEUS_MULTIPROC_DIR is set, see multiprocess_metrics.py)
 REQUEST_COUNT = Counter(
     'http_requests_total',
     'Total HTTP requests',
@@ -89,6 +77,35 @@ REQUEST_LATENCY = Histogram(
     ['method', 'endpoint']
 )
 
+# Cap on distinct label combinations per metric / for Loki streams (per worker)
+MAX_LABEL_SETS = int(os.getenv("METRICS_MAX_LABEL_SETS", "500"))
+REQUEST_COUNT_LABELS = LabelLimiter('http_requests_total', MAX_LABEL_SETS)
+REQUEST_LATENCY_LABELS = LabelLimiter('http_request_duration_seconds', MAX_LABEL_SETS)
+LOKI_STREAM_LABELS = LabelLimiter('loki_streams', MAX_LABEL_SETS)
+
+# /metrics rendering cache, see metrics_exposition.py
+METRICS_CACHE = MetricsExpositionCache(
+    metrics_registry,
+    min_interval=float(os.getenv("METRICS_CACHE_MIN_INTERVAL_MS", "1000")) / 1000,
+    max_age=float(os.getenv("METRICS_CACHE_MAX_AGE_MS", "30000")) / 1000,
+    track_changes=not multiprocess_enabled(),
+)
+
+# AMFI NAV data for the /api/nav endpoints (see nav_index.py), loaded per worker at startup
+NAV_DATA_PATH = os.getenv("NAV_DATA_PATH", os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "affinity-answers", "amfi_nav_data.json"))
+NAV_MAX_PAGE_SIZE = int(os.getenv("NAV_MAX_PAGE_SIZE", "500"))
+nav_index = None
+
+def load_nav_index():
+    """Load NAV_DATA_PATH into the index; the NAV endpoints answer 503 if it can't be read"""
+    global nav_index
+    try:
+        nav_index = NavIndex.load(NAV_DATA_PATH)
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning(f"⚠️ NAV data not loaded from {NAV_DATA_PATH}: {e}")
+    return nav_index
+
 # Create FastAPI app
 app = FastAPI(title="Vibe Monitor API", version="1.0.0")
 
@@ -98,21 +115,28 @@ FastAPIInstrumentor.instrument_app(app)
 @app.middleware("http")
 async def monitor_requests(request: Request, call_next):
     start_time = time.time()
+    method = request.method
+    path = request.url.path
+    
+    # Label by route template, never by raw path: one series per route
+    route = resolve_route_template(request)
     
     # Log incoming request
-    log_message = f"Incoming request: {request.method} {request.url.path}"
+    log_message = f"Incoming request: {method} {path}"
     logger.info(log_message)
-    loki_client.send_log(log_message, level="INFO", labels={
+    stream_method, stream_endpoint = LOKI_STREAM_LABELS.limit(method, route)
+    loki_client.send_log(json.dumps({"message": log_message, "method": method, "path": path}), level="INFO", labels={
         "job": "vibe-monitor-app",
         "service": "fastapi",
-        "method": request.method,
-        "endpoint": request.url.path,
+        "method": stream_method,
+        "endpoint": stream_endpoint,
         "type": "request_start"
     })
     
     # Create a span for the request
-    with tracer.start_as_current_span(f"{request.method} {request.url.path}") as span:
-        span.set_attribute("http.method", request.method)
+    with tracer.start_as_current_span(f"{method} {route}") as span:
+        span.set_attribute("http.method", method)
+        span.set_attribute("http.route", route)
         span.set_attribute("http.url", str(request.url))
         
         # Process the request
@@ -120,33 +144,47 @@ async def monitor_requests(request: Request, call_next):
         
         # Calculate latency
         latency = time.time() - start_time
+        status = str(response.status_code)
         
         # Record metrics
+        count_method, count_endpoint, count_status = REQUEST_COUNT_LABELS.limit(method, route, status)
         REQUEST_COUNT.labels(
-            method=request.method,
-            endpoint=request.url.path,
-            status=response.status_code
+            method=count_method,
+            endpoint=count_endpoint,
+            status=count_status
         ).inc()
         
+        latency_method, latency_endpoint = REQUEST_LATENCY_LABELS.limit(method, route)
         REQUEST_LATENCY.labels(
-            method=request.method,
-            endpoint=request.url.path
+            method=latency_method,
+            endpoint=latency_endpoint
         ).observe(latency)
         
+        # Scrapes alone don't invalidate the cached exposition, otherwise every
+        # scrape would re-render; /metrics' own series refresh within max_age
+        if route != "/metrics":
+            METRICS_CACHE.mark_changed()
+        
         # Add latency to span
         span.set_attribute("http.duration", latency)
         span.set_attribute("http.status_code", response.status_code)
         
-        # Log response
-        log_message = f"Request completed: {request.method} {request.url.path} - Status: {response.status_code} - Latency: {latency:.3f}s"
+        # Log response; latency goes in the line itself, never in stream labels
+        log_message = f"Request completed: {method} {path} - Status: {status} - Latency: {latency:.3f}s"
         logger.info(log_message)
-        loki_client.send_log(log_message, level="INFO", labels={
+        stream_method, stream_endpoint, stream_status = LOKI_STREAM_LABELS.limit(method, route, status)
+        loki_client.send_log(json.dumps({
+            "message": log_message,
+            "method": method,
+            "path": path,
+            "status": response.status_code,
+            "latency": round(latency, 6)
+        }), level="INFO", labels={
             "job": "vibe-monitor-app",
             "service": "fastapi",
-            "method": request.method,
-            "endpoint": request.url.path,
-            "status": str(response.status_code),
-            "latency": f"{latency:.3f}",
+            "method": stream_method,
+            "endpoint": stream_endpoint,
+            "status": stream_status,
             "type": "request_complete"
         })
         
@@ -154,7 +192,13 @@ async def monitor_requests(request: Request, call_next):
 
 @app.on_event("startup")
 async def startup_event():
-    """Test Loki connection on startup"""
+    """Initialise per-worker telemetry and test the Loki connection on startup"""
+    global tracer_provider
+    tracer_provider = init_tracing()
+    loki_client.start()
+    logger.info(f"Worker {os.getpid()} started")
+    logger.info(f"Work models: {ENDPOINT_WORK_MODELS}")
+    load_nav_index()
     try:
         response = requests.get(f"{loki_client.loki_url}/ready", timeout=5)
         if response.status_code == 200:
@@ -169,6 +213,15 @@ async def startup_event():
     except Exception as e:
         logger.error(f"❌ Loki connection error: {e}")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Flush logs and spans, release the work pools and retire this worker's metrics"""
+    loki_client.stop()
+    if tracer_provider is not None:
+        tracer_provider.shutdown()
+    shutdown_pools()
+    mark_worker_dead(os.getpid())
+
 @app.get("/")
 async def root():
     logger.info("Root endpoint called")
@@ -183,7 +236,7 @@ async def root():
         span.set_attribute("operation.type", "root")
         
         # Simulate some work
-        time.sleep(random.uniform(0.1, 0.5))
+        await simulate_work("root", random.uniform(0.1, 0.5))
         
         return {"message": "Welcome to Vibe Monitor API!", "status": "healthy"}
 
@@ -201,7 +254,7 @@ async def health():
         span.set_attribute("operation.type", "health_check")
         
         # Simulate some work
-        time.sleep(random.uniform(0.05, 0.2))
+        await simulate_work("health", random.uniform(0.05, 0.2))
         
         return {"status": "healthy", "timestamp": time.time()}
 
@@ -219,7 +272,7 @@ async def get_vibe():
         span.set_attribute("operation.type", "get_vibe")
         
         # Simulate some work with potential errors
-        time.sleep(random.uniform(0.2, 1.0))
+        await simulate_work("vibe", random.uniform(0.2, 1.0))
         
         # Randomly generate some errors for demonstration
         if random.random() < 0.1:  # 10% chance of error
@@ -250,9 +303,13 @@ async def get_vibe():
         }
 
 @app.get("/metrics")
-async def metrics():
-    """Prometheus metrics endpoint"""
-    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+async def metrics(request: Request):
+    """Prometheus metrics endpoint (cached, OpenMetrics/gzip negotiated)"""
+    body, headers = await METRICS_CACHE.expose(
+        request.headers.get("accept", ""),
+        request.headers.get("accept-encoding", "")
+    )
+    return Response(body, headers=headers)
 
 @app.get("/api/slow")
 async def slow_endpoint():
@@ -269,12 +326,71 @@ async def slow_endpoint():
         
         # Simulate a slow operation
         sleep_time = random.uniform(2.0, 5.0)
-        time.sleep(sleep_time)
+        await simulate_work("slow", sleep_time)
         
         span.set_attribute("sleep.duration", sleep_time)
+        span.set_attribute("work.model", ENDPOINT_WORK_MODELS["slow"])
         logger.info(f"Slow operation completed after {sleep_time:.2f}s")
         
         return {"message": "Slow operation completed", "duration": sleep_time}
 
+def nav_response(request: Request, render):
+    """Conditional, compressed response from the NAV index; `render` builds the body bytes"""
+    if nav_index is None:
+        return JSONResponse(status_code=503, content={"error": "NAV data not loaded"})
+    # Only a resource that exists can be "not modified"; a 404 carries no ETag a client could revalidate
+    body = render(nav_index)
+    if body is None:
+        return JSONResponse(status_code=404, content={"error": "Not found"})
+    if nav_index.not_modified(request.headers.get("if-none-match")):
+        return Response(status_code=304, headers={"ETag": nav_index.etag, "Vary": "Accept-Encoding"})
+    body, headers = nav_index.encode(body, request.headers.get("accept-encoding", ""))
+    return Response(body, media_type="application/json", headers=headers)
+
+@app.get("/api/nav/schemes/{scheme_code}")
+async def nav_scheme(scheme_code: int, request: Request):
+    """Latest NAV of one scheme"""
+    with tracer.start_as_current_span("nav_scheme") as span:
+        span.set_attribute("nav.scheme_code", scheme_code)
+
+        def render(index):
+            row = index.by_code(scheme_code)
+            return None if row is None else index.record_body(row)
+
+        return nav_response(request, render)
+
+@app.get("/api/nav/isin/{isin}")
+async def nav_isin(isin: str, request: Request):
+    """Schemes with this growth or reinvestment ISIN"""
+    with tracer.start_as_current_span("nav_isin") as span:
+        span.set_attribute("nav.isin", isin)
+
+        def render(index):
+            rows = index.by_isin(isin)
+            return index.list_body(rows) if rows else None
+
+        return nav_response(request, render)
+
+@app.get("/api/nav/schemes")
+async def nav_schemes(
+    request: Request,
+    fund_house: str = Query(None, min_length=1, description="Fund house, matched as a scheme name prefix"),
+    min_nav: float = Query(None, ge=0),
+    max_nav: float = Query(None, ge=0),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(50, ge=1, le=NAV_MAX_PAGE_SIZE),
+):
+    """Schemes filtered by fund house and NAV range, a page at a time"""
+    with tracer.start_as_current_span("nav_schemes") as span:
+        span.set_attribute("nav.page", page)
+
+        def render(index):
+            rows = index.search(fund_house, min_nav, max_nav)
+            span.set_attribute("nav.matches", len(rows))
+            return index.page_body(rows, page, page_size)
+
+        return nav_response(request, render)
+
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # Single process; use serve.py (or gunicorn.conf.py) to run several workers
+    uvicorn.run(app, host=os.getenv("HOST", "0.0.0.0"), port=int(os.getenv("PORT", "8000")))
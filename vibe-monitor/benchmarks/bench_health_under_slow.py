@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Measure /health latency while /api/slow calls pile up, once per work model.
+
+Each run boots app.py under uvicorn in a subprocess (Loki and Jaeger are
+left unreachable) with WORK_MODEL_SLOW set to the model under test, keeps
+`--slow` concurrent /api/slow requests in flight and probes /health every
+`--interval` seconds. With the old `blocking` model every probe waits behind
+the sleeping event loop; with `async_sleep` (or any executor-backed model)
+probes stay close to their own ~0.05-0.2s cost.
+
+Usage:
+    python benchmarks/bench_health_under_slow.py --models blocking async_sleep
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+import requests
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_app(model, port):
+    env = dict(os.environ, WORK_MODEL_SLOW=model, LOKI_URL="http://127.0.0.1:9")
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app:app", "--host", "127.0.0.1", "--port", str(port)],
+        cwd=APP_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            requests.get(f"http://127.0.0.1:{port}/health", timeout=5)
+            return proc
+        except requests.RequestException:
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError(f"app did not start with WORK_MODEL_SLOW={model}")
+
+
+def run_model(model, slow, duration, interval, timeout):
+    port = free_port()
+    base = f"http://127.0.0.1:{port}"
+    proc = start_app(model, port)
+    stop = threading.Event()
+
+    def slow_caller():
+        with requests.Session() as session:
+            while not stop.is_set():
+                try:
+                    session.get(f"{base}/api/slow", timeout=30)
+                except requests.RequestException:
+                    pass
+
+    callers = [threading.Thread(target=slow_caller, daemon=True) for _ in range(slow)]
+    try:
+        for caller in callers:
+            caller.start()
+        time.sleep(0.5)
+
+        latencies, timeouts = [], 0
+        deadline = time.time() + duration
+        with requests.Session() as session:
+            while time.time() < deadline:
+                start = time.perf_counter()
+                try:
+                    session.get(f"{base}/health", timeout=timeout)
+                    latencies.append(time.perf_counter() - start)
+                except requests.Timeout:
+                    timeouts += 1
+                time.sleep(interval)
+        return latencies, timeouts
+    finally:
+        stop.set()
+        proc.terminate()
+        try:
+            proc.wait(5)
+        except subprocess.TimeoutExpired:
+            # A blocked event loop can't finish its queued slow calls in time
+            proc.kill()
+            proc.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="/health latency under concurrent /api/slow load")
+    parser.add_argument("--models", nargs="+", default=["blocking", "async_sleep", "blocking_io", "cpu_process"])
+    parser.add_argument("--slow", type=int, default=8, help="concurrent /api/slow callers")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds of probing per model")
+    parser.add_argument("--interval", type=float, default=0.1, help="seconds between /health probes")
+    parser.add_argument("--timeout", type=float, default=2.0, help="probe timeout, like a health checker's")
+    args = parser.parse_args()
+
+    print(f"{args.slow} concurrent /api/slow callers, probing /health for {args.duration:.0f}s per model\n")
+    print(f"{'model':<12} {'probes':>6} {'timeouts':>8} {'p50':>8} {'p99':>8} {'max':>8}")
+    for model in args.models:
+        latencies, timeouts = run_model(model, args.slow, args.duration, args.interval, args.timeout)
+        if not latencies:
+            print(f"{model:<12} {0:>6} {timeouts:>8} {'-':>8} {'-':>8} {'-':>8}")
+            continue
+        ordered = sorted(latencies)
+        p50 = statistics.median(ordered)
+        p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+        print(f"{model:<12} {len(ordered):>6} {timeouts:>8} {p50:>7.3f}s {p99:>7.3f}s {ordered[-1]:>7.3f}s")
+
+
+if __name__ == "__main__":
+    main()
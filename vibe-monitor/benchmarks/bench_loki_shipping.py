@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Compare the cost of LokiClient.send_log on the request path against the old
+synchronous push (one requests.post per log line), using a local stub Loki
+that adds a fixed delay to every push.
+
+Usage:
+    python benchmarks/bench_loki_shipping.py --logs 200 --delay-ms 20
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from loki_client import LokiClient  # noqa: E402
+
+LABELS = {"job": "vibe-monitor-app", "service": "fastapi", "type": "benchmark"}
+
+
+class StubLoki:
+    """Minimal Loki push endpoint that counts entries and sleeps per push"""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.pushes = 0
+        self.entries = 0
+        self.lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                payload = json.loads(body)
+                time.sleep(stub.delay)
+                with stub.lock:
+                    stub.pushes += 1
+                    stub.entries += sum(len(s["values"]) for s in payload["streams"])
+                self.send_response(204)
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def report(name, samples):
+    print(f"{name:<22} p50={percentile(samples, 50) * 1e6:9.1f}us  "
+          f"p99={percentile(samples, 99) * 1e6:9.1f}us  "
+          f"mean={statistics.mean(samples) * 1e6:9.1f}us")
+
+
+def bench_sync(stub, logs):
+    """Old behaviour: every send_log posts its own payload inline"""
+    client = LokiClient(loki_url=stub.url)
+    samples = []
+    for i in range(logs):
+        start = time.perf_counter()
+        client._push([(LABELS, time.time_ns(), f"sync log line {i}")])
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def bench_batched(stub, logs):
+    client = LokiClient(loki_url=stub.url, batch_size=100, flush_interval=0.2)
+    client.start()
+    samples = []
+    for i in range(logs):
+        start = time.perf_counter()
+        client.send_log(f"batched log line {i}", labels=LABELS)
+        samples.append(time.perf_counter() - start)
+    client.stop()
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--logs", type=int, default=200, help="log lines per run")
+    parser.add_argument("--delay-ms", type=float, default=20.0, help="stub Loki latency per push")
+    args = parser.parse_args()
+
+    stub = StubLoki(args.delay_ms / 1000)
+    try:
+        print(f"Stub Loki at {stub.url} with {args.delay_ms:.0f}ms push latency, {args.logs} logs per run")
+        report("synchronous push", bench_sync(stub, args.logs))
+        pushes_before, entries_before = stub.pushes, stub.entries
+        report("batched send_log", bench_batched(stub, args.logs))
+        print(f"batched run delivered {stub.entries - entries_before}/{args.logs} entries "
+              f"in {stub.pushes - pushes_before} pushes")
+    finally:
+        stub.close()
+
+
+if __name__ == "__main__":
+    main()
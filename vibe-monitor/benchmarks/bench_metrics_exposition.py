@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Measure /metrics scrape latency, CPU per scrape and event-loop stall with
+thousands of registered series, comparing:
+
+  uncached      generate_latest() on the event loop for every scrape (old)
+  cache miss    MetricsExpositionCache rendering in the threadpool
+  cache hit     MetricsExpositionCache reusing the last rendering
+  openmetrics   cache miss with an OpenMetrics Accept header
+  gzip miss     cache miss plus gzip compression
+
+Usage:
+    python benchmarks/bench_metrics_exposition.py --series 5000 --scrapes 20
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+from prometheus_client import CollectorRegistry, Counter, Histogram, generate_latest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from metrics_exposition import MetricsExpositionCache  # noqa: E402
+
+OPENMETRICS = "application/openmetrics-text; version=1.0.0"
+
+
+def build_registry(series):
+    """Counters for `series` label sets plus histograms for a tenth of them"""
+    registry = CollectorRegistry()
+    counter = Counter("bench_requests_total", "Benchmark counter", ["endpoint", "status"], registry=registry)
+    histogram = Histogram("bench_request_duration_seconds", "Benchmark histogram", ["endpoint"], registry=registry)
+    for i in range(series):
+        counter.labels(endpoint=f"/route/{i}", status=str(200 + i % 5)).inc(i)
+    for i in range(max(1, series // 10)):
+        histogram.labels(endpoint=f"/route/{i}").observe(i / 1000)
+    return registry
+
+
+async def loop_stall(scrape, scrapes):
+    """Run `scrapes` scrapes while a 1ms ticker measures the worst loop stall"""
+    worst = 0.0
+    running = True
+
+    async def ticker():
+        nonlocal worst
+        last = time.perf_counter()
+        while running:
+            await asyncio.sleep(0.001)
+            now = time.perf_counter()
+            worst = max(worst, now - last - 0.001)
+            last = now
+
+    task = asyncio.create_task(ticker())
+    wall, cpu, size = [], [], 0
+    for _ in range(scrapes):
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        size = len(await scrape())
+        wall.append(time.perf_counter() - wall_start)
+        cpu.append(time.process_time() - cpu_start)
+        await asyncio.sleep(0.002)
+    running = False
+    await task
+    return wall, cpu, worst, size
+
+
+def report(name, wall, cpu, stall, size):
+    print(f"{name:<12} p50={statistics.median(wall) * 1000:8.2f}ms  max={max(wall) * 1000:8.2f}ms  "
+          f"cpu/scrape={statistics.mean(cpu) * 1000:8.2f}ms  loop stall={stall * 1000:8.2f}ms  "
+          f"body={size / 1024:8.1f}KiB")
+
+
+async def run(series, scrapes):
+    registry = build_registry(series)
+    samples = len(generate_latest(registry).splitlines())
+    print(f"{series} counter series + {max(1, series // 10)} histograms, "
+          f"{samples} exposition lines, {scrapes} scrapes per case\n")
+
+    async def uncached():
+        return generate_latest(registry)
+
+    def fresh_cache():
+        # min_interval=0 and no change tracking: every scrape is a miss
+        return MetricsExpositionCache(lambda: registry, min_interval=0, track_changes=False)
+
+    miss_cache = fresh_cache()
+    hit_cache = MetricsExpositionCache(lambda: registry, min_interval=3600)
+    openmetrics_cache = fresh_cache()
+    gzip_cache = fresh_cache()
+
+    async def miss():
+        return (await miss_cache.expose())[0]
+
+    async def hit():
+        return (await hit_cache.expose())[0]
+
+    async def openmetrics():
+        return (await openmetrics_cache.expose(accept=OPENMETRICS))[0]
+
+    async def gzip_miss():
+        return (await gzip_cache.expose(accept_encoding="gzip"))[0]
+
+    await hit()  # prime the cache
+    for name, scrape in (("uncached", uncached), ("cache miss", miss), ("cache hit", hit),
+                         ("openmetrics", openmetrics), ("gzip miss", gzip_miss)):
+        report(name, *await loop_stall(scrape, scrapes))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="/metrics exposition benchmark")
+    parser.add_argument("--series", type=int, default=5000, help="counter label sets to register")
+    parser.add_argument("--scrapes", type=int, default=20, help="scrapes per case")
+    args = parser.parse_args()
+    asyncio.run(run(args.series, args.scrapes))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Latency and throughput of the /api/nav endpoints.
+
+Two levels are measured on the AMFI NAV data (affinity-answers'
+amfi_nav_data.json by default):
+
+  index   NavIndex operations alone, µs per call, next to a linear scan of
+          the records for the same answer
+  app     requests through app.py in-process over raw ASGI (the full
+          middleware, metrics, tracing and Loki path, as in
+          bench_request_path.py), one at a time: requests/s, p50 and p99
+
+App requests pick a random scheme code / ISIN / fund house each time, so
+they are not served from one hot entry. "304" requests send the ETag back
+in If-None-Match; "gzip" requests ask for a 500-row page compressed.
+--scenario takes bench_request_path.py's scenarios, e.g. "bare" to see what
+the endpoints cost without the telemetry every route pays for.
+
+Usage:
+    python benchmarks/bench_nav_api.py --requests 3000
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, ".."))
+sys.path.insert(0, BENCH_DIR)
+
+from latency_histogram import LatencyHistogram  # noqa: E402
+from nav_index import NavIndex, read_records  # noqa: E402
+
+DEFAULT_DATA = os.path.join(BENCH_DIR, "..", "..", "affinity-answers", "amfi_nav_data.json")
+
+
+def per_call(fn, args, repeat=3):
+    """Best mean seconds per call of fn(arg) over `args`"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for arg in args:
+            fn(arg)
+        best = min(best, (time.perf_counter() - start) / len(args))
+    return best
+
+
+def bench_index(index, records, codes, isins, houses, scans):
+    load = min(per_call(lambda path: NavIndex.load(path), [index.source], repeat=1) for _ in range(3))
+    print(f"{len(index)} schemes, index built in {load * 1000:.0f}ms\n")
+    print(f"{'index operation':<28}{'index µs':>10}{'scan µs':>10}")
+    rows = [
+        ("scheme by code", per_call(index.by_code, codes),
+         per_call(lambda code: next(r for r in records if int(r["scheme_code"]) == code), codes[:scans], 1)),
+        ("schemes by ISIN", per_call(index.by_isin, isins),
+         per_call(lambda isin: [r for r in records if isin in (r["isin_growth"], r["isin_reinvestment"])],
+                  isins[:scans], 1)),
+        ("fund house search", per_call(lambda house: index.search(fund_house=house), houses),
+         per_call(lambda house: [r for r in records if r["scheme_name"].lower().startswith(house.lower())],
+                  houses[:scans], 1)),
+        ("NAV 100-500 search", per_call(lambda _: index.search(min_nav=100, max_nav=500), range(200)),
+         per_call(lambda _: [r for r in records if 100 <= float(r["asset_value"]) <= 500], range(scans), 1)),
+        ("house + NAV >= 100 search", per_call(lambda house: index.search(house, 100), houses), None),
+        ("code lookup body", per_call(lambda code: index.record_body(index.by_code(code)), codes), None),
+    ]
+    for name, indexed, scan in rows:
+        print(f"{name:<28}{indexed * 1e6:10.2f}{'' if scan is None else f'{scan * 1e6:10.0f}'}")
+
+
+async def bench_app(app, paths, headers, warmup):
+    from bench_request_path import asgi_get
+
+    for path in paths[:warmup]:
+        await asgi_get(app, path, headers)
+    histogram = LatencyHistogram()
+    statuses = set()
+    started = time.perf_counter()
+    for path in paths:
+        request_start = time.perf_counter()
+        statuses.add(await asgi_get(app, path, headers))
+        histogram.record(time.perf_counter() - request_start)
+    elapsed = time.perf_counter() - started
+    percentiles = histogram.percentiles((50.0, 99.0))
+    return len(paths) / elapsed, percentiles[50.0] * 1e6, percentiles[99.0] * 1e6, statuses
+
+
+def main():
+    parser = argparse.ArgumentParser(description="NAV API benchmark")
+    parser.add_argument("--data", default=DEFAULT_DATA, help="amfi_nav_data.json or .tsv")
+    parser.add_argument("--lookups", type=int, default=20000, help="index calls per operation")
+    parser.add_argument("--scans", type=int, default=100, help="calls for the linear scans (they are slow)")
+    parser.add_argument("--requests", type=int, default=3000, help="app requests per endpoint")
+    parser.add_argument("--warmup", type=int, default=200, help="untimed app requests per endpoint")
+    parser.add_argument("--scenario", default="full", help="bench_request_path.py scenario for the app (default full)")
+    args = parser.parse_args()
+
+    data = os.path.abspath(args.data)
+    records, _ = read_records(data)
+    index = NavIndex.load(data)
+    rng = random.Random(7)
+    codes = [int(rng.choice(records)["scheme_code"]) for _ in range(args.lookups)]
+    isins = [isin for isin in (rng.choice(records)["isin_growth"] for _ in range(args.lookups)) if isin != "-"]
+    houses = [" ".join(rng.choice(records)["scheme_name"].split()[:2]) for _ in range(args.lookups // 10)]
+    bench_index(index, records, codes, isins, houses, args.scans)
+
+    os.environ["NAV_DATA_PATH"] = data
+    from bench_request_path import SCENARIOS, load_app
+
+    app_module, stub = load_app(SCENARIOS[args.scenario])
+    app_module.load_nav_index()
+    n = args.requests
+    endpoints = [
+        ("/api/nav/schemes/{code}", [f"/api/nav/schemes/{code}" for code in codes[:n]], ()),
+        ("/api/nav/isin/{isin}", [f"/api/nav/isin/{isin}" for isin in isins[:n]], ()),
+        ("/api/nav/schemes?fund_house", [f"/api/nav/schemes?fund_house={house.replace(' ', '+')}"
+                                         for house in (houses * (n // len(houses) + 1))[:n]], ()),
+        ("/api/nav/schemes?min/max_nav", [f"/api/nav/schemes?min_nav={low}&max_nav={low * 2}&page=2"
+                                          for low in (rng.randint(10, 1000) for _ in range(n))], ()),
+        ("  ...page_size=500 gzip", ["/api/nav/schemes?page_size=500"] * n, [(b"accept-encoding", b"gzip")]),
+        ("/api/nav/schemes/{code} 304", [f"/api/nav/schemes/{code}" for code in codes[:n]],
+         [(b"if-none-match", index.etag.encode())]),
+    ]
+    print(f"\n{'app endpoint (' + args.scenario + ')':<32}{'req/s':>8}{'p50 µs':>9}{'p99 µs':>9}  status")
+    for name, paths, headers in endpoints:
+        throughput, p50, p99, statuses = asyncio.run(bench_app(app_module.app, paths, headers, args.warmup))
+        print(f"{name:<32}{throughput:8.0f}{p50:9.0f}{p99:9.0f}  {','.join(map(str, sorted(statuses)))}")
+    if stub is not None:
+        app_module.loki_client.stop()
+        stub.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Per-request cost of the observability stack on the vibe-monitor request path.
+
+app.py is driven in-process through raw ASGI calls, with zero-duration work
+models, Loki pointed at a local stub (bench_loki_shipping.StubLoki) and spans
+exported to a discarding exporter, so what is measured is the middleware,
+framework and telemetry overhead of one request, one request at a time.
+
+Each scenario runs in a fresh interpreter (a tracer provider can only be
+installed once per process) with one component switched off:
+
+  full            everything on
+  no_prometheus   request counters/histograms and label limiters stubbed out
+  no_tracing      no tracer provider installed (OTel API no-ops)
+  no_loki         send_log() is a no-op and no flusher thread runs
+  no_logging      stdlib logging below WARNING disabled
+  bare            all of the above off: FastAPI plus the middleware shell
+
+The cost of a component is how much faster a request gets without it.
+
+Results can be saved as a baseline and later runs compared against it; the
+script exits with status 1 when any endpoint's throughput drops, or its
+median latency rises, by more than --threshold. Baselines are only
+comparable on the machine that recorded them.
+
+Usage:
+    python benchmarks/bench_request_path.py --save-baseline
+    python benchmarks/bench_request_path.py --threshold 0.3
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, ".."))
+
+from latency_histogram import LatencyHistogram  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baselines", "request_path.json")
+ENDPOINTS = ["/", "/health", "/api/vibe", "/api/slow", "/metrics"]
+COMPONENTS = ["prometheus", "tracing", "loki", "logging"]
+SCENARIOS = {"full": set(), "bare": set(COMPONENTS)}
+SCENARIOS.update({f"no_{component}": {component} for component in COMPONENTS})
+
+
+class _NullMetric:
+    def labels(self, *args, **kwargs):
+        return self
+
+    def inc(self, amount=1):
+        pass
+
+    def observe(self, amount):
+        pass
+
+
+class _NullLimiter:
+    def limit(self, *values):
+        return values
+
+
+async def asgi_get(app, path, headers=()):
+    """Send one GET (path may carry a ?query) through the ASGI app and return the status code"""
+    path, _, query = path.partition("?")
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": [(b"host", b"bench"), (b"accept", b"*/*"), *headers],
+        "client": ("127.0.0.1", 50000),
+        "server": ("bench", 80),
+    }
+    status = None
+    finished = asyncio.Event()
+    request_sent = False
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await finished.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body" and not message.get("more_body"):
+            finished.set()
+
+    await app(scope, receive, send)
+    return status
+
+
+def load_app(disabled):
+    """Import app.py with `disabled` components stubbed and the rest pointed at stubs"""
+    from bench_loki_shipping import StubLoki
+
+    stub = None
+    if "loki" not in disabled:
+        stub = StubLoki(delay=0)
+        os.environ["LOKI_URL"] = stub.url
+    os.environ.pop("LOKI_SPOOL_DIR", None)
+    os.environ.pop("PROMETHEUS_MULTIPROC_DIR", None)
+
+    import app as app_module
+    from opentelemetry import trace
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor, SpanExporter, SpanExportResult
+
+    # Keep log formatting on the path but write it nowhere
+    for handler in logging.root.handlers:
+        handler.setStream(open(os.devnull, "w"))
+
+    async def no_work(endpoint, duration):
+        return None
+
+    app_module.simulate_work = no_work
+
+    if "prometheus" in disabled:
+        app_module.REQUEST_COUNT = app_module.REQUEST_LATENCY = _NullMetric()
+        limiter = _NullLimiter()
+        app_module.REQUEST_COUNT_LABELS = app_module.REQUEST_LATENCY_LABELS = limiter
+        app_module.METRICS_CACHE.mark_changed = lambda: None
+
+    if "tracing" not in disabled:
+        class DiscardExporter(SpanExporter):
+            def export(self, spans):
+                return SpanExportResult.SUCCESS
+
+        provider = TracerProvider()
+        provider.add_span_processor(BatchSpanProcessor(DiscardExporter()))
+        trace.set_tracer_provider(provider)
+
+    if "loki" in disabled:
+        app_module.loki_client.send_log = lambda *args, **kwargs: None
+    else:
+        app_module.loki_client.start()
+
+    if "logging" in disabled:
+        logging.disable(logging.INFO)
+
+    return app_module, stub
+
+
+async def measure(app, path, iterations, warmup, rounds):
+    """Best of `rounds` runs of `iterations` sequential requests to `path`"""
+    for _ in range(warmup):
+        await asgi_get(app, path)
+    best = None
+    for _ in range(rounds):
+        histogram = LatencyHistogram()
+        started = time.perf_counter()
+        for _ in range(iterations):
+            request_start = time.perf_counter()
+            await asgi_get(app, path)
+            histogram.record(time.perf_counter() - request_start)
+        elapsed = time.perf_counter() - started
+        if best is None or elapsed < best[0]:
+            best = (elapsed, histogram)
+    elapsed, histogram = best
+    percentiles = histogram.percentiles((50.0, 99.0))
+    return {
+        "throughput": iterations / elapsed,
+        "mean_us": elapsed / iterations * 1_000_000,
+        "p50_us": percentiles[50.0] * 1_000_000,
+        "p99_us": percentiles[99.0] * 1_000_000,
+    }
+
+
+def run_scenario(scenario, iterations, warmup, rounds):
+    """Worker entry point: measure every endpoint for one scenario"""
+    app_module, stub = load_app(SCENARIOS[scenario])
+    # Same error/sample decisions (e.g. /api/vibe's random 500s) in every run
+    random.seed(0)
+
+    async def run_all():
+        return {path: await measure(app_module.app, path, iterations, warmup, rounds) for path in ENDPOINTS}
+
+    results = asyncio.run(run_all())
+    if stub is not None:
+        app_module.loki_client.stop()
+        stub.close()
+    return results
+
+
+def spawn_scenario(scenario, args):
+    command = [sys.executable, os.path.abspath(__file__), "--worker", scenario,
+               "--iterations", str(args.iterations), "--warmup", str(args.warmup), "--rounds", str(args.rounds)]
+    output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def report(results):
+    full, bare = results["full"], results["bare"]
+    print(f"\n{'per request (µs)':<12}{'full':>10}{'bare':>10}" +
+          "".join(f"{component:>12}" for component in COMPONENTS) + f"{'full req/s':>12}")
+    for path in ENDPOINTS:
+        costs = "".join(f"{full[path]['mean_us'] - results[f'no_{c}'][path]['mean_us']:12.1f}" for c in COMPONENTS)
+        print(f"{path:<12}{full[path]['mean_us']:10.1f}{bare[path]['mean_us']:10.1f}{costs}"
+              f"{full[path]['throughput']:12.0f}")
+    print("\ncomponent columns: mean µs saved per request when that component is off")
+
+
+def compare(results, baseline, threshold):
+    """Return a list of regressions against `baseline` beyond `threshold`"""
+    regressions = []
+    for scenario, endpoints in baseline["results"].items():
+        for path, base in endpoints.items():
+            current = results.get(scenario, {}).get(path)
+            if current is None:
+                continue
+            if current["throughput"] < base["throughput"] * (1 - threshold):
+                regressions.append(f"{scenario} {path}: throughput {current['throughput']:.0f} req/s "
+                                   f"vs baseline {base['throughput']:.0f} req/s")
+            if current["p50_us"] > base["p50_us"] * (1 + threshold):
+                regressions.append(f"{scenario} {path}: p50 {current['p50_us']:.1f}µs "
+                                   f"vs baseline {base['p50_us']:.1f}µs")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="vibe-monitor request path benchmark")
+    parser.add_argument("--iterations", type=int, default=2000, help="requests per endpoint per round")
+    parser.add_argument("--warmup", type=int, default=200, help="untimed requests per endpoint")
+    parser.add_argument("--rounds", type=int, default=5, help="timed rounds per endpoint, best one kept")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="comma-separated scenarios to run")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline JSON file")
+    parser.add_argument("--save-baseline", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.3,
+                        help="allowed relative throughput drop / p50 rise before failing (default 0.3)")
+    parser.add_argument("--json", metavar="PATH", help="also write the results to PATH")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_scenario(args.worker, args.iterations, args.warmup, args.rounds)))
+        return 0
+
+    scenarios = args.scenarios.split(",")
+    results = {}
+    for scenario in scenarios:
+        print(f"running {scenario}...", flush=True)
+        results[scenario] = spawn_scenario(scenario, args)
+    if "full" in results and "bare" in results and all(f"no_{c}" in results for c in COMPONENTS):
+        report(results)
+
+    document = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "iterations": args.iterations,
+        "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "results": results,
+    }
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(document, f, indent=2)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(document, f, indent=2)
+        print(f"\nbaseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"\nno baseline at {args.baseline}; run with --save-baseline to record one")
+        return 0
+    with open(args.baseline) as f:
+        regressions = compare(results, json.load(f), args.threshold)
+    if regressions:
+        print(f"\nREGRESSIONS beyond {args.threshold:.0%}:")
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1
+    print(f"\nno regressions beyond {args.threshold:.0%} against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
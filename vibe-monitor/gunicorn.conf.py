@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+"""
+Gunicorn config for running the Vibe Monitor API across several cores:
+
+    gunicorn -c gunicorn.conf.py app:app
+
+Each worker is a uvicorn worker that imports app.py after the fork, so its
+tracer provider, Loki flusher thread and Prometheus metric files are its
+own; /metrics aggregates all workers through PROMETHEUS_MULTIPROC_DIR.
+"""
+import os
+
+from multiprocess_metrics import prepare_multiprocess_dir
+
+bind = f"{os.getenv('HOST', '0.0.0.0')}:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WORKERS", str(os.cpu_count() or 1)))
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# Workers must import the app themselves: telemetry threads don't survive a fork
+preload_app = False
+
+# Export PROMETHEUS_MULTIPROC_DIR in the master before any worker is forked
+prepare_multiprocess_dir()
+
+# Only safe to import once the directory is exported. Imported here rather than
+# in child_exit, which runs from a SIGCHLD handler and can re-enter the import.
+from prometheus_client import multiprocess  # noqa: E402
+
+
+def child_exit(server, worker):
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""
+Compact log-linear latency histogram in the style of HdrHistogram.
+
+Latencies are recorded in microseconds. Values below 2**SUB_BUCKET_BITS are
+counted exactly; above that every power-of-two range is split into
+2**(SUB_BUCKET_BITS - 1) linear sub-buckets, so any recorded value is
+reported within 1 / 2**(SUB_BUCKET_BITS - 1) (~0.8%) of its true value no
+matter how large. Only non-empty buckets are stored, which keeps a
+histogram of millions of samples to a few hundred entries; histograms merge
+by adding counts and serialise to JSON for comparing runs.
+"""
+SUB_BUCKET_BITS = 8
+SUB_BUCKET_COUNT = 1 << SUB_BUCKET_BITS
+HALF_SUB_BUCKET_COUNT = SUB_BUCKET_COUNT >> 1
+
+DEFAULT_PERCENTILES = (50.0, 90.0, 99.0, 99.9)
+
+
+def bucket_index(value):
+    """Bucket holding the non-negative integer `value`"""
+    if value < SUB_BUCKET_COUNT:
+        return value
+    shift = value.bit_length() - SUB_BUCKET_BITS
+    return SUB_BUCKET_COUNT + (shift - 1) * HALF_SUB_BUCKET_COUNT + (value >> shift) - HALF_SUB_BUCKET_COUNT
+
+
+def bucket_range(index):
+    """Lowest and highest value counted in bucket `index`"""
+    if index < SUB_BUCKET_COUNT:
+        return index, index
+    shift, offset = divmod(index - SUB_BUCKET_COUNT, HALF_SUB_BUCKET_COUNT)
+    shift += 1
+    top = offset + HALF_SUB_BUCKET_COUNT
+    return top << shift, ((top + 1) << shift) - 1
+
+
+class LatencyHistogram:
+    def __init__(self):
+        self.counts = {}
+        self.total = 0
+        self.min_us = None
+        self.max_us = 0
+        self.sum_us = 0
+
+    def record(self, seconds):
+        """Record one latency given in seconds"""
+        value = max(0, int(seconds * 1_000_000))
+        index = bucket_index(value)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.total += 1
+        self.sum_us += value
+        if value > self.max_us:
+            self.max_us = value
+        if self.min_us is None or value < self.min_us:
+            self.min_us = value
+
+    def merge(self, other):
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.total += other.total
+        self.sum_us += other.sum_us
+        self.max_us = max(self.max_us, other.max_us)
+        if other.min_us is not None and (self.min_us is None or other.min_us < self.min_us):
+            self.min_us = other.min_us
+        return self
+
+    def percentiles(self, percentiles=DEFAULT_PERCENTILES):
+        """Map each percentile to a latency in seconds (highest equivalent value)"""
+        results = {}
+        if not self.total:
+            return {p: 0.0 for p in percentiles}
+        ordered = sorted(self.counts.items())
+        for percentile in percentiles:
+            # Rank of the sample at this percentile, 1-based, as HdrHistogram counts it
+            rank = max(1, int(percentile / 100 * self.total + 0.5))
+            seen = 0
+            for index, count in ordered:
+                seen += count
+                if seen >= rank:
+                    results[percentile] = min(bucket_range(index)[1], self.max_us) / 1_000_000
+                    break
+        return results
+
+    def mean(self):
+        return self.sum_us / self.total / 1_000_000 if self.total else 0.0
+
+    def to_dict(self, percentiles=DEFAULT_PERCENTILES):
+        """JSON-ready summary plus the sparse bucket counts"""
+        summary = {
+            "count": self.total,
+            "min": (self.min_us or 0) / 1_000_000,
+            "mean": self.mean(),
+            "max": self.max_us / 1_000_000,
+        }
+        for percentile, value in self.percentiles(percentiles).items():
+            summary[f"p{percentile:g}"] = value
+        summary["buckets"] = {str(index): count for index, count in sorted(self.counts.items())}
+        return summary
+
+    @classmethod
+    def from_dict(cls, data):
+        histogram = cls()
+        histogram.counts = {int(index): count for index, count in data["buckets"].items()}
+        histogram.total = data["count"]
+        histogram.sum_us = int(data["mean"] * data["count"] * 1_000_000)
+        histogram.max_us = int(data["max"] * 1_000_000)
+        histogram.min_us = int(data["min"] * 1_000_000) if data["count"] else None
+        return histogram
@@ -0,0 +1,534 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Asyncio load generator for the Vibe Monitor API.
+
+Two modes:
+  open    constant arrival rate: requests are started on schedule whether or
+          not earlier ones have finished (models independent clients)
+  closed  N virtual users, each sending its next request only after the
+          previous one completed plus an optional think time
+
+The target (requests/second for open, users for closed) follows a ramp
+schedule of stages, each ramping linearly from the previous target, e.g.
+`--stages 10s:100,1m:2000,10s:0`. Endpoints are picked from a weighted mix
+over ENDPOINTS. Requests go through a pooled keep-alive HTTP/1.1 client, so
+a single process can drive thousands of requests per second.
+
+Latencies go into HDR-style histograms (latency_histogram.py) per endpoint
+and status; p50/p90/p99/p99.9, throughput and error rate are logged every
+--report-interval seconds and summarised at the end, and --json writes the
+results for comparing runs. Open-loop latencies are measured from when each
+request was scheduled, not when it was sent, so a stalled server cannot hide
+the queueing it caused (coordinated omission).
+
+Examples:
+    python loadgen.py --mode open --rate 2000 --duration 60 --ramp-up 10
+    python loadgen.py --mode closed --users 200 --duration 60 --mix "/health=4,/api/vibe=1"
+    python loadgen.py --mode open --stages 30s:500,1m:500,30s:3000
+"""
+import argparse
+import asyncio
+import bisect
+import json
+import logging
+import random
+import re
+import ssl
+import time
+from urllib.parse import urlsplit
+
+from latency_histogram import DEFAULT_PERCENTILES, LatencyHistogram
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+BASE_URL = "http://localhost:8000"
+ENDPOINTS = [
+    "/",
+    "/health",
+    "/api/vibe",
+    "/api/slow"
+]
+
+DURATION_PATTERN = re.compile(r"^(\d+(?:\.\d+)?)(ms|s|m|h)?$")
+DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600, None: 1}
+
+
+class HTTPPool:
+    """Minimal keep-alive HTTP/1.1 GET client with a bounded connection pool"""
+
+    def __init__(self, base_url, max_connections=100, timeout=10.0):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == "https" else 80)
+        self.ssl = ssl.create_default_context() if parts.scheme == "https" else None
+        self.timeout = timeout
+        self.connections_opened = 0
+        self._host_header = parts.netloc.encode()
+        self._idle = []
+        self._slots = asyncio.Semaphore(max_connections)
+
+    async def _connect(self):
+        self.connections_opened += 1
+        return await asyncio.open_connection(self.host, self.port, ssl=self.ssl)
+
+    async def _roundtrip(self, connection, path):
+        reader, writer = connection
+        writer.write(b"GET " + path.encode() + b" HTTP/1.1\r\nHost: " + self._host_header +
+                     b"\r\nUser-Agent: vibe-loadgen\r\nAccept: */*\r\n\r\n")
+        head = await reader.readuntil(b"\r\n\r\n")
+        lines = head.split(b"\r\n")
+        status = int(lines[0].split(b" ", 2)[1])
+
+        headers = {}
+        for line in lines[1:]:
+            name, _, value = line.partition(b":")
+            if name:
+                headers[name.strip().lower()] = value.strip().lower()
+
+        keep_alive = headers.get(b"connection") != b"close"
+        if b"content-length" in headers:
+            await reader.readexactly(int(headers[b"content-length"]))
+        elif headers.get(b"transfer-encoding") == b"chunked":
+            while True:
+                size = int((await reader.readline()).split(b";")[0], 16)
+                if size == 0:
+                    while await reader.readline() not in (b"\r\n", b""):
+                        pass
+                    break
+                await reader.readexactly(size + 2)
+        elif status not in (204, 304) and not 100 <= status < 200:
+            await reader.read()
+            keep_alive = False
+        return status, keep_alive
+
+    async def get(self, path):
+        """GET `path` and return (status, time sent); raises on network errors"""
+        async with self._slots:
+            sent_at = time.perf_counter()
+            for attempt in (0, 1):
+                reused = bool(self._idle)
+                connection = self._idle.pop() if reused else await self._connect()
+                try:
+                    status, keep_alive = await asyncio.wait_for(self._roundtrip(connection, path), self.timeout)
+                except (ConnectionError, asyncio.IncompleteReadError) as e:
+                    connection[1].close()
+                    if reused and attempt == 0:
+                        continue  # the server closed an idle keep-alive connection
+                    raise e
+                except BaseException:
+                    connection[1].close()
+                    raise
+                if keep_alive:
+                    self._idle.append(connection)
+                else:
+                    connection[1].close()
+                return status, sent_at
+
+    async def close(self):
+        while self._idle:
+            self._idle.pop()[1].close()
+
+
+def parse_duration(text):
+    match = DURATION_PATTERN.match(text.strip())
+    if not match:
+        raise ValueError(f"Invalid duration {text!r}, expected e.g. 500ms, 30s, 2m")
+    return float(match.group(1)) * DURATION_UNITS[match.group(2)]
+
+
+def parse_stages(spec):
+    """Parse "30s:100,1m:500" into [(30.0, 100.0), (60.0, 500.0)]"""
+    stages = []
+    for part in spec.split(","):
+        duration, _, target = part.partition(":")
+        stages.append((parse_duration(duration), float(target)))
+    return stages
+
+
+def parse_mix(spec):
+    """Parse "/health=4,/api/vibe=1" into ([paths], [weights])"""
+    if not spec:
+        return list(ENDPOINTS), [1.0] * len(ENDPOINTS)
+    paths, weights = [], []
+    for part in spec.split(","):
+        path, _, weight = part.partition("=")
+        paths.append(path.strip())
+        weights.append(float(weight) if weight else 1.0)
+    return paths, weights
+
+
+class Schedule:
+    """Piecewise-linear target over time built from ramp stages"""
+
+    def __init__(self, stages, initial=0.0):
+        self.stages = stages
+        self.initial = initial
+        self.duration = sum(duration for duration, _ in stages)
+
+    def target_at(self, elapsed):
+        """Target at `elapsed` seconds, or None once the schedule is over"""
+        start_value = self.initial
+        for duration, target in self.stages:
+            if elapsed < duration:
+                return start_value + (target - start_value) * (elapsed / duration)
+            elapsed -= duration
+            start_value = target
+        return None
+
+
+def is_error(status):
+    return status == "error" or status >= 500
+
+
+class LoadStats:
+    """
+    Latency histograms per (endpoint, status); status is "error" for network
+    failures. `response` histograms hold the latency users saw: for open-loop
+    runs it is measured from when the request was scheduled to start, so time
+    spent queued behind a stalled server or client counts (coordinated-omission
+    correction). `service` histograms hold the time from writing the request on
+    a pooled connection to the response.
+    """
+
+    def __init__(self):
+        self.response = {}
+        self.service = {}
+        self.completed = 0
+        self.errors = 0
+        self.skipped = 0
+        self.elapsed = 0.0
+        self.intervals = []
+
+        self._interval = LatencyHistogram()
+        self._interval_errors = 0
+        self._started = self._interval_started = time.perf_counter()
+
+    def start(self):
+        """Start the clock for the first reporting interval"""
+        self._started = self._interval_started = time.perf_counter()
+
+    def record(self, endpoint, status, service_time, response_time):
+        key = (endpoint, status)
+        if key not in self.response:
+            self.response[key] = LatencyHistogram()
+            self.service[key] = LatencyHistogram()
+        self.response[key].record(response_time)
+        self.service[key].record(service_time)
+        self._interval.record(response_time)
+        self.completed += 1
+        if is_error(status):
+            self.errors += 1
+            self._interval_errors += 1
+
+    def roll_interval(self, final=False):
+        """Close the current reporting interval and return its summary"""
+        histogram = self._interval
+        if final and not histogram.total:
+            return None
+        now = time.perf_counter()
+        elapsed = now - self._interval_started or 1e-9
+        summary = {
+            "end": round(now - self._started, 3),
+            "duration": round(elapsed, 3),
+            "requests": histogram.total,
+            "throughput": histogram.total / elapsed,
+            "error_rate": self._interval_errors / histogram.total if histogram.total else 0.0,
+        }
+        summary.update({f"p{p:g}": v for p, v in histogram.percentiles().items()})
+        self.intervals.append(summary)
+        self._interval = LatencyHistogram()
+        self._interval_errors = 0
+        self._interval_started = now
+        return summary
+
+    def overall(self, kind="response"):
+        merged = LatencyHistogram()
+        for histogram in getattr(self, kind).values():
+            merged.merge(histogram)
+        return merged
+
+    def to_dict(self):
+        """Machine-readable results, e.g. for comparing runs"""
+        elapsed = self.elapsed or 1e-9
+        return {
+            "elapsed": self.elapsed,
+            "requests": self.completed,
+            "throughput": self.completed / elapsed,
+            "errors": self.errors,
+            "error_rate": self.errors / self.completed if self.completed else 0.0,
+            "skipped": self.skipped,
+            "response_time": self.overall("response").to_dict(),
+            "service_time": self.overall("service").to_dict(),
+            "endpoints": [
+                {
+                    "endpoint": endpoint,
+                    "status": status,
+                    "response_time": self.response[(endpoint, status)].to_dict(),
+                    "service_time": self.service[(endpoint, status)].to_dict(),
+                }
+                for endpoint, status in sorted(self.response, key=lambda key: (key[0], str(key[1])))
+            ],
+            "intervals": self.intervals,
+        }
+
+
+class LoadEngine:
+    def __init__(self, base_url=BASE_URL, mode="open", schedule=None, mix=None, max_connections=200,
+                 timeout=10.0, think_time=(0.0, 0.0), max_requests=None, max_in_flight=10000,
+                 report_interval=5.0, stats=None):
+        if mode not in ("open", "closed"):
+            raise ValueError(f"Unknown mode {mode!r}, expected 'open' or 'closed'")
+        self.base_url = base_url
+        self.mode = mode
+        self.schedule = schedule
+        self.paths, weights = mix or parse_mix(None)
+        self.cum_weights = []
+        total = 0.0
+        for weight in weights:
+            total += weight
+            self.cum_weights.append(total)
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.think_time = think_time
+        self.max_requests = max_requests
+        self.max_in_flight = max_in_flight
+        self.report_interval = report_interval
+        self.stats = stats or LoadStats()
+
+        self.pool = None
+        self._issued = 0
+        self._in_flight = set()
+        self._started_at = None
+        self._stopping = False
+        self._thinking = set()
+
+    def _choose_path(self):
+        return self.paths[bisect.bisect(self.cum_weights, random.random() * self.cum_weights[-1])]
+
+    def _budget_left(self):
+        if self._stopping:
+            return False
+        return self.max_requests is None or self._issued < self.max_requests
+
+    async def _request(self, path, intended_start=None):
+        start = time.perf_counter()
+        try:
+            status, sent_at = await self.pool.get(path)
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError) as e:
+            logger.debug(f"Request to {path} failed: {e!r}")
+            status, sent_at = "error", start
+        end = time.perf_counter()
+        self.stats.record(path, status, end - sent_at, end - (intended_start or start))
+
+    async def _open_loop(self, loop):
+        # Arrival credits accumulate at the current rate; one request per credit
+        credits = 0.0
+        last = self._started_at
+        while self._budget_left():
+            now = loop.time()
+            rate = self.schedule.target_at(now - self._started_at)
+            if rate is None:
+                break
+            credits += rate * (now - last)
+            last = now
+            while credits >= 1 and self._budget_left():
+                credits -= 1
+                # When this request should have started, for latency correction
+                intended = time.perf_counter() - (credits / rate if rate > 0 else 0.0)
+                if len(self._in_flight) >= self.max_in_flight:
+                    self.stats.skipped += 1
+                    continue
+                self._issued += 1
+                task = loop.create_task(self._request(self._choose_path(), intended))
+                self._in_flight.add(task)
+                task.add_done_callback(self._in_flight.discard)
+            wait = (1 - credits) / rate if rate > 0 else 0.01
+            await asyncio.sleep(min(max(wait, 0.0005), 0.01))
+
+    async def _virtual_user(self):
+        low, high = self.think_time
+        while self._budget_left():
+            self._issued += 1
+            await self._request(self._choose_path())
+            if high > 0 and self._budget_left():
+                task = asyncio.current_task()
+                self._thinking.add(task)
+                try:
+                    await asyncio.sleep(random.uniform(low, high))
+                finally:
+                    self._thinking.discard(task)
+
+    async def _closed_loop(self, loop):
+        users = []
+        while True:
+            target = self.schedule.target_at(loop.time() - self._started_at)
+            if target is None:
+                break
+            users = [user for user in users if not user.done()]
+            if not self._budget_left() and not users:
+                break
+            wanted = int(round(target))
+            while len(users) < wanted and self._budget_left():
+                users.append(loop.create_task(self._virtual_user()))
+            while len(users) > wanted:
+                users.pop().cancel()
+            await asyncio.sleep(0.05)
+        # Users finish their current request and exit
+        self._stopping = True
+        for user in list(self._thinking):
+            user.cancel()
+        self._in_flight.update(user for user in users if not user.done())
+
+    async def _reporter(self):
+        while True:
+            await asyncio.sleep(self.report_interval)
+            interval = self.stats.roll_interval()
+            logger.info(f"[{interval['end']:7.1f}s] {interval['throughput']:8.1f} req/s  "
+                        f"errors {interval['error_rate']:6.2%}  p50 {interval['p50'] * 1000:7.1f}ms  "
+                        f"p99 {interval['p99'] * 1000:7.1f}ms  p99.9 {interval['p99.9'] * 1000:7.1f}ms  "
+                        f"{len(self._in_flight)} in flight")
+
+    async def run(self):
+        """Run the schedule to completion and return the LoadStats"""
+        loop = asyncio.get_running_loop()
+        self.pool = HTTPPool(self.base_url, max_connections=self.max_connections, timeout=self.timeout)
+        self._started_at = loop.time()
+        self.stats.start()
+        reporter = loop.create_task(self._reporter()) if self.report_interval else None
+        try:
+            if self.mode == "open":
+                await self._open_loop(loop)
+            else:
+                await self._closed_loop(loop)
+            if self._in_flight:
+                # Let in-flight requests finish, but not beyond the request timeout
+                done, pending = await asyncio.wait(set(self._in_flight), timeout=self.timeout)
+                for task in pending:
+                    task.cancel()
+        finally:
+            if reporter:
+                reporter.cancel()
+            await self.pool.close()
+        self.stats.elapsed = loop.time() - self._started_at
+        if self.report_interval:
+            self.stats.roll_interval(final=True)
+        return self.stats
+
+
+def install_fast_event_loop():
+    """Use uvloop when available (installed with uvicorn[standard])"""
+    try:
+        import uvloop
+    except ImportError:
+        return
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+
+
+def run_load(**kwargs):
+    """Blocking helper: build a LoadEngine from kwargs and run it"""
+    install_fast_event_loop()
+    return asyncio.run(LoadEngine(**kwargs).run())
+
+
+def _latency_row(label, histogram):
+    values = histogram.percentiles()
+    cells = "".join(f"{values[p] * 1000:10.1f}" for p in DEFAULT_PERCENTILES)
+    return f"  {label:<20} {histogram.total:>9}{cells}{histogram.max_us / 1000:10.1f}"
+
+
+def print_summary(stats):
+    elapsed = stats.elapsed or 1e-9
+    error_rate = stats.errors / stats.completed if stats.completed else 0.0
+    print("\n" + "=" * 80)
+    print(f"Requests: {stats.completed} in {elapsed:.1f}s ({stats.completed / elapsed:.1f} req/s)")
+    print(f"Errors:   {stats.errors} ({error_rate:.2%})   Skipped (client saturated): {stats.skipped}")
+    header = "".join(f"{f'p{p:g}':>10}" for p in DEFAULT_PERCENTILES)
+    print(f"\n  {'latency (ms)':<20} {'count':>9}{header}{'max':>10}")
+    for (endpoint, status), histogram in sorted(stats.response.items(), key=lambda item: (item[0][0], str(item[0][1]))):
+        print(_latency_row(f"{endpoint} {status}", histogram))
+    print(_latency_row("all (response)", stats.overall("response")))
+    print(_latency_row("all (service)", stats.overall("service")))
+    print("=" * 80)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Load generator for the Vibe Monitor API")
+    parser.add_argument("--url", default=BASE_URL, help=f"target base URL (default {BASE_URL})")
+    parser.add_argument("--mode", choices=("open", "closed"), default="open")
+    parser.add_argument("--rate", type=float, help="open mode: requests per second")
+    parser.add_argument("--users", type=int, help="closed mode: virtual users")
+    parser.add_argument("--duration", default="60s", help="run length at full load, e.g. 30s, 5m")
+    parser.add_argument("--ramp-up", default="0s", help="ramp from 0 to --rate/--users over this long")
+    parser.add_argument("--stages", help="ramp schedule instead of --rate/--users, e.g. 30s:100,1m:1000")
+    parser.add_argument("--mix", help="weighted endpoints, e.g. /health=4,/api/vibe=1 (default: equal)")
+    parser.add_argument("--think-time", default="0",
+                        help="closed mode: seconds between a user's requests, N or MIN-MAX")
+    parser.add_argument("--requests", type=int, help="stop after this many requests")
+    parser.add_argument("--connections", type=int, default=200, help="max pooled connections")
+    parser.add_argument("--max-in-flight", type=int, default=10000,
+                        help="open mode: skip arrivals beyond this many outstanding requests")
+    parser.add_argument("--timeout", type=float, default=10.0, help="per-request timeout in seconds")
+    parser.add_argument("--report-interval", type=float, default=5.0, help="seconds between progress lines")
+    parser.add_argument("--json", metavar="PATH", help="write results as JSON to PATH ('-' for stdout)")
+    return parser
+
+
+def engine_kwargs(args):
+    """Translate parsed CLI arguments into LoadEngine keyword arguments"""
+    if args.stages:
+        schedule = Schedule(parse_stages(args.stages))
+    else:
+        target = args.rate if args.mode == "open" else args.users
+        if target is None:
+            target = 10.0 if args.mode == "open" else 10
+        ramp_up = parse_duration(args.ramp_up)
+        stages = [(ramp_up, target)] if ramp_up else []
+        schedule = Schedule(stages + [(parse_duration(args.duration), target)], initial=0.0 if ramp_up else target)
+
+    low, _, high = args.think_time.partition("-")
+    return dict(
+        base_url=args.url,
+        mode=args.mode,
+        schedule=schedule,
+        mix=parse_mix(args.mix),
+        max_connections=args.connections,
+        timeout=args.timeout,
+        think_time=(float(low), float(high or low)),
+        max_requests=args.requests,
+        max_in_flight=args.max_in_flight,
+        report_interval=args.report_interval,
+    )
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    kwargs = engine_kwargs(args)
+    logger.info(f"Starting {args.mode}-loop load against {args.url} for {kwargs['schedule'].duration:.0f}s")
+    stats = run_load(**kwargs)
+    if args.json != "-":
+        print_summary(stats)
+    if args.json:
+        results = {
+            "config": {
+                "url": args.url,
+                "mode": args.mode,
+                "stages": kwargs["schedule"].stages,
+                "mix": dict(zip(*kwargs["mix"])),
+                "think_time": kwargs["think_time"],
+                "connections": args.connections,
+            },
+            **stats.to_dict(),
+        }
+        if args.json == "-":
+            print(json.dumps(results, indent=2))
+        else:
+            with open(args.json, "w") as f:
+                json.dump(results, f, indent=2)
+            logger.info(f"Results written to {args.json}")
+    return stats
+
+
+if __name__ == "__main__":
+    main()
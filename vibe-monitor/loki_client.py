@@ -0,0 +1,285 @@
+# -*- coding: utf-8 -*-
+"""
+Loki log shipper for the Vibe Monitor API.
+
+send_log() only appends to a bounded in-memory queue. A background flusher
+thread drains the queue, groups entries by label set and pushes each batch to
+Loki as a single `streams` payload, either when `batch_size` entries are
+waiting or every `flush_interval` seconds, whichever comes first.
+
+When the queue is full the `overflow_policy` decides what is lost:
+  drop_oldest  evict the oldest queued line to make room (default)
+  drop_newest  reject the incoming line
+  sample       past SAMPLE_WATERMARK of capacity keep only `sample_ratio` of
+               incoming lines, reject everything once full
+
+If `spool_dir` is set, batches that Loki refuses or times out on are appended
+to an on-disk spool (see loki_spool.py) instead of being lost. Each worker
+process claims its own slot directory under `spool_dir`. While Loki is
+down new batches go straight to the spool; once `/ready` answers again the
+spool is replayed at no more than `replay_rate` batches per second.
+"""
+import collections
+import logging
+import random
+import threading
+import time
+
+import requests
+from prometheus_client import Counter, Gauge
+
+from loki_spool import LokiSpool, claim_spool_slot
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LABELS = {"job": "vibe-monitor-app", "service": "fastapi"}
+
+OVERFLOW_POLICIES = ("drop_oldest", "drop_newest", "sample")
+SAMPLE_WATERMARK = 0.5
+
+PUSH_OK = "ok"
+PUSH_RETRY = "retry"
+PUSH_REJECTED = "rejected"
+
+# Log pipeline metrics, exported on /metrics next to the request metrics
+LOKI_QUEUE_DEPTH = Gauge(
+    'loki_log_queue_depth',
+    'Log lines queued in memory waiting to be shipped to Loki',
+    multiprocess_mode='livesum'
+)
+
+LOKI_SHIPPED = Counter(
+    'loki_log_shipped_total',
+    'Log lines successfully pushed to Loki'
+)
+
+LOKI_DROPPED = Counter(
+    'loki_log_dropped_total',
+    'Log lines dropped before reaching Loki',
+    ['reason']
+)
+
+LOKI_SPOOL_BYTES = Gauge(
+    'loki_log_spool_bytes',
+    'Bytes of undelivered log batches spooled to disk',
+    multiprocess_mode='livesum'
+)
+
+
+class LokiClient:
+    def __init__(self, loki_url="http://loki:3100", batch_size=500, flush_interval=1.0,
+                 max_queue_size=10000, timeout=2, overflow_policy="drop_oldest", sample_ratio=0.1,
+                 spool_dir=None, spool_segment_bytes=8 * 1024 * 1024, spool_max_bytes=256 * 1024 * 1024,
+                 replay_rate=5.0, ready_check_interval=5.0):
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy {overflow_policy!r}, expected one of {OVERFLOW_POLICIES}")
+
+        self.loki_url = loki_url
+        self.endpoint = f"{loki_url}/loki/api/v1/push"
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue_size = max_queue_size
+        self.timeout = timeout
+        self.overflow_policy = overflow_policy
+        self.sample_ratio = sample_ratio
+        self.spool_dir = spool_dir
+        self.spool_segment_bytes = spool_segment_bytes
+        self.spool_max_bytes = spool_max_bytes
+        self.replay_rate = replay_rate
+        self.ready_check_interval = ready_check_interval
+
+        self.sent_count = 0
+        self.dropped_count = 0
+        self.spool = None
+        self._spool_lock = None
+
+        self._queue = collections.deque()
+        self._cond = threading.Condition()
+        self._stopping = False
+        self._thread = None
+        self._session = requests.Session()
+        self._healthy = True
+        self._next_ready_check = 0.0
+        self._replay_tokens = 0.0
+        self._replay_refilled_at = time.monotonic()
+        logger.info(f"Loki client initialized with endpoint: {self.endpoint} (overflow policy: {overflow_policy})")
+
+    def start(self):
+        """Open the spool (if configured) and start the flusher thread (idempotent)"""
+        if self._thread and self._thread.is_alive():
+            return
+        if self.spool_dir and self.spool is None:
+            slot_dir, self._spool_lock = claim_spool_slot(self.spool_dir)
+            self.spool = LokiSpool(slot_dir, segment_bytes=self.spool_segment_bytes,
+                                   max_bytes=self.spool_max_bytes)
+            LOKI_SPOOL_BYTES.set(self.spool.size_bytes())
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="loki-flusher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5.0):
+        """Flush (or spool) whatever is still queued and stop the flusher thread"""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+        if self.spool:
+            self.spool.close()
+
+    def queue_depth(self):
+        return len(self._queue)
+
+    def _drop(self, reason, count=1):
+        self.dropped_count += count
+        LOKI_DROPPED.labels(reason=reason).inc(count)
+
+    def send_log(self, message, level="INFO", labels=None):
+        """Queue a log line for shipping; never blocks on the network"""
+        if labels is None:
+            labels = DEFAULT_LABELS
+
+        entry = (labels, time.time_ns(), message)
+        with self._cond:
+            depth = len(self._queue)
+            if depth >= self.max_queue_size:
+                if self.overflow_policy != "drop_oldest":
+                    self._drop("queue_full")
+                    return
+                self._queue.popleft()
+                self._drop("queue_full")
+            elif (self.overflow_policy == "sample"
+                  and depth >= self.max_queue_size * SAMPLE_WATERMARK
+                  and random.random() >= self.sample_ratio):
+                self._drop("sampled")
+                return
+            self._queue.append(entry)
+            if len(self._queue) >= self.batch_size:
+                self._cond.notify()
+
+    def _next_batch(self):
+        """Wait until a batch is due and pop it; returns (batch, stopping)"""
+        with self._cond:
+            deadline = time.monotonic() + self.flush_interval
+            while not self._stopping and len(self._queue) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+            count = min(self.batch_size, len(self._queue))
+            batch = [self._queue.popleft() for _ in range(count)]
+            return batch, self._stopping and not self._queue
+
+    def _run(self):
+        while True:
+            batch, done = self._next_batch()
+            if batch:
+                self._ship(batch)
+            if self.spool and not done:
+                self._replay_spool()
+            LOKI_QUEUE_DEPTH.set(len(self._queue))
+            if done:
+                break
+
+    def _ship(self, batch):
+        if self.spool and not self._healthy:
+            # Loki is known to be down: don't wait on another timeout
+            self._spool_batch(batch)
+            return
+
+        result = self._push(batch)
+        if result == PUSH_RETRY:
+            self._healthy = False
+            if self.spool:
+                self._spool_batch(batch)
+            else:
+                self._drop("push_failed", len(batch))
+        elif result == PUSH_REJECTED:
+            self._drop("rejected", len(batch))
+        else:
+            self._healthy = True
+
+    def _spool_batch(self, batch):
+        discarded = self.spool.append(batch)
+        if discarded:
+            self._drop("spool_full", discarded)
+        LOKI_SPOOL_BYTES.set(self.spool.size_bytes())
+
+    def _check_ready(self):
+        try:
+            return self._session.get(f"{self.loki_url}/ready", timeout=self.timeout).status_code == 200
+        except Exception:
+            return False
+
+    def _replay_spool(self):
+        if self.spool.is_empty():
+            return
+
+        now = time.monotonic()
+        if not self._healthy:
+            if now < self._next_ready_check:
+                return
+            self._next_ready_check = now + self.ready_check_interval
+            if not self._check_ready():
+                return
+            logger.info("Loki is ready again, replaying spooled logs")
+            self._healthy = True
+
+        # Token bucket: at most `replay_rate` batches per second, bursting to one second's worth
+        self._replay_tokens = min(self.replay_rate,
+                                  self._replay_tokens + (now - self._replay_refilled_at) * self.replay_rate)
+        self._replay_refilled_at = now
+
+        while self._replay_tokens >= 1:
+            record = self.spool.peek()
+            if record is None:
+                break
+            batch, position = record
+            result = self._push(batch)
+            if result == PUSH_RETRY:
+                self._healthy = False
+                break
+            if result == PUSH_REJECTED:
+                self._drop("rejected", len(batch))
+            self.spool.commit(position)
+            self._replay_tokens -= 1
+
+        LOKI_SPOOL_BYTES.set(self.spool.size_bytes())
+
+    @staticmethod
+    def build_payload(batch):
+        """Group (labels, timestamp_ns, message) entries into Loki streams"""
+        streams = {}
+        for labels, timestamp_ns, message in batch:
+            key = tuple(sorted(labels.items()))
+            stream = streams.get(key)
+            if stream is None:
+                stream = streams[key] = {"stream": dict(labels), "values": []}
+            stream["values"].append([str(timestamp_ns), message])
+        return {"streams": list(streams.values())}
+
+    def _push(self, batch):
+        """POST one batch; returns PUSH_OK, PUSH_RETRY or PUSH_REJECTED"""
+        payload = self.build_payload(batch)
+        try:
+            response = self._session.post(
+                self.endpoint,
+                json=payload,
+                headers={"Content-Type": "application/json"},
+                timeout=self.timeout
+            )
+        except Exception as e:
+            logger.warning(f"Error sending {len(batch)} logs to Loki: {e}")
+            return PUSH_RETRY
+
+        if response.status_code in (200, 204):
+            self.sent_count += len(batch)
+            LOKI_SHIPPED.inc(len(batch))
+            logger.debug(f"Shipped {len(batch)} log lines in {len(payload['streams'])} streams to Loki")
+            return PUSH_OK
+        logger.warning(f"Failed to send {len(batch)} logs to Loki: {response.status_code}")
+        if response.status_code == 429 or response.status_code >= 500:
+            return PUSH_RETRY
+        return PUSH_REJECTED
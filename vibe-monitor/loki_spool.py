@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+"""
+Append-only on-disk spool for log batches that could not be pushed to Loki.
+
+Batches are written as one JSON line each to numbered segment files
+(segment-00000001.ndjson, ...). A cursor file records how far replay has
+got; segments are deleted once fully replayed and the partially replayed
+head segment is rewritten on compaction. When the spool grows past
+`max_bytes` the oldest segment is discarded.
+
+The spool is not thread-safe: it is only ever touched by the Loki flusher
+thread. Worker processes sharing a spool directory each claim a separate
+slot with claim_spool_slot().
+"""
+import fcntl
+import json
+import logging
+import os
+import re
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_PATTERN = re.compile(r"^segment-(\d{8})\.ndjson$")
+CURSOR_FILE = "cursor.json"
+MAX_SLOTS = 256
+
+
+def claim_spool_slot(base_dir, max_slots=MAX_SLOTS):
+    """Lock the first free slot-NNN directory under base_dir for this process.
+
+    Returns (slot_dir, lock_fd); the lock is held until lock_fd is closed or
+    the process exits, so a restarted worker adopts the slot (and any
+    undelivered batches) left behind by a dead one.
+    """
+    for slot in range(max_slots):
+        slot_dir = os.path.join(base_dir, f"slot-{slot:03d}")
+        os.makedirs(slot_dir, exist_ok=True)
+        fd = os.open(os.path.join(slot_dir, ".lock"), os.O_CREAT | os.O_RDWR, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            continue
+        return slot_dir, fd
+    raise RuntimeError(f"All {max_slots} Loki spool slots under {base_dir} are in use")
+
+
+class LokiSpool:
+    def __init__(self, directory, segment_bytes=8 * 1024 * 1024, max_bytes=256 * 1024 * 1024):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+        self._segments = sorted(
+            int(m.group(1)) for m in map(SEGMENT_PATTERN.match, os.listdir(directory)) if m
+        )
+        self._sizes = {seg: os.path.getsize(self._path(seg)) for seg in self._segments}
+        self._cursor = self._load_cursor()
+        self._writer = None
+        self.compact()
+        logger.info(f"Loki spool at {directory}: {len(self._segments)} segments, {self.size_bytes()} bytes")
+
+    def _path(self, segment):
+        return os.path.join(self.directory, f"segment-{segment:08d}.ndjson")
+
+    def _load_cursor(self):
+        try:
+            with open(os.path.join(self.directory, CURSOR_FILE)) as f:
+                cursor = json.load(f)
+            return cursor["segment"], cursor["offset"]
+        except (OSError, ValueError, KeyError):
+            return (self._segments[0] if self._segments else 1), 0
+
+    def _save_cursor(self):
+        path = os.path.join(self.directory, CURSOR_FILE)
+        with open(path + ".tmp", "w") as f:
+            json.dump({"segment": self._cursor[0], "offset": self._cursor[1]}, f)
+        os.replace(path + ".tmp", path)
+
+    def _close_writer(self):
+        if self._writer:
+            self._writer.close()
+            self._writer = None
+
+    def _remove_segment(self, segment):
+        if segment == (self._segments[-1] if self._segments else None):
+            self._close_writer()
+        try:
+            os.remove(self._path(segment))
+        except FileNotFoundError:
+            pass
+        self._segments.remove(segment)
+        self._sizes.pop(segment, None)
+
+    def size_bytes(self):
+        return sum(self._sizes.values())
+
+    def is_empty(self):
+        if not self._segments:
+            return True
+        segment, offset = self._cursor
+        return segment >= self._segments[-1] and offset >= self._sizes[self._segments[-1]]
+
+    def append(self, batch):
+        """Persist one batch of (labels, timestamp_ns, message) entries.
+
+        Returns the number of entries discarded to stay under max_bytes.
+        """
+        line = (json.dumps(batch, separators=(",", ":"), ensure_ascii=False) + "\n").encode("utf-8")
+
+        if not self._segments or self._sizes[self._segments[-1]] + len(line) > self.segment_bytes:
+            self._close_writer()
+            segment = (self._segments[-1] + 1) if self._segments else max(1, self._cursor[0])
+            self._segments.append(segment)
+            self._sizes[segment] = 0
+        segment = self._segments[-1]
+
+        if self._writer is None:
+            self._writer = open(self._path(segment), "ab")
+        self._writer.write(line)
+        self._writer.flush()
+        self._sizes[segment] += len(line)
+
+        dropped = 0
+        while self.size_bytes() > self.max_bytes and len(self._segments) > 1:
+            oldest = self._segments[0]
+            dropped += self._count_entries(oldest, self._cursor[1] if self._cursor[0] == oldest else 0)
+            self._remove_segment(oldest)
+            self._cursor = (self._segments[0], 0)
+            self._save_cursor()
+        if dropped:
+            logger.warning(f"Loki spool over {self.max_bytes} bytes, discarded {dropped} oldest log lines")
+        return dropped
+
+    def _count_entries(self, segment, offset):
+        count = 0
+        with open(self._path(segment), "rb") as f:
+            f.seek(offset)
+            for line in f:
+                try:
+                    count += len(json.loads(line))
+                except ValueError:
+                    pass
+        return count
+
+    def peek(self):
+        """Return (batch, position) for the next unreplayed batch, or None"""
+        while self._segments:
+            segment, offset = self._cursor
+            if segment not in self._sizes:
+                later = [s for s in self._segments if s > segment]
+                if not later:
+                    return None
+                self._cursor = (later[0], 0)
+                continue
+
+            with open(self._path(segment), "rb") as f:
+                f.seek(offset)
+                line = f.readline()
+
+            if line.endswith(b"\n"):
+                position = (segment, offset + len(line))
+                try:
+                    return json.loads(line), position
+                except ValueError:
+                    logger.warning(f"Skipping corrupt record in Loki spool segment {segment}")
+                    self._cursor = position
+                    continue
+
+            # End of segment (or a torn write at the end of it)
+            if segment == self._segments[-1]:
+                return None
+            self._remove_segment(segment)
+            self._cursor = (self._segments[0], 0)
+            self._save_cursor()
+        return None
+
+    def commit(self, position):
+        """Mark everything up to `position` (from peek) as delivered"""
+        self._cursor = position
+        segment, offset = position
+        if segment == self._segments[-1] and offset >= self._sizes[segment]:
+            # Fully drained: drop the data and start the next segment fresh
+            self._remove_segment(segment)
+            self._cursor = (segment + 1, 0)
+        self._save_cursor()
+
+    def compact(self):
+        """Delete replayed segments and rewrite the partially replayed head"""
+        segment, offset = self._cursor
+        for old in [s for s in self._segments if s < segment]:
+            self._remove_segment(old)
+        if segment in self._sizes and offset > 0:
+            self._close_writer()
+            path = self._path(segment)
+            with open(path, "rb") as src, open(path + ".tmp", "wb") as dst:
+                src.seek(offset)
+                while True:
+                    chunk = src.read(1024 * 1024)
+                    if not chunk:
+                        break
+                    dst.write(chunk)
+            os.replace(path + ".tmp", path)
+            self._sizes[segment] = os.path.getsize(path)
+            if not self._sizes[segment]:
+                self._remove_segment(segment)
+        self._cursor = ((self._segments[0] if self._segments else max(1, segment)), 0)
+        self._save_cursor()
+
+    def close(self):
+        self._close_writer()
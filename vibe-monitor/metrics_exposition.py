@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+Cached Prometheus exposition for the /metrics endpoint.
+
+Rendering every series to text is linear in the number of series and used
+to run on the event loop for every scrape. MetricsExpositionCache renders in
+the threadpool instead and reuses the last rendering per format when:
+
+  - it is younger than `min_interval` seconds (caps renders per second), or
+  - nothing has called mark_changed() since it was rendered and it is younger
+    than `max_age` seconds (collectors like process_* and loki_* change
+    without notice, so unchanged output is still refreshed every `max_age`).
+
+Change tracking only sees this process, so it is switched off in
+multiprocess mode, where other workers update the shared metric files.
+
+The Accept header picks Prometheus text or OpenMetrics, and the gzip body is
+compressed once per rendering when the scraper sends Accept-Encoding: gzip.
+"""
+import asyncio
+import gzip
+import time
+
+from prometheus_client.exposition import choose_encoder, gzip_accepted
+from starlette.concurrency import run_in_threadpool
+
+
+class _Rendering:
+    __slots__ = ("body", "gzipped", "version", "rendered_at")
+
+    def __init__(self, body, version, rendered_at):
+        self.body = body
+        self.gzipped = None
+        self.version = version
+        self.rendered_at = rendered_at
+
+
+class MetricsExpositionCache:
+    def __init__(self, registry_factory, min_interval=1.0, max_age=30.0, track_changes=True):
+        self.registry_factory = registry_factory
+        self.min_interval = min_interval
+        self.max_age = max_age
+        self.track_changes = track_changes
+        self.renders = 0
+        self.hits = 0
+
+        self._version = 0
+        self._renderings = {}
+        self._locks = {}
+
+    def mark_changed(self):
+        """Note that a collector was updated since the last rendering"""
+        self._version += 1
+
+    def _is_fresh(self, rendering, now):
+        age = now - rendering.rendered_at
+        if age < self.min_interval:
+            return True
+        return self.track_changes and rendering.version == self._version and age < self.max_age
+
+    def _render(self, encoder):
+        return encoder(self.registry_factory())
+
+    async def _get_rendering(self, encoder, content_type):
+        rendering = self._renderings.get(content_type)
+        if rendering is not None and self._is_fresh(rendering, time.monotonic()):
+            self.hits += 1
+            return rendering, True
+
+        lock = self._locks.setdefault(content_type, asyncio.Lock())
+        async with lock:
+            # Another scrape may have rendered while we waited for the lock
+            rendering = self._renderings.get(content_type)
+            if rendering is not None and self._is_fresh(rendering, time.monotonic()):
+                self.hits += 1
+                return rendering, True
+
+            version = self._version
+            body = await run_in_threadpool(self._render, encoder)
+            rendering = _Rendering(body, version, time.monotonic())
+            self._renderings[content_type] = rendering
+            self.renders += 1
+            return rendering, False
+
+    async def expose(self, accept="", accept_encoding=""):
+        """Return (body, headers) for a scrape with the given request headers"""
+        encoder, content_type = choose_encoder(accept)
+        rendering, hit = await self._get_rendering(encoder, content_type)
+        headers = {
+            "Content-Type": content_type,
+            "Vary": "Accept, Accept-Encoding",
+            "X-Metrics-Cache": "hit" if hit else "miss",
+        }
+
+        if not gzip_accepted(accept_encoding):
+            return rendering.body, headers
+        if rendering.gzipped is None:
+            rendering.gzipped = await run_in_threadpool(gzip.compress, rendering.body, 6)
+        headers["Content-Encoding"] = "gzip"
+        return rendering.gzipped, headers
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""
+Prometheus multiprocess support for running the Vibe Monitor API with
+several workers (`python serve.py --workers N` or gunicorn with
+gunicorn.conf.py).
+
+prometheus_client picks its value storage when it is first imported, based
+on PROMETHEUS_MULTIPROC_DIR. The supervisor therefore prepares the directory
+and exports the variable *before* any worker imports the app; each worker
+then writes its counters and histograms to its own mmap files there and
+/metrics aggregates all of them through a MultiProcessCollector.
+
+This module deliberately imports prometheus_client lazily so the gunicorn
+master can use it without fixing the value class for the workers it forks.
+"""
+import glob
+import os
+
+MULTIPROC_DIR_ENV = "PROMETHEUS_MULTIPROC_DIR"
+DEFAULT_MULTIPROC_DIR = "/tmp/vibe-monitor-prometheus"
+
+
+def multiprocess_enabled():
+    return bool(os.environ.get(MULTIPROC_DIR_ENV))
+
+
+def prepare_multiprocess_dir(path=None):
+    """Export PROMETHEUS_MULTIPROC_DIR and clear metric files from earlier runs"""
+    path = path or os.environ.get(MULTIPROC_DIR_ENV) or DEFAULT_MULTIPROC_DIR
+    os.makedirs(path, exist_ok=True)
+    for stale in glob.glob(os.path.join(path, "*.db")):
+        os.remove(stale)
+    os.environ[MULTIPROC_DIR_ENV] = path
+    return path
+
+
+def metrics_registry():
+    """Registry to expose on /metrics: aggregated across workers when enabled"""
+    from prometheus_client import REGISTRY, CollectorRegistry, multiprocess
+
+    if not multiprocess_enabled():
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def mark_worker_dead(pid):
+    """Drop a finished worker's live gauges from the aggregate"""
+    if multiprocess_enabled():
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(pid)
@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""
+In-memory index over the AMFI NAV data for the /api/nav endpoints.
+
+The data is the amfi_nav_data.json (or .tsv) written by affinity-answers'
+amfi_ingest.py / extract_amfi_data.sh. It is read once per worker at
+startup, and every answer is then a dict lookup or a bisect:
+
+  by scheme code   dict -> row
+  by ISIN          dict -> rows (growth and reinvestment ISINs; a few repeat)
+  by fund house    sorted normalized scheme names, searched by prefix (AMFI
+                   scheme names start with the fund house's name, e.g.
+                   "Aditya Birla Sun Life ...", "HDFC ...")
+  by NAV range     sorted NAVs
+
+Each record's JSON is encoded once at load, so responses are assembled from
+bytes. The index version (a digest of the data file) is the ETag of every
+response, since they all change exactly when the data does.
+"""
+import gzip
+import hashlib
+import json
+import logging
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+
+from prometheus_client.exposition import gzip_accepted
+
+logger = logging.getLogger(__name__)
+
+MIN_GZIP_BYTES = 1024  # smaller bodies don't gain enough to be worth compressing
+TSV_FIELDS = ("scheme_code", "scheme_name", "asset_value", "date", "isin_growth", "isin_reinvestment")
+
+
+def normalize_name(text):
+    """Lowercase with single spaces; a trailing "mutual fund" is dropped"""
+    text = " ".join(text.lower().split())
+    if text.endswith(" mutual fund"):
+        text = text[:-len(" mutual fund")]
+    return text
+
+
+def _typed(raw):
+    """An amfi_nav_data record (all strings) with numbers, ISO dates and nulls for "-" """
+    try:
+        nav_date = datetime.strptime(raw["date"], "%d-%b-%Y").date().isoformat()
+    except ValueError:
+        nav_date = raw["date"] or None
+    return {
+        "scheme_code": int(raw["scheme_code"]),
+        "scheme_name": raw["scheme_name"],
+        "nav": float(raw["asset_value"]),
+        "date": nav_date,
+        "isin_growth": None if raw["isin_growth"] in ("", "-") else raw["isin_growth"],
+        "isin_reinvestment": None if raw["isin_reinvestment"] in ("", "-") else raw["isin_reinvestment"],
+    }
+
+
+def read_records(path):
+    """(raw records, file digest) from amfi_nav_data.json or amfi_nav_data.tsv"""
+    with open(path, "rb") as f:
+        data = f.read()
+    digest = hashlib.blake2b(data, digest_size=8).hexdigest()
+    if path.endswith(".tsv"):
+        lines = data.decode("utf-8").splitlines()[1:]
+        records = [dict(zip(TSV_FIELDS, line.split("\t"))) for line in lines if line.count("\t") == 5]
+    else:
+        records = json.loads(data)["data"]
+    return records, digest
+
+
+class NavIndex:
+    def __init__(self, records, version, source=None):
+        self.version = version
+        self.source = source
+        self.etag = f'W/"{version}"'
+        encode = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+        self.records = [_typed(raw) for raw in records]
+        self.encoded = [encode(record).encode("utf-8") for record in self.records]
+        self.as_of = max((record["date"] for record in self.records if record["date"]), default=None)
+
+        self._by_code = {}
+        self._by_isin = {}
+        for row, record in enumerate(self.records):
+            self._by_code.setdefault(record["scheme_code"], row)
+            for isin in (record["isin_growth"], record["isin_reinvestment"]):
+                if isin:
+                    rows = self._by_isin.setdefault(isin.upper(), [])
+                    if row not in rows:
+                        rows.append(row)
+
+        self._names = [normalize_name(record["scheme_name"]) for record in self.records]
+        by_name = sorted(range(len(self.records)), key=self._names.__getitem__)
+        self._sorted_names = [self._names[row] for row in by_name]
+        self._name_rows = by_name
+        by_nav = sorted(range(len(self.records)), key=lambda row: self.records[row]["nav"])
+        self._sorted_navs = [self.records[row]["nav"] for row in by_nav]
+        self._nav_rows = by_nav
+
+    @classmethod
+    def load(cls, path):
+        records, digest = read_records(path)
+        index = cls(records, digest, source=path)
+        logger.info(f"NAV index loaded: {len(index)} schemes from {path} (as of {index.as_of})")
+        return index
+
+    def __len__(self):
+        return len(self.records)
+
+    def by_code(self, scheme_code):
+        """Row of a scheme code, or None"""
+        return self._by_code.get(scheme_code)
+
+    def by_isin(self, isin):
+        """Rows with `isin` as growth or reinvestment ISIN"""
+        return self._by_isin.get(isin.upper(), [])
+
+    def _fund_house_rows(self, fund_house):
+        prefix = normalize_name(fund_house)
+        start = bisect_left(self._sorted_names, prefix)
+        end = bisect_left(self._sorted_names, prefix + "￿", start)
+        return self._name_rows[start:end], prefix
+
+    def _nav_range_rows(self, min_nav, max_nav):
+        start = 0 if min_nav is None else bisect_left(self._sorted_navs, min_nav)
+        end = len(self._sorted_navs) if max_nav is None else bisect_right(self._sorted_navs, max_nav)
+        return self._nav_rows[start:end]
+
+    def search(self, fund_house=None, min_nav=None, max_nav=None):
+        """Rows matching every given filter, in data file order"""
+        if fund_house is None and min_nav is None and max_nav is None:
+            return range(len(self.records))
+        if fund_house is None:
+            return sorted(self._nav_range_rows(min_nav, max_nav))
+        rows, prefix = self._fund_house_rows(fund_house)
+        if min_nav is None and max_nav is None:
+            return sorted(rows)
+        # Walk the smaller candidate list and test the other filter per row
+        nav_rows = self._nav_range_rows(min_nav, max_nav)
+        if len(rows) <= len(nav_rows):
+            low = float("-inf") if min_nav is None else min_nav
+            high = float("inf") if max_nav is None else max_nav
+            return sorted(row for row in rows if low <= self.records[row]["nav"] <= high)
+        return sorted(row for row in nav_rows if self._names[row].startswith(prefix))
+
+    def record_body(self, row):
+        return self.encoded[row]
+
+    def list_body(self, rows):
+        return b'{"total":%d,"results":[%s]}' % (len(rows), b",".join(self.encoded[row] for row in rows))
+
+    def page_body(self, rows, page, page_size):
+        start = (page - 1) * page_size
+        selected = rows[start:start + page_size]
+        return b'{"total":%d,"page":%d,"page_size":%d,"results":[%s]}' % (
+            len(rows), page, page_size, b",".join(self.encoded[row] for row in selected))
+
+    def not_modified(self, if_none_match):
+        """True if an If-None-Match header names the current version; ask only for a resource that exists"""
+        if not if_none_match:
+            return False
+        if if_none_match.strip() == "*":
+            return True
+        tags = (tag.strip() for tag in if_none_match.split(","))
+        return any(tag.removeprefix("W/") == self.etag[2:] for tag in tags)
+
+    def encode(self, body, accept_encoding=""):
+        """(body, headers) for a response, gzipped when the client accepts it and it is worth it"""
+        headers = {"ETag": self.etag, "Vary": "Accept-Encoding"}
+        if len(body) >= MIN_GZIP_BYTES and gzip_accepted(accept_encoding):
+            headers["Content-Encoding"] = "gzip"
+            return gzip.compress(body, 5), headers
+        return body, headers
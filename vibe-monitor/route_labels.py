@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""
+Bounded label values for request metrics and Loki streams.
+
+Raw request paths (and client-chosen methods) are unbounded: every distinct
+value becomes a new Prometheus series or Loki stream. resolve_route_template()
+maps a request to the path template of the FastAPI route it matches, with
+unknown paths collapsed into UNMATCHED_ROUTE, and LabelLimiter caps how many
+distinct label combinations a metric may create, folding the rest into an
+OVERFLOW_LABEL series counted by http_metric_label_overflow_total.
+"""
+from prometheus_client import Counter
+from starlette.routing import Match
+
+UNMATCHED_ROUTE = "__unmatched__"
+OVERFLOW_LABEL = "__overflow__"
+
+LABEL_OVERFLOW = Counter(
+    'http_metric_label_overflow_total',
+    'Observations folded into the overflow series because a metric hit its label-set cap',
+    ['metric']
+)
+
+
+def resolve_route_template(request):
+    """Return the path template of the route matching `request` (e.g. "/api/vibe")"""
+    partial = None
+    for route in request.app.router.routes:
+        match, _ = route.matches(request.scope)
+        if match == Match.FULL:
+            return route.path
+        if match == Match.PARTIAL and partial is None:
+            # Path matched but the method didn't (a 405): still a known route
+            partial = route.path
+    return partial or UNMATCHED_ROUTE
+
+
+class LabelLimiter:
+    """Caps the number of distinct label-value tuples one metric may use"""
+
+    def __init__(self, metric_name, max_label_sets):
+        self.metric_name = metric_name
+        self.max_label_sets = max_label_sets
+        self._seen = set()
+        self._overflow = LABEL_OVERFLOW.labels(metric=metric_name)
+
+    def limit(self, *values):
+        """Return `values` if allowed, otherwise an all-OVERFLOW_LABEL tuple"""
+        if values in self._seen:
+            return values
+        if len(self._seen) < self.max_label_sets:
+            self._seen.add(values)
+            return values
+        self._overflow.inc()
+        return (OVERFLOW_LABEL,) * len(values)
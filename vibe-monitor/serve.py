@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Run the Vibe Monitor API with one or more uvicorn worker processes.
+
+    python serve.py --workers 16
+
+This script must not import app.py itself: uvicorn spawns the workers, and
+each one imports `app:app` only after PROMETHEUS_MULTIPROC_DIR has been
+exported here, so /metrics can aggregate every worker's counters and
+histograms.
+"""
+import argparse
+import os
+
+import uvicorn
+
+from multiprocess_metrics import prepare_multiprocess_dir
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the Vibe Monitor API")
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WORKERS", "1")),
+                        help="worker processes (default: $WORKERS or 1)")
+    args = parser.parse_args()
+
+    if args.workers > 1:
+        prepare_multiprocess_dir()
+    uvicorn.run("app:app", host=args.host, port=args.port, workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,86 +1,53 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
+"""
+Interactive traffic menu for the Vibe Monitor API, driving the asyncio
+engine in loadgen.py. Any command-line arguments skip the menu and are passed
+to the load generator CLI, e.g.:
+
+    python simulate_traffic.py --mode open --rate 1000 --duration 60
+"""
+import sys
 import requests
-import time
-import random
-import threading
-from concurrent.futures import ThreadPoolExecutor
 import logging
 
+import loadgen
+from loadgen import ENDPOINTS, Schedule, print_summary, run_load
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 BASE_URL = "http://localhost:8000"
-ENDPOINTS = [
-    "/",
-    "/health",
-    "/api/vibe",
-    "/api/slow"
-]
-
-def make_request(endpoint):
-    """Make a single request to the specified endpoint"""
-    try:
-        start_time = time.time()
-        response = requests.get(f"{BASE_URL}{endpoint}", timeout=10)
-        latency = time.time() - start_time
-        
-        logger.info(f"Request to {endpoint} - Status: {response.status_code} - Latency: {latency:.3f}s")
-        
-        if response.status_code == 200:
-            logger.info(f"Response: {response.json()}")
-        
-        return response.status_code, latency
-    except Exception as e:
-        logger.error(f"Error making request to {endpoint}: {e}")
-        return None, None
 
 def continuous_traffic(duration=300):  # 5 minutes default
-    """Generate continuous traffic for the specified duration"""
+    """One virtual user with a random 0.1-2s think time for `duration` seconds"""
     logger.info(f"Starting traffic simulation for {duration} seconds...")
-    
-    start_time = time.time()
-    request_count = 0
-    
-    while time.time() - start_time < duration:
-        # Randomly select an endpoint
-        endpoint = random.choice(ENDPOINTS)
-        
-        # Make the request
-        status, latency = make_request(endpoint)
-        request_count += 1
-        
-        # Random delay between requests (0.1 to 2 seconds)
-        delay = random.uniform(0.1, 2.0)
-        time.sleep(delay)
-        
-        # Log progress every 10 requests
-        if request_count % 10 == 0:
-            elapsed = time.time() - start_time
-            logger.info(f"Progress: {request_count} requests in {elapsed:.1f}s")
-    
-    logger.info(f"Traffic simulation completed. Total requests: {request_count}")
+    stats = run_load(base_url=BASE_URL, mode="closed", schedule=Schedule([(duration, 1)], initial=1),
+                     think_time=(0.1, 2.0), report_interval=10)
+    logger.info(f"Traffic simulation completed. Total requests: {stats.completed}")
+    print_summary(stats)
 
-def burst_traffic():
-    """Generate burst traffic using multiple threads"""
+def burst_traffic(requests_total=20, users=10):
+    """`requests_total` requests sent back-to-back by `users` concurrent users"""
     logger.info("Starting burst traffic simulation...")
-    
-    with ThreadPoolExecutor(max_workers=10) as executor:
-        # Submit multiple requests simultaneously
-        futures = []
-        for _ in range(20):
-            endpoint = random.choice(ENDPOINTS)
-            futures.append(executor.submit(make_request, endpoint))
-        
-        # Wait for all requests to complete
-        for future in futures:
-            future.result()
-    
+    stats = run_load(base_url=BASE_URL, mode="closed", schedule=Schedule([(60, users)], initial=users),
+                     max_requests=requests_total, report_interval=0)
     logger.info("Burst traffic simulation completed")
+    print_summary(stats)
+
+def constant_rate_traffic(rate, duration):
+    """Open-loop load at `rate` requests per second for `duration` seconds"""
+    logger.info(f"Starting {rate} req/s load for {duration} seconds...")
+    stats = run_load(base_url=BASE_URL, mode="open", schedule=Schedule([(duration, rate)], initial=rate))
+    print_summary(stats)
 
 def main():
     """Main function to run different traffic patterns"""
+    if len(sys.argv) > 1:
+        loadgen.main(sys.argv[1:])
+        return
+
     logger.info("Starting Vibe Monitor Traffic Simulation")
     logger.info(f"Target URL: {BASE_URL}")
     logger.info("Available endpoints: " + ", ".join(ENDPOINTS))
@@ -105,10 +72,11 @@ def main():
         print("1. Continuous traffic (5 minutes)")
         print("2. Burst traffic")
         print("3. Custom duration continuous traffic")
-        print("4. Exit")
+        print("4. Constant request rate (open loop)")
+        print("5. Exit")
         print("="*50)
         
-        choice = input("Select an option (1-4): ").strip()
+        choice = input("Select an option (1-5): ").strip()
         
         if choice == "1":
             continuous_traffic(300)  # 5 minutes
@@ -121,10 +89,17 @@ def main():
             except ValueError:
                 logger.error("Invalid duration. Please enter a number.")
         elif choice == "4":
+            try:
+                rate = float(input("Enter requests per second: "))
+                duration = int(input("Enter duration in seconds: "))
+                constant_rate_traffic(rate, duration)
+            except ValueError:
+                logger.error("Invalid rate or duration. Please enter numbers.")
+        elif choice == "5":
             logger.info("Exiting traffic simulation")
             break
         else:
-            logger.error("Invalid choice. Please select 1-4.")
+            logger.error("Invalid choice. Please select 1-5.")
 
 if __name__ == "__main__":
     main()
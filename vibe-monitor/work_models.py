@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+Simulated work for the Vibe Monitor endpoints.
+
+Endpoints call `await simulate_work(endpoint, duration)` and the work model
+configured for that endpoint decides how the time is spent:
+
+  async_sleep  await asyncio.sleep - the event loop keeps serving (default)
+  cpu_thread   busy-loop for `duration` in the thread pool
+  cpu_process  busy-loop for `duration` in the process pool (no GIL contention)
+  blocking_io  a real blocking call (time.sleep) run in the thread pool
+  blocking     time.sleep on the event loop itself - stalls every other
+               request; kept only so benchmarks can show the difference
+
+The model is picked per endpoint from WORK_MODEL_<ENDPOINT> (e.g.
+WORK_MODEL_SLOW=cpu_process), falling back to WORK_MODEL.
+"""
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+ENDPOINTS = ("root", "health", "vibe", "slow")
+DEFAULT_WORK_MODEL = "async_sleep"
+
+_thread_pool = None
+_process_pool = None
+
+
+def _get_thread_pool():
+    global _thread_pool
+    if _thread_pool is None:
+        _thread_pool = ThreadPoolExecutor(
+            max_workers=int(os.getenv("WORK_THREADS", "32")),
+            thread_name_prefix="work"
+        )
+    return _thread_pool
+
+
+def _get_process_pool():
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(max_workers=int(os.getenv("WORK_PROCESSES", str(os.cpu_count() or 1))))
+    return _process_pool
+
+
+def burn_cpu(duration):
+    """Spin the CPU for `duration` seconds; returns the number of iterations"""
+    deadline = time.perf_counter() + duration
+    iterations = 0
+    while time.perf_counter() < deadline:
+        iterations += 1
+    return iterations
+
+
+async def _async_sleep(duration):
+    await asyncio.sleep(duration)
+
+
+async def _cpu_thread(duration):
+    await asyncio.get_running_loop().run_in_executor(_get_thread_pool(), burn_cpu, duration)
+
+
+async def _cpu_process(duration):
+    await asyncio.get_running_loop().run_in_executor(_get_process_pool(), burn_cpu, duration)
+
+
+async def _blocking_io(duration):
+    await asyncio.get_running_loop().run_in_executor(_get_thread_pool(), time.sleep, duration)
+
+
+async def _blocking(duration):
+    time.sleep(duration)
+
+
+WORK_MODELS = {
+    "async_sleep": _async_sleep,
+    "cpu_thread": _cpu_thread,
+    "cpu_process": _cpu_process,
+    "blocking_io": _blocking_io,
+    "blocking": _blocking,
+}
+
+
+def load_work_models(environ=os.environ):
+    """Resolve the work model for every endpoint from the environment"""
+    default = environ.get("WORK_MODEL", DEFAULT_WORK_MODEL)
+    selected = {}
+    for endpoint in ENDPOINTS:
+        model = environ.get(f"WORK_MODEL_{endpoint.upper()}", default)
+        if model not in WORK_MODELS:
+            raise ValueError(f"Unknown work model {model!r} for {endpoint}, expected one of {sorted(WORK_MODELS)}")
+        selected[endpoint] = model
+    return selected
+
+
+ENDPOINT_WORK_MODELS = load_work_models()
+
+
+async def simulate_work(endpoint, duration):
+    """Spend `duration` seconds using the work model configured for `endpoint`"""
+    await WORK_MODELS[ENDPOINT_WORK_MODELS[endpoint]](duration)
+
+
+def shutdown_pools():
+    global _thread_pool, _process_pool
+    if _thread_pool is not None:
+        _thread_pool.shutdown(wait=False, cancel_futures=True)
+        _thread_pool = None
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+        _process_pool = None